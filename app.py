@@ -8,38 +8,141 @@ Features:
 5. Session stats counter
 6. Logistic Regression Sigmoid Curve at /sigmoid
 7. Current message dot on sigmoid curve (inline + full page)
+8. Batch JSON API at /predict/batch
+9. LRU verdict cache for repeated messages (/cache/stats)
+10. Optional micro-batching of /predict requests (/batching/stats)
+11. Zero-downtime model reload (file watch or POST /admin/reload)
+12. Stats/history safe across threads and worker processes (LOGIFY_STATS_DB)
+13. Per-stage latency histograms at /metrics (Prometheus), optional Server-Timing
+14. Feedback written by a background group-commit writer (feedback.py)
+15. Near-duplicate campaign index: variants of known campaigns skip the model (/campaigns/stats)
+16. Optional multi-threaded chunked scoring of large batches (LOGIFY_SCORE_THREADS)
+17. Fast startup: lazy matplotlib, pre-fork warmup and boot timings (gunicorn.conf.py)
 """
 
 import os
-import io
-import re
-import json
-import math
-import base64
-import joblib
-import numpy as np
-from datetime import datetime
-
-import matplotlib
-matplotlib.use('Agg')  # no GUI, runs in background
-import matplotlib.pyplot as plt
-
-from flask import Flask, request, jsonify, render_template_string, redirect, url_for
+import hashlib
+import threading
+from time import perf_counter
+from datetime import datetime, timezone
+
+BOOT_STARTED = perf_counter()   # boot timings (see warmup()) count from here
+
+from flask import Flask, request, jsonify, redirect, url_for, Response
+
+import metrics
+from batching import MicroBatcher, QueueFull
+from cache import VerdictCache
+from campaigns import CampaignIndex, CONFIDENT as CAMPAIGN_CONFIDENT, TRUSTED_PROB
+from chart import sigmoid_svg, chart_prob_key, SIZES as CHART_SIZES
+from feedback import FeedbackWriter
+from parallel import ScoringPool
+from reloader import ModelSlot, ModelReloader
+from scorer import PROBE_TEXTS
+from stats import SessionStats
+from predictor import (Predictor, looks_like_gibberish, get_confidence_label,
+                       prediction_json, model_watch_path, GIBBERISH_REASON)
 
 MODEL_FILE    = "model.pkl"
+MODEL_ARTIFACT = "model_artifact"
 FEEDBACK_FILE = "user_data.jsonl"
+MAX_BATCH     = 10000   # max messages per POST /predict/batch
+STATIC_MAX_AGE = 365 * 24 * 3600   # static/ assets: their URLs carry a content hash (asset_url)
+
+# Run every request path once before serving (LOGIFY_WARMUP=0 to skip); gunicorn.conf.py
+# does it in the pre-fork master so workers start warm
+WARMUP = os.environ.get("LOGIFY_WARMUP", "1") == "1"
+
+CACHE_MAX_ENTRIES = 50_000            # verdict cache size...
+CACHE_MAX_BYTES   = 32 * 1024 * 1024  # ...and approximate memory cap
+
+# Optional micro-batching of /predict requests: LOGIFY_MICROBATCH=1
+MICROBATCH        = os.environ.get("LOGIFY_MICROBATCH", "0") == "1"
+BATCH_MAX_SIZE    = int(os.environ.get("LOGIFY_BATCH_MAX_SIZE", "64"))
+BATCH_MAX_WAIT_US = int(os.environ.get("LOGIFY_BATCH_MAX_WAIT_US", "2000"))
+BATCH_QUEUE_DEPTH = int(os.environ.get("LOGIFY_BATCH_QUEUE_DEPTH", "10000"))
+
+# Large batches (/predict/batch, micro-batches) split into chunks scored on a thread pool:
+# LOGIFY_SCORE_THREADS=8; batches under two chunks stay in the request thread
+SCORE_THREADS = int(os.environ.get("LOGIFY_SCORE_THREADS", "1"))
+SCORE_CHUNK   = int(os.environ.get("LOGIFY_SCORE_CHUNK", "1000"))
+
+# Hot model reload: watch the model file (LOGIFY_WATCH_MODEL=1) and/or POST /admin/reload
+WATCH_MODEL         = os.environ.get("LOGIFY_WATCH_MODEL", "0") == "1"
+WATCH_INTERVAL      = float(os.environ.get("LOGIFY_WATCH_INTERVAL", "2.0"))
+CANARY_MIN_ACCURACY = float(os.environ.get("LOGIFY_CANARY_MIN_ACCURACY", "0.8"))
+ADMIN_TOKEN         = os.environ.get("LOGIFY_ADMIN_TOKEN")   # /admin/* is closed until it is set
+
+# Share stats/history between worker processes through SQLite (e.g. LOGIFY_STATS_DB=stats.db)
+STATS_DB = os.environ.get("LOGIFY_STATS_DB")
+
+# Per-stage timings in a Server-Timing response header (LOGIFY_SERVER_TIMING=1);
+# /metrics is always on unless LOGIFY_METRICS=0
+SERVER_TIMING = os.environ.get("LOGIFY_SERVER_TIMING", "0") == "1"
+
+# Feedback log: queued in memory, appended in batches by a background thread.
+# fsync after every batch ("batch"), at most once per interval ("interval") or never.
+FEEDBACK_FSYNC     = os.environ.get("LOGIFY_FEEDBACK_FSYNC", "interval")
+FEEDBACK_MAX_BYTES = int(os.environ.get("LOGIFY_FEEDBACK_MAX_BYTES", str(64 * 1024 * 1024)))  # then rotate
+FEEDBACK_MAX_BATCH = 256     # records per write
+FEEDBACK_MAX_DELAY = 0.05    # seconds a record may wait for its batch to fill
+
+# Campaign index (LOGIFY_CAMPAIGNS=0 to disable): a message this similar (estimated
+# Jaccard of normalized 5-byte shingles) to a confirmed spam campaign is answered unscored
+CAMPAIGNS             = os.environ.get("LOGIFY_CAMPAIGNS", "1") == "1"
+CAMPAIGN_THRESHOLD    = float(os.environ.get("LOGIFY_CAMPAIGN_THRESHOLD", "0.8"))
+CAMPAIGN_TTL          = float(os.environ.get("LOGIFY_CAMPAIGN_TTL", str(6 * 3600)))   # seconds unseen
+CAMPAIGN_MAX_CLUSTERS = 20_000
 
 app = Flask(__name__)
+app.config["SEND_FILE_MAX_AGE_DEFAULT"] = STATIC_MAX_AGE
+
+# The memory-mapped artifact (written by train.py next to model.pkl) is preferred:
+# it loads in milliseconds and its pages are shared by every worker process.
+MODEL_PATH = os.environ.get("LOGIFY_MODEL") or (MODEL_ARTIFACT if os.path.isdir(MODEL_ARTIFACT) else MODEL_FILE)
 
-if not os.path.exists(MODEL_FILE):
-    raise FileNotFoundError(f"{MODEL_FILE} not found. Run: python train.py")
+if not os.path.exists(MODEL_PATH):
+    raise FileNotFoundError(f"{MODEL_PATH} not found. Run: python train.py")
 
-model = joblib.load(MODEL_FILE)
+load_started       = perf_counter()
+model_slot         = ModelSlot(Predictor.load(MODEL_PATH, verify=True))   # once, before gunicorn forks
+MODEL_LOAD_SECONDS = perf_counter() - load_started
 
 # ── in-memory state ──────────────────────────────────────────────
-session_stats   = {"checked": 0, "spam": 0, "ham": 0}
-message_history = []       # last 5 predictions
-last_prob       = [None]   # mutable so /sigmoid route can read it
+verdict_cache   = VerdictCache(max_entries=CACHE_MAX_ENTRIES, max_bytes=CACHE_MAX_BYTES,
+                               watch_path=model_watch_path(MODEL_PATH))
+
+
+campaigns       = CampaignIndex(threshold=CAMPAIGN_THRESHOLD, ttl=CAMPAIGN_TTL,
+                                max_clusters=CAMPAIGN_MAX_CLUSTERS) if CAMPAIGNS else None
+campaign_seeder = None
+if campaigns is not None:
+    # users' recent labels, read back in the background so startup does not wait
+    campaign_seeder = threading.Thread(target=campaigns.seed, args=(FEEDBACK_FILE,),
+                                       name="campaign-seed", daemon=True)
+    campaign_seeder.start()
+
+
+def on_model_swap(previous: Predictor, new: Predictor):
+    # verdicts of the old model can never be hit again (keys carry the version)
+    verdict_cache.clear()
+    if campaigns is not None:
+        campaigns.clear(source="verdict")   # clusters an admin labeled stay
+
+
+# /admin/reload touches this file; the other worker processes' watch threads then reload too
+RELOAD_TRIGGER = MODEL_PATH.rstrip("/\\") + ".reload"
+
+reloader = ModelReloader(model_slot, MODEL_PATH, on_swap=on_model_swap,
+                         min_canary_accuracy=CANARY_MIN_ACCURACY, poll_interval=WATCH_INTERVAL,
+                         trigger_path=RELOAD_TRIGGER)
+if WATCH_MODEL:
+    reloader.start_watching()
+
+scoring_pool    = ScoringPool(SCORE_THREADS, SCORE_CHUNK) if SCORE_THREADS > 1 else None
+session         = SessionStats(history_size=5, db_path=STATS_DB)   # stats bar, history, last dot
+feedback_writer = FeedbackWriter(FEEDBACK_FILE, max_batch=FEEDBACK_MAX_BATCH, max_delay=FEEDBACK_MAX_DELAY,
+                                 fsync=FEEDBACK_FSYNC, max_bytes=FEEDBACK_MAX_BYTES)
 
 
 # ════════════════════════════════════════════════════════════════
@@ -53,191 +156,7 @@ HTML = r"""
   <title>LogifyNeural</title>
   <meta name="viewport" content="width=device-width, initial-scale=1"/>
   <link href="https://fonts.googleapis.com/css2?family=Space+Mono:wght@400;700&family=DM+Sans:wght@300;400;500;600&display=swap" rel="stylesheet">
-  <style>
-    :root {
-      --bg: #080c14;
-      --card: rgba(255,255,255,0.055);
-      --card2: rgba(255,255,255,0.03);
-      --text: rgba(255,255,255,0.93);
-      --muted: rgba(255,255,255,0.55);
-      --border: rgba(255,255,255,0.10);
-      --shadow: 0 8px 32px rgba(0,0,0,0.4);
-      --green: #22d3a5;
-      --red: #f4536a;
-      --yellow: #f5c542;
-      --blue: #3b9eff;
-      --btn: rgba(255,255,255,0.07);
-      --btnHover: rgba(255,255,255,0.13);
-    }
-    * { box-sizing:border-box; margin:0; padding:0; }
-    body {
-      font-family:'DM Sans',sans-serif;
-      background:
-        radial-gradient(ellipse 900px 500px at 10% 0%,  rgba(34,211,165,0.07) 0%,transparent 60%),
-        radial-gradient(ellipse 700px 500px at 90% 20%, rgba(59,158,255,0.08) 0%,transparent 55%),
-        radial-gradient(ellipse 600px 400px at 50% 100%,rgba(244,83,106,0.06) 0%,transparent 55%),
-        var(--bg);
-      color:var(--text); min-height:100vh; padding:32px 24px;
-    }
-    .header {
-      display:flex; align-items:center; justify-content:space-between;
-      margin-bottom:28px; flex-wrap:wrap; gap:14px;
-      max-width:1100px; margin-left:auto; margin-right:auto;
-    }
-    .logo { display:flex; align-items:center; gap:12px; }
-    .logo-icon {
-      width:42px; height:42px;
-      background:linear-gradient(135deg,var(--green),var(--blue));
-      border-radius:12px; display:flex; align-items:center;
-      justify-content:center; font-size:22px;
-    }
-    .logo-text { font-family:'Space Mono',monospace; font-size:22px; font-weight:700; }
-    .logo-text span { color:var(--green); }
-    .stats-bar { display:flex; gap:10px; flex-wrap:wrap; align-items:center; }
-    .stat-pill {
-      padding:6px 14px; border-radius:999px;
-      border:1px solid var(--border); background:var(--card2);
-      font-size:12.5px; color:var(--muted); font-family:'Space Mono',monospace;
-    }
-    .stat-pill b { color:var(--text); }
-    .stat-spam b { color:var(--red); }
-    .stat-ham  b { color:var(--green); }
-    .sigmoid-btn {
-      padding:6px 14px; border-radius:999px;
-      border:1px solid rgba(59,158,255,0.35);
-      background:rgba(59,158,255,0.10);
-      font-size:12.5px; color:var(--blue);
-      font-family:'Space Mono',monospace;
-      text-decoration:none; transition:background 0.15s;
-    }
-    .sigmoid-btn:hover { background:rgba(59,158,255,0.18); }
-    .grid { display:grid; grid-template-columns:1.2fr 0.8fr; gap:16px; max-width:1100px; margin:0 auto; }
-    @media(max-width:860px){ .grid{ grid-template-columns:1fr; } }
-    .card {
-      background:var(--card); border:1px solid var(--border);
-      border-radius:20px; padding:20px;
-      backdrop-filter:blur(12px); box-shadow:var(--shadow);
-    }
-    .card-title {
-      font-size:13px; font-family:'Space Mono',monospace;
-      color:var(--muted); text-transform:uppercase;
-      letter-spacing:1px; margin-bottom:14px;
-    }
-    textarea {
-      width:100%; resize:vertical; min-height:130px;
-      padding:14px; border-radius:14px; border:1px solid var(--border);
-      background:rgba(0,0,0,0.3); color:var(--text); outline:none;
-      font-size:14px; font-family:'DM Sans',sans-serif; line-height:1.5;
-      transition:border-color 0.2s;
-    }
-    textarea:focus { border-color:rgba(34,211,165,0.4); }
-    textarea::placeholder { color:rgba(255,255,255,0.3); }
-    .counter {
-      font-size:11.5px; color:var(--muted);
-      font-family:'Space Mono',monospace;
-      margin-top:6px; text-align:right;
-    }
-    .row { display:flex; gap:8px; flex-wrap:wrap; margin-top:12px; }
-    .btn {
-      border:1px solid var(--border); background:var(--btn); color:var(--text);
-      padding:9px 14px; border-radius:10px; cursor:pointer;
-      font-size:13px; font-family:'DM Sans',sans-serif;
-      transition:background 0.15s,transform 0.05s;
-    }
-    .btn:hover { background:var(--btnHover); }
-    .btn:active { transform:translateY(1px); }
-    .btn-primary { background:rgba(34,211,165,0.15); border-color:rgba(34,211,165,0.35); font-weight:600; }
-    .btn-primary:hover { background:rgba(34,211,165,0.22); }
-    .btn-danger { background:rgba(244,83,106,0.13); border-color:rgba(244,83,106,0.35); }
-    .btn-danger:hover { background:rgba(244,83,106,0.20); }
-    .result-box { margin-top:16px; }
-    .verdict {
-      display:flex; align-items:center; gap:10px;
-      padding:14px 16px; border-radius:14px;
-      margin-bottom:12px; font-size:15px; font-weight:600;
-    }
-    .verdict-spam { background:rgba(244,83,106,0.12); border:1px solid rgba(244,83,106,0.35); color:var(--red); }
-    .verdict-ham  { background:rgba(34,211,165,0.10);  border:1px solid rgba(34,211,165,0.30);  color:var(--green); }
-    .verdict-icon { font-size:22px; }
-    .confidence { font-size:12px; font-family:'Space Mono',monospace; opacity:0.8; font-weight:400; margin-left:4px; }
-    .meta-row { display:flex; gap:8px; flex-wrap:wrap; margin-bottom:10px; }
-    .badge {
-      padding:5px 11px; border-radius:999px;
-      border:1px solid var(--border); background:rgba(255,255,255,0.05);
-      font-size:12px; color:var(--muted); font-family:'Space Mono',monospace;
-    }
-    .badge b { color:var(--text); }
-    .bar-wrap { height:8px; border-radius:999px; background:rgba(255,255,255,0.07); overflow:hidden; margin-bottom:14px; }
-    .bar { height:100%; border-radius:999px; background:linear-gradient(90deg,var(--green),var(--yellow),var(--red)); transition:width 0.4s ease; }
-    .spam-words {
-      margin-top:10px; padding:10px 14px; border-radius:12px;
-      background:rgba(244,83,106,0.07); border:1px solid rgba(244,83,106,0.2);
-      font-size:12.5px; color:var(--muted);
-    }
-    .spam-words b { color:var(--text); display:block; margin-bottom:6px; }
-    .spam-tag {
-      display:inline-block; padding:3px 9px; border-radius:6px;
-      background:rgba(244,83,106,0.18); border:1px solid rgba(244,83,106,0.3);
-      color:var(--red); font-family:'Space Mono',monospace;
-      font-size:11px; margin:3px 3px 0 0;
-    }
-    .sigmoid-preview { margin-top:14px; border-radius:14px; overflow:hidden; border:1px solid var(--border); }
-    .sigmoid-preview img { width:100%; display:block; }
-    .sigmoid-link-row {
-      display:flex; align-items:center; justify-content:space-between;
-      padding:8px 12px; background:rgba(59,158,255,0.06); border-top:1px solid var(--border);
-      font-size:12px; color:var(--muted);
-    }
-    .sigmoid-link-row a { color:var(--blue); text-decoration:none; font-family:'Space Mono',monospace; font-size:11.5px; }
-    .sigmoid-link-row a:hover { text-decoration:underline; }
-    .feedback-row { display:flex; align-items:center; gap:8px; flex-wrap:wrap; margin-top:10px; }
-    .feedback-label { font-size:12px; color:var(--muted); font-family:'Space Mono',monospace; }
-    .toast {
-      margin-top:12px; padding:10px 14px; border-radius:12px;
-      border:1px solid rgba(34,211,165,0.3); background:rgba(34,211,165,0.08);
-      font-size:13px; color:var(--text);
-    }
-    .error-box {
-      margin-top:12px; padding:10px 14px; border-radius:12px;
-      border:1px solid rgba(244,83,106,0.3); background:rgba(244,83,106,0.08);
-      font-size:13px; color:var(--text);
-    }
-    .history-table { width:100%; border-collapse:collapse; font-size:12.5px; margin-top:8px; }
-    .history-table th {
-      text-align:left; padding:6px 8px; color:var(--muted);
-      font-family:'Space Mono',monospace; font-size:11px;
-      text-transform:uppercase; border-bottom:1px solid var(--border); font-weight:400;
-    }
-    .history-table td {
-      padding:8px; border-bottom:1px solid rgba(255,255,255,0.04);
-      color:var(--muted); vertical-align:middle;
-    }
-    .history-table td:first-child { color:var(--text); max-width:160px; overflow:hidden; text-overflow:ellipsis; white-space:nowrap; }
-    .tag-spam { padding:2px 8px; border-radius:999px; background:rgba(244,83,106,0.15); color:var(--red);   font-family:'Space Mono',monospace; font-size:10.5px; }
-    .tag-ham  { padding:2px 8px; border-radius:999px; background:rgba(34,211,165,0.12); color:var(--green); font-family:'Space Mono',monospace; font-size:10.5px; }
-    .no-history { color:var(--muted); font-size:12.5px; text-align:center; padding:20px 0; font-family:'Space Mono',monospace; }
-    .info-list { list-style:none; padding:0; }
-    .info-list li {
-      padding:8px 0; border-bottom:1px solid var(--border);
-      font-size:13px; color:var(--muted); display:flex; gap:10px; align-items:flex-start;
-    }
-    .info-list li:last-child { border-bottom:none; }
-    .step {
-      min-width:22px; height:22px;
-      background:rgba(34,211,165,0.15); border:1px solid rgba(34,211,165,0.3);
-      border-radius:6px; display:flex; align-items:center; justify-content:center;
-      font-size:11px; color:var(--green); font-family:'Space Mono',monospace; font-weight:700;
-    }
-    code {
-      background:rgba(255,255,255,0.07); padding:1px 6px; border-radius:5px;
-      font-family:'Space Mono',monospace; font-size:11.5px; color:rgba(255,255,255,0.85);
-    }
-    .reason-box {
-      margin-top:8px; padding:8px 12px; border-radius:10px;
-      background:rgba(245,197,66,0.08); border:1px solid rgba(245,197,66,0.25);
-      font-size:12.5px; color:rgba(245,197,66,0.9);
-    }
-  </style>
+  <link rel="stylesheet" href="{{ asset_url('logify.css') }}">
 </head>
 <body>
 
@@ -308,9 +227,9 @@ HTML = r"""
           {% if result.reason %}<div class="reason-box"> {{ result.reason }}</div>{% endif %}
 
           <!-- Inline sigmoid with dot -->
-          {% if result.sigmoid_img %}
+          {% if result.sigmoid_url %}
           <div class="sigmoid-preview">
-            <img src="data:image/png;base64,{{ result.sigmoid_img }}" alt="Sigmoid curve">
+            <img src="{{ result.sigmoid_url }}" alt="Sigmoid curve">
             <div class="sigmoid-link-row">
               <span> White dot = your message on the sigmoid curve</span>
               <a href="/sigmoid" target="_blank">Open full chart →</a>
@@ -386,173 +305,231 @@ HTML = r"""
 
   </div>
 
-<script>
-  function updateCounter(ta) {
-    const chars = ta.value.length;
-    const words = ta.value.trim() === "" ? 0 : ta.value.trim().split(/\s+/).length;
-    document.getElementById("counter").textContent =
-      chars + " character" + (chars !== 1 ? "s" : "") +
-      " · " + words + " word" + (words !== 1 ? "s" : "");
-  }
-  window.addEventListener("DOMContentLoaded", () => {
-    const ta = document.getElementById("msgInput");
-    if (ta) updateCounter(ta);
-  });
-  function fillExample(isSpam) {
-    const ta = document.getElementById("msgInput");
-    ta.value = isSpam
-      ? "URGENT! You have WON a FREE prize worth $1000. Click the link NOW to claim before it expires!"
-      : "Hey, are we still on for lunch at 1pm today?";
-    updateCounter(ta); ta.focus();
-  }
-  function clearBox() {
-    const ta = document.getElementById("msgInput");
-    ta.value = ""; updateCounter(ta); ta.focus();
-  }
-</script>
+<script src="{{ asset_url('logify.js') }}"></script>
 </body>
 </html>
 """
 
 
+def content_hash(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=8).hexdigest()
+
+
+# page CSS / JS live in static/; a new version gets a new URL, so browsers may keep the old one forever
+ASSET_VERSIONS = {}
+for name in os.listdir(app.static_folder):
+    with open(os.path.join(app.static_folder, name), "rb") as f:
+        ASSET_VERSIONS[name] = content_hash(f.read())
+
+
+def asset_url(name: str) -> str:
+    return url_for("static", filename=name, v=ASSET_VERSIONS[name])
+
+
+app.jinja_env.globals["asset_url"] = asset_url
+HOME_TEMPLATE = app.jinja_env.from_string(HTML)   # parsed and compiled once, not per request
+HOME_VERSION  = content_hash((HTML + repr(sorted(ASSET_VERSIONS.items()))).encode("utf-8"))
+
+
 # ════════════════════════════════════════════════════════════════
 #  SIGMOID CHART GENERATOR
 # ════════════════════════════════════════════════════════════════
 
 def generate_sigmoid_chart(current_prob=None, inline=False):
     """
-    Returns base64 PNG of the sigmoid curve.
+    Returns the sigmoid curve as SVG markup (see chart.py).
     current_prob: plots a colored dot showing where the message lands.
     inline: smaller size for embedding inside the result card.
     """
-    figsize = (5.5, 2.8) if inline else (7, 4)
-    x = np.linspace(-8, 8, 400)
-    y = 1 / (1 + np.exp(-x))
-
-    fig, ax = plt.subplots(figsize=figsize)
-    fig.patch.set_facecolor("#080c14")
-    ax.set_facecolor("#0d1120")
-
-    # S curve
-    ax.plot(x, y, color="#22d3a5", linewidth=2.5, zorder=3)
-
-    # Decision boundary lines
-    ax.axhline(y=0.5, color="#f5c542", linestyle="--", linewidth=1.2, alpha=0.7)
-    ax.axvline(x=0.0, color="#f5c542", linestyle="--", linewidth=1.2, alpha=0.7)
-
-    # Shaded zones
-    ax.fill_between(x, y, 0.5, where=(y > 0.5), color="#f4536a", alpha=0.10)
-    ax.fill_between(x, y, 0.5, where=(y < 0.5), color="#22d3a5", alpha=0.10)
-
-    # Zone labels
-    ax.text( 4.5, 0.06, "HAM",  color="#22d3a5", fontsize=10, fontweight="bold", alpha=0.8)
-    ax.text(-7.0, 0.90, "SPAM", color="#f4536a", fontsize=10, fontweight="bold", alpha=0.8)
-    ax.text( 0.2, 0.52, "threshold = 0.5", color="#f5c542", fontsize=7.5, alpha=0.75)
-
-    # Dot for current message
-    if current_prob is not None:
-        p = max(min(current_prob, 0.9999), 0.0001)
-        log_odds  = math.log(p / (1 - p))
-        dot_color = "#f4536a" if current_prob >= 0.5 else "#22d3a5"
-
-        ax.scatter([log_odds], [current_prob],
-                   color=dot_color, edgecolors="white",
-                   linewidths=1.5, s=90, zorder=5)
-
-        x_offset = 0.25 if log_odds < 5 else -3.8
-        ax.annotate(
-            f"  your message\n  p = {current_prob:.3f}",
-            xy=(log_odds, current_prob),
-            xytext=(log_odds + x_offset, current_prob + 0.10),
-            color="white", fontsize=7.5,
-            arrowprops=dict(arrowstyle="->", color="white", lw=0.8),
-        )
-
-    # Styling
-    ax.set_xlabel("Log-odds score (raw model output)", color="#666", fontsize=8)
-    ax.set_ylabel("Spam probability", color="#666", fontsize=8)
-    ax.set_title("Logistic Regression — Sigmoid Curve", color="white",
-                 fontsize=10 if inline else 12, pad=8)
-    ax.set_ylim(-0.05, 1.05)
-    ax.tick_params(colors="#555", labelsize=7)
-    for spine in ax.spines.values():
-        spine.set_color("#222")
-
-    plt.tight_layout()
-    buf = io.BytesIO()
-    plt.savefig(buf, format="png", dpi=110, bbox_inches="tight",
-                facecolor=fig.get_facecolor())
-    plt.close(fig)
-    buf.seek(0)
-    return base64.b64encode(buf.read()).decode("utf-8")
+    svg, _ = sigmoid_svg("inline" if inline else "full", chart_prob_key(current_prob))
+    return svg.decode("utf-8")
+
+
+def sigmoid_chart_url(current_prob=None, inline=False):
+    return url_for("sigmoid_chart", size="inline" if inline else "full",
+                   p=chart_prob_key(current_prob))
 
 
 # ════════════════════════════════════════════════════════════════
 #  HELPERS
 # ════════════════════════════════════════════════════════════════
 
-def looks_like_gibberish(text: str) -> bool:
-    t = text.strip()
-    if len(t) < 5:
-        return False
+def save_feedback(text: str, label: int, trusted: bool = False):
+    """
+    Queues the record; feedback_writer appends it to FEEDBACK_FILE in the background.
+    Only a trusted (admin) spam label starts a campaign; any "not spam" label
+    may retract one, which sends its messages back to the model.
+    """
+    record = {"text": text, "label": int(label), "ts": datetime.now(timezone.utc).isoformat()}
+    if trusted:
+        record["trusted"] = True
+    feedback_writer.submit(record)
+    if campaigns is None:
+        return
+    if int(label) == 1 and trusted:
+        campaigns.add(text, TRUSTED_PROB, source="trusted")
+    elif int(label) == 0:
+        cluster = campaigns.retract(text, trusted=trusted)
+        if cluster is not None:
+            verdict_cache.discard_group(cluster.id)   # only that campaign's cached verdicts are now wrong
+
 
-    words = t.split()
+def current_model() -> Predictor:
+    """The live model. Read once per request so a reload never switches models mid-request."""
+    return model_slot.current
 
-    # Check if MOST words look like gibberish
-    gibberish_words = 0
-    for word in words:
-        letters = re.sub(r"[^A-Za-z]", "", word)
-        if not letters or len(letters) < 3:
-            continue
-        vowels = sum(ch.lower() in "aeiou" for ch in letters)
-        vowel_ratio = vowels / len(letters)
-        if vowel_ratio < 0.20:
-            gibberish_words += 1
 
-    # If more than half the words are gibberish → flag it
-    return gibberish_words >= len(words) * 0.5
+def get_top_spam_words(text: str, top_n: int = 6):
+    return current_model().get_top_spam_words(text, top_n)
 
 
-def save_feedback(text: str, label: int):
-    record = {"text": text, "label": int(label), "ts": datetime.utcnow().isoformat()}
-    with open(FEEDBACK_FILE, "a", encoding="utf-8") as f:
-        f.write(json.dumps(record) + "\n")
+def score_message(text: str, threshold: float = 0.50):
+    return current_model().score_message(text, threshold)
 
 
-def get_confidence_label(prob: float, pred: int) -> str:
-    if pred == 1:
-        if prob > 0.87:   return "Very likely spam"
-        elif prob > 0.65: return "Probably spam"
-        else:             return "Borderline"
-    else:
-        if prob < 0.15:   return "Definitely clean"
-        elif prob < 0.35: return "Looks clean"
-        else:             return "Borderline"
+def score_messages(texts, threshold: float = 0.50):
+    return current_model().score_messages(texts, threshold)
 
 
-def get_top_spam_words(text: str, top_n: int = 6):
-    try:
-        vectorizer = model.named_steps["tfidf"]
-        classifier = model.named_steps["clf"]
-        tfidf_mat  = vectorizer.transform([text])
-        feat_names = np.array(vectorizer.get_feature_names_out())
-        coefs      = classifier.coef_[0]
-        nz         = tfidf_mat.nonzero()[1]
-        if len(nz) == 0: return []
-        scores = [(feat_names[i], float(tfidf_mat[0, i]) * coefs[i]) for i in nz]
-        scores.sort(key=lambda x: x[1], reverse=True)
-        return [w for w, s in scores[:top_n] if s > 0]
-    except Exception:
-        return []
-
-
-def predict_message(text: str, threshold: float = 0.50):
-    if looks_like_gibberish(text):
-        return 1, 0.99, "Looks like random keyboard-smash (gibberish rule).", []
-    prob_spam  = float(model.predict_proba([text])[0][1])
-    pred       = 1 if prob_spam >= threshold else 0
-    spam_words = get_top_spam_words(text) if pred == 1 else []
-    return pred, prob_spam, None, spam_words
+def campaign_verdict(text: str, threshold: float = 0.50, key: bytes = None):
+    """
+    Verdict of a known campaign `text` is a near-duplicate of, else None.
+    With a cache `key` the verdict is cached under the campaign's id, so
+    retracting the campaign drops exactly those entries.
+    """
+    if campaigns is None:
+        return None
+    t0    = perf_counter()
+    match = campaigns.lookup(text)
+    T_CAMPAIGN.observe(perf_counter() - t0)
+    if match is None:
+        return None
+    cluster, similarity = match
+    source = "labeled by an admin" if cluster.source == "trusted" else "confirmed by the model"
+    reason = (f"Near-duplicate of known spam campaign #{cluster.id} ({source}): "
+              f"similarity {similarity:.2f}, {cluster.size} messages seen")
+    result = int(cluster.prob >= threshold), cluster.prob, reason, cluster.spam_words
+    if key is not None:
+        verdict_cache.put(key, result, group=cluster.id)
+        if not campaigns.live(cluster.id):   # retracted since the lookup; its discard may have run first
+            verdict_cache.discard_group(cluster.id)
+    return result
+
+
+def remember_verdict(text: str, result):
+    """Confident model verdicts (not rule-based ones) seed or grow a spam campaign."""
+    if campaigns is not None and result[2] is None and result[1] >= CAMPAIGN_CONFIDENT:
+        campaigns.add(text, result[1], result[3])
+
+
+def predict_message(text: str, threshold: float = 0.50, p: Predictor = None):
+    p      = p or current_model()
+    t0     = perf_counter()
+    key    = verdict_cache.key(text, threshold, p.version)
+    result = verdict_cache.get(key)
+    T_CACHE.observe(perf_counter() - t0)
+    if result is None:
+        result = campaign_verdict(text, threshold, key)
+        if result is None:
+            result = p.score_message(text, threshold)
+            remember_verdict(text, result)
+            verdict_cache.put(key, result)
+    return result
+
+
+def predict_messages(texts, threshold: float = 0.50, p: Predictor = None):
+    """Cached batch scoring: only cache misses go through score_messages()."""
+    p       = p or current_model()
+    if len(texts) == 1:   # nothing to share; skip the batch bookkeeping
+        return [predict_message(texts[0], threshold, p)]
+    t0      = perf_counter()
+    keys    = [verdict_cache.key(t, threshold, p.version) for t in texts]
+    results = [verdict_cache.get(k) for k in keys]
+    T_CACHE.observe(perf_counter() - t0)
+    misses  = [i for i, r in enumerate(results) if r is None]
+    if misses:
+        for i, r in zip(misses, score_and_cache([texts[i] for i in misses], (threshold, p))):
+            results[i] = r
+    return results
+
+
+def score_and_cache(texts, opts):
+    """opts = (threshold, Predictor); also the micro-batcher's scoring callback."""
+    threshold, p = opts
+    keys    = [verdict_cache.key(t, threshold, p.version) for t in texts]
+    results = [campaign_verdict(t, threshold, k) for t, k in zip(texts, keys)]
+    unknown = [i for i, r in enumerate(results) if r is None]
+    if unknown:
+        scored = p.score_messages([texts[i] for i in unknown], threshold, pool=scoring_pool)
+        for i, r in zip(unknown, scored):
+            results[i] = r
+            remember_verdict(texts[i], r)
+            verdict_cache.put(keys[i], r)
+    return results
+
+
+batcher = MicroBatcher(score_and_cache, max_batch_size=BATCH_MAX_SIZE,
+                       max_wait_us=BATCH_MAX_WAIT_US, max_queue=BATCH_QUEUE_DEPTH) if MICROBATCH else None
+
+
+def predict_message_batched(text: str, threshold: float = 0.50, p: Predictor = None):
+    """Like predict_message(), but cache misses wait for the micro-batch scheduler."""
+    p      = p or current_model()
+    t0     = perf_counter()
+    result = verdict_cache.get(verdict_cache.key(text, threshold, p.version))
+    T_CACHE.observe(perf_counter() - t0)
+    if result is None:
+        t0     = perf_counter()
+        result = batcher.submit(text, (threshold, p))
+        T_QUEUE.observe(perf_counter() - t0)   # queue wait + scoring in the batcher thread
+    return result
+
+
+# ════════════════════════════════════════════════════════════════
+#  METRICS
+# ════════════════════════════════════════════════════════════════
+
+T_CACHE    = metrics.stage("cache")
+T_QUEUE    = metrics.stage("batch_queue")
+T_CAMPAIGN = metrics.stage("campaign")
+T_CHART    = metrics.stage("chart")
+T_RENDER   = metrics.stage("render")
+BATCH_MESSAGES = metrics.REGISTRY.counter("logify_batch_messages_total",
+                                          "Messages received by /predict/batch", "api", "batch")
+
+
+def _cache_gauges():
+    st = verdict_cache.stats()
+    return {(("kind", k),): st[k] for k in ("entries", "bytes", "hits", "misses", "evictions")}
+
+
+def _campaign_gauges():
+    if campaigns is None:
+        return None
+    st = campaigns.stats()
+    return {(("kind", k),): st[k] for k in ("clusters", "lookups", "hits", "added", "merged", "evictions")}
+
+
+def _batcher_gauges():
+    if batcher is None:
+        return None
+    st = batcher.stats()
+    return {(("kind", k),): st[k] for k in ("queue_depth", "requests", "batches", "rejected")}
+
+
+metrics.REGISTRY.gauge("logify_cache", "Verdict cache entries/bytes and lookup counts", _cache_gauges)
+metrics.REGISTRY.gauge("logify_campaigns", "Campaign index clusters and lookup counts", _campaign_gauges)
+metrics.REGISTRY.gauge("logify_scoring_pool", "Batches split across the scoring thread pool",
+                       lambda: None if scoring_pool is None else
+                       {(("kind", k),): v for k, v in scoring_pool.stats().items()})
+metrics.REGISTRY.gauge("logify_microbatch", "Micro-batcher queue depth and counts", _batcher_gauges)
+metrics.REGISTRY.gauge("logify_feedback", "Feedback writer queue depth and counts",
+                       lambda: {(("kind", k),): v for k, v in feedback_writer.stats().items()
+                                if isinstance(v, int) and k != "max_queue"})
+metrics.REGISTRY.gauge("logify_model_info", "Model currently being served",
+                       lambda: {(("version", current_model().version),): 1})
+metrics.REGISTRY.gauge("logify_model_reloads_total", "Successful hot model reloads",
+                       lambda: reloader.status["reloads"], kind="counter")
 
 
 # ════════════════════════════════════════════════════════════════
@@ -574,15 +551,11 @@ def home():
             threshold = 0.50
             pred, prob, reason, spam_words = predict_message(text, threshold)
 
-            # update session stats
-            session_stats["checked"] += 1
-            session_stats["spam" if pred == 1 else "ham"] += 1
+            # update session stats + history (also feeds the /sigmoid dot)
+            session.record(text, pred, prob)
 
-            # store for /sigmoid route
-            last_prob[0] = prob
-
-            # generate inline sigmoid with dot
-            sigmoid_img = generate_sigmoid_chart(current_prob=prob, inline=True)
+            # inline sigmoid with dot, served from /chart/sigmoid.svg
+            sigmoid_url = sigmoid_chart_url(current_prob=prob, inline=True)
 
             result = {
                 "pred":        pred,
@@ -592,24 +565,31 @@ def home():
                 "reason":      reason,
                 "confidence":  get_confidence_label(prob, pred),
                 "spam_words":  spam_words,
-                "sigmoid_img": sigmoid_img,
+                "sigmoid_url": sigmoid_url,
             }
 
-            # update history (newest first, max 5)
-            message_history.insert(0, {
-                "text": text,
-                "pred": pred,
-                "prob": f"{prob:.3f}",
-                "time": datetime.now().strftime("%H:%M:%S"),
-            })
-            if len(message_history) > 5:
-                message_history.pop()
-
-    return render_template_string(
-        HTML,
+    stats, history = session.snapshot()
+    etag = None
+    if request.method == "GET":
+        # a GET page is a function of the stats, history and toast alone: revalidate, skip the render
+        etag = content_hash(repr((HOME_VERSION, saved, stats, history)).encode("utf-8"))
+        if request.if_none_match.contains(etag):
+            resp = Response(status=304)
+            resp.set_etag(etag)
+            resp.cache_control.no_cache = True
+            return resp
+
+    t0   = perf_counter()
+    page = HOME_TEMPLATE.render(
         text=text, result=result, saved=saved,
-        error=error, history=message_history, stats=session_stats,
+        error=error, history=history, stats=stats,
     )
+    T_RENDER.observe(perf_counter() - t0)
+    resp = Response(page, mimetype="text/html")
+    if etag is not None:
+        resp.set_etag(etag)
+        resp.cache_control.no_cache = True
+    return resp
 
 
 @app.route("/feedback", methods=["POST"])
@@ -618,15 +598,20 @@ def feedback():
     label_raw = (request.form.get("label") or "").strip()
     if not text or label_raw not in ("0", "1"):
         return redirect(url_for("home"))
-    save_feedback(text, int(label_raw))
+    save_feedback(text, int(label_raw), trusted=has_admin_token())
     return redirect(url_for("home", saved="1"))
 
 
+@app.route("/feedback/stats")
+def feedback_stats():
+    return jsonify(feedback_writer.stats())
+
+
 @app.route("/sigmoid")
 def sigmoid_page():
     """Full-page sigmoid — dot shows last analyzed message if available."""
-    prob = last_prob[0]
-    img  = generate_sigmoid_chart(current_prob=prob, inline=False)
+    prob = session.last_prob()
+    img  = sigmoid_chart_url(current_prob=prob, inline=False)
     note = f"Showing position for last message &nbsp;(p = {prob:.4f})" \
            if prob is not None else "Analyze a message first to see your dot on the curve."
     return f"""
@@ -660,7 +645,7 @@ def sigmoid_page():
     <body>
       <div class="title">📈 Logistic Regression — Sigmoid Curve</div>
       <div class="note">{note}</div>
-      <img src="data:image/png;base64,{img}" alt="Sigmoid">
+      <img src="{img}" alt="Sigmoid">
       <div class="explain">
         The sigmoid maps a raw log-odds score to a probability between 0 and 1.
         <span style="color:#f5c542;">Yellow dashed lines</span> = 0.5 decision boundary.
@@ -674,22 +659,216 @@ def sigmoid_page():
     """
 
 
+@app.route("/chart/sigmoid.svg")
+def sigmoid_chart():
+    """Sigmoid chart image; ?size=inline|full&p=<prob>. Content depends only on the URL."""
+    size = request.args.get("size", "full")
+    if size not in CHART_SIZES:
+        return jsonify({"error": "size must be 'inline' or 'full'"}), 400
+    prob = request.args.get("p")
+    if prob is not None:
+        try:
+            prob = float(prob)
+        except ValueError:
+            prob = -1.0
+        if not 0.0 <= prob <= 1.0:
+            return jsonify({"error": "p must be a probability between 0 and 1"}), 400
+
+    t0 = perf_counter()
+    svg, etag = sigmoid_svg(size, chart_prob_key(prob))
+    T_CHART.observe(perf_counter() - t0)
+    resp = Response(svg, mimetype="image/svg+xml")
+    resp.set_etag(etag)
+    resp.cache_control.public  = True
+    resp.cache_control.max_age = 86400
+    return resp.make_conditional(request)
+
+
+@app.route("/cache/stats")
+def cache_stats():
+    return jsonify({"model_version": current_model().version, **verdict_cache.stats()})
+
+
+@app.route("/campaigns/stats")
+def campaigns_stats():
+    """Index counters plus the largest live campaigns (?top=N, default 10)."""
+    if campaigns is None:
+        return jsonify({"enabled": False})
+    campaigns.expire()
+    top = max(0, min(request.args.get("top", 10, type=int), 100))
+    return jsonify({"enabled": True, **campaigns.stats(), "top": campaigns.top(top)})
+
+
+def has_admin_token() -> bool:
+    return ADMIN_TOKEN is not None and request.headers.get("X-Admin-Token") == ADMIN_TOKEN
+
+
+@app.route("/admin/model")
+def admin_model():
+    if not has_admin_token():
+        return jsonify({"error": "forbidden"}), 403
+    return jsonify({"path": MODEL_PATH, "watching": WATCH_MODEL, **reloader.status,
+                    "version": current_model().version})
+
+
+@app.route("/admin/reload", methods=["POST"])
+def admin_reload():
+    """
+    Load + validate + swap in the model file, then have every other worker
+    process reload it too. ?wait=1 blocks until this process is done.
+    """
+    if not has_admin_token():
+        return jsonify({"error": "forbidden"}), 403
+    if request.args.get("wait") == "1":
+        status = reloader.reload(broadcast=True)
+        return jsonify(status), (200 if status["state"] != "failed" else 422)
+    if not reloader.reload_in_background(broadcast=True):
+        return jsonify({"error": "a reload is already running", **reloader.status}), 409
+    return jsonify({"state": "started", "version": current_model().version}), 202
+
+
+@app.route("/batching/stats")
+def batching_stats():
+    pool = None if scoring_pool is None else scoring_pool.stats()
+    if batcher is None:
+        return jsonify({"enabled": False, "scoring_pool": pool})
+    return jsonify({"enabled": True, **batcher.stats(), "scoring_pool": pool})
+
+
 @app.route("/predict", methods=["POST"])
 def predict_api():
     data = request.get_json(silent=True) or {}
     text = (data.get("text") or "").strip()
     if not text:
         return jsonify({"error": "Missing 'text'"}), 400
-    pred, prob, reason, spam_words = predict_message(text, threshold=0.50)
-    return jsonify({
-        "label":            "SPAM" if pred == 1 else "NOT_SPAM",
-        "spam_probability": prob,
-        "confidence":       get_confidence_label(prob, pred),
-        "spam_words":       spam_words,
-        "reason":           reason,
-    })
+    p = current_model()
+    if batcher is None:
+        result = predict_message(text, threshold=0.50, p=p)
+    else:
+        try:
+            result = predict_message_batched(text, threshold=0.50, p=p)
+        except (QueueFull, TimeoutError) as e:
+            return jsonify({"error": str(e)}), 503
+    return jsonify({**prediction_json(*result), "model_version": p.version})
+
+
+@app.route("/predict/batch", methods=["POST"])
+def predict_batch_api():
+    """{"texts": [...]} -> {"results": [...]} — one /predict-shaped result per text, same order."""
+    data  = request.get_json(silent=True) or {}
+    texts = data.get("texts")
+    if not isinstance(texts, list) or not texts:
+        return jsonify({"error": "Missing 'texts' (non-empty list of strings)"}), 400
+    if len(texts) > MAX_BATCH:
+        return jsonify({"error": f"Too many texts (max {MAX_BATCH})"}), 413
+
+    BATCH_MESSAGES.inc(len(texts))
+    cleaned = [t.strip() if isinstance(t, str) else "" for t in texts]
+    valid   = [i for i, t in enumerate(cleaned) if t]
+    p       = current_model()
+    scored  = predict_messages([cleaned[i] for i in valid], threshold=0.50, p=p)
+
+    results = [{"error": "Missing 'text'"}] * len(cleaned)
+    for i, r in zip(valid, scored):
+        results[i] = {**prediction_json(*r), "model_version": p.version}
+    return jsonify({"results": results, "model_version": p.version})
+
+
+@app.route("/metrics")
+def metrics_page():
+    """Prometheus text format; ?format=json gives p50/p95/p99 per stage instead."""
+    if request.args.get("format") == "json":
+        return jsonify(metrics.REGISTRY.summary())
+    return Response(metrics.REGISTRY.prometheus(), mimetype="text/plain; version=0.0.4")
+
+
+# request latency / error counts / Server-Timing, around every route registered above
+if metrics.REGISTRY.enabled:
+    app.wsgi_app = metrics.RequestTimer(
+        app.wsgi_app, metrics.REGISTRY,
+        {rule.rule: rule.endpoint for rule in app.url_map.iter_rules() if not rule.arguments},
+        server_timing=SERVER_TIMING,
+    )
 
 
-if __name__ == "__main__":
+# ════════════════════════════════════════════════════════════════
+#  STARTUP
+# ════════════════════════════════════════════════════════════════
+
+IMPORT_SECONDS = perf_counter() - BOOT_STARTED
+
+
+def warmup() -> dict:
+    """
+    Runs every request path once so the first real request finds nothing
+    cold: single + batch scoring, both chart backgrounds (the matplotlib
+    import), the page template and a full POST /predict through the WSGI
+    stack. The probe verdicts are dropped afterwards. Prints and returns
+    the boot timings. In the gunicorn master this runs before any worker
+    is forked, so workers inherit all of it copy-on-write.
+    """
+    t0 = perf_counter()
+    before_fork()
+    t1 = perf_counter()
+    p  = current_model()
+    for text in PROBE_TEXTS:
+        predict_message(text, p=p)
+    predict_messages(PROBE_TEXTS, p=p)
+    t2 = perf_counter()
+    for inline in (True, False):
+        generate_sigmoid_chart(0.5, inline=inline)
+    t3 = perf_counter()
+    with app.test_client() as client:
+        client.get("/")
+        t4 = perf_counter()
+        response = client.post("/predict", json={"text": PROBE_TEXTS[0]})
+        t5 = perf_counter()
+    verdict_cache.clear()
+    if campaigns is not None:
+        campaigns.clear(source="verdict")
+
+    timings = {
+        "import_s":         round(IMPORT_SECONDS, 4),
+        "model_load_s":     round(MODEL_LOAD_SECONDS, 4),
+        "campaign_seed_s":  round(t1 - t0, 4),
+        "warm_scoring_s":   round(t2 - t1, 4),
+        "warm_charts_s":    round(t3 - t2, 4),
+        "warm_page_s":      round(t4 - t3, 4),
+        "first_response_s": round(t5 - t4, 4),
+        "ready_s":          round(perf_counter() - BOOT_STARTED, 4),
+        "status":           response.status_code,
+    }
+    print(f"Boot: app import {IMPORT_SECONDS * 1e3:.0f} ms (model load {MODEL_LOAD_SECONDS * 1e3:.0f} ms), "
+          f"warmup {(t5 - t0) * 1e3:.0f} ms (charts {(t3 - t2) * 1e3:.0f} ms), "
+          f"first /predict {(t5 - t4) * 1e3:.1f} ms, ready {timings['ready_s']:.2f} s after import started "
+          f"[{current_model().version}, pid {os.getpid()}]")
+    return timings
+
+
+def before_fork():
+    """
+    Wait for the start-up threads (gunicorn.conf.py when_ready, whether or
+    not LOGIFY_WARMUP is on): never fork while the seeder holds the index lock.
+    """
+    if campaign_seeder is not None:
+        campaign_seeder.join()
 
+
+def after_fork():
+    """
+    Per-process state fork() does not carry over (gunicorn.conf.py post_fork).
+    The master keeps threads of its own (the model watcher), and any lock one
+    of them held at fork() would stay locked in the worker, so the shared
+    objects get fresh locks before the worker serves anything.
+    """
+    for shared in (verdict_cache, campaigns, reloader, metrics.REGISTRY):
+        if shared is not None:
+            shared.after_fork()
+    # every worker polls the reload trigger, so /admin/reload reaches all of them
+    reloader.start_watching(model=WATCH_MODEL)
+
+
+if __name__ == "__main__":
+    if WARMUP:
+        warmup()
     app.run(debug=True)
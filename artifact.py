@@ -0,0 +1,337 @@
+"""
+artifact.py
+- Compact, memory-mappable export of the tfidf + clf model for serving
+- Layout (one directory):
+    header.json   format version, vectorizer kind, analyzer config, norm/tf
+                  options, intercept, model version and a sha256 per array file
+    terms.npy     sorted term table (fixed-width UTF-8 bytes)
+    idf.npy       idf per term, same order as terms.npy
+    coef.npy      coefficient per term, same order as terms.npy
+    index.npy     open-addressing hash table over terms.npy (v3+): slot
+                  crc32(term) & (size - 1), linear probing, -1 = empty
+- Hashing models (the incremental model, see online.py) store only
+  coef.npy: one coefficient per hashed column; the streamed model
+  (streaming.py, kind "hashing_idf") adds idf.npy, one weight per column
+- Arrays are opened with mmap_mode="r": loading touches only the header, and
+  every worker process on a host shares the same pages via the OS page cache.
+  Terms are looked up in index.npy in place (TermIndex), so no process
+  builds a per-vocabulary dict; v1/v2 artifacts, written without an index,
+  fall back to a binary search over terms.npy
+- Loading needs NumPy only — no sklearn import, no unpickling
+"""
+
+import os
+import json
+import zlib
+import shutil
+import hashlib
+from collections import Counter
+
+import numpy as np
+
+from scorer import (CompiledScorer, HashedScorer, build_word_analyzer, word_analyzer_config,
+                    hashed_classifier_check, hashed_idf)
+
+FORMAT_NAME     = "logifyneural-linear"
+FORMAT_VERSION  = 3
+READ_VERSIONS   = (1, 2, 3)   # v1 = tfidf only, no "vectorizer" key; v1/v2 = no index.npy
+ARRAY_FILES     = {
+    "tfidf":       ("terms.npy", "idf.npy", "coef.npy", "index.npy"),
+    "hashing":     ("coef.npy",),
+    "hashing_idf": ("idf.npy", "coef.npy"),
+}
+
+
+class ArtifactError(Exception):
+    """Missing, corrupt or incompatible model artifact."""
+
+
+def _sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class TermIndex:
+    """
+    Read-only term -> (column, idf, idf * coef) lookup over an artifact's
+    mapped arrays: the .get() of CompiledScorer's weights dict, without
+    building the dict. Probes index.npy (see save_artifact) and compares the
+    UTF-8 bytes against terms.npy in place; index=None (v1/v2 artifacts)
+    binary-searches terms.npy instead.
+    """
+
+    def __init__(self, terms, idf, coef, index=None):
+        self.sorted_terms = terms
+        self.index        = index
+        self.width        = terms.dtype.itemsize
+        self.mask         = len(index) - 1 if index is not None else None
+        # memoryviews: indexing one returns a plain int / float, ~10x cheaper than a NumPy scalar
+        self._bytes = memoryview(terms.view(np.uint8)) if len(terms) else memoryview(b"")
+        self._slots = memoryview(index) if index is not None else None
+        self._idf   = memoryview(idf)
+        self._coef  = memoryview(coef)
+
+    def __len__(self) -> int:
+        return len(self.sorted_terms)
+
+    def get(self, term: str, default=None):
+        key   = term.encode("utf-8")
+        n     = len(key)
+        width = self.width
+        if n > width:   # longer keys cannot be in the table
+            return default
+        if self._slots is None:
+            i = self._search(key)
+        else:
+            slots, data, mask = self._slots, self._bytes, self.mask
+            slot = zlib.crc32(key) & mask
+            while True:
+                i = slots[slot]
+                if i < 0:
+                    break
+                start = i * width   # terms.npy pads with NUL bytes, which a token never contains
+                if data[start:start + n] == key and (n == width or data[start + n] == 0):
+                    break
+                slot = (slot + 1) & mask
+        if i < 0:
+            return default
+        idf = self._idf[i]
+        return i, idf, idf * self._coef[i]
+
+    def _search(self, key: bytes) -> int:
+        i = int(np.searchsorted(self.sorted_terms, key))
+        return i if i < len(self.sorted_terms) and self.sorted_terms[i] == key else -1
+
+
+class MappedScorer(CompiledScorer):
+    """
+    CompiledScorer over memory-mapped arrays.
+    Its weights are a TermIndex over the arrays instead of a dict, so
+    creating one is O(1) however large the vocabulary; terms.npy doubles as
+    the table for explanations. search_analyze() scores a message with one
+    vectorized binary search over terms.npy instead, for bench.py's comparison.
+    """
+
+    def __init__(self, analyzer, terms, idf, coef, intercept: float,
+                 norm="l2", sublinear_tf=False, binary=False, index=None):
+        super().__init__(analyzer, weights=TermIndex(terms, idf, coef, index), terms=terms,
+                         intercept=intercept, norm=norm, sublinear_tf=sublinear_tf, binary=binary)
+        self.idf       = idf
+        self.coef      = coef
+        self.max_bytes = terms.dtype.itemsize
+
+    def search_analyze(self, text: str):
+        counts = Counter(self.analyzer(text))
+        keys, tfs = [], []
+        for term, count in counts.items():
+            key = term.encode("utf-8")
+            if len(key) <= self.max_bytes:   # longer keys cannot be in the table
+                keys.append(key)
+                tfs.append(count)
+        if not keys:
+            return self.intercept, [], []
+
+        keys = np.array(keys, dtype=self.terms.dtype)
+        pos  = np.searchsorted(self.terms, keys)
+        pos[pos >= len(self.terms)] = 0
+        hit  = self.terms[pos] == keys
+        if not hit.any():
+            return self.intercept, [], []
+
+        cols = pos[hit]
+        tf   = np.asarray(tfs, dtype=np.float64)[hit]
+        if self.binary:
+            tf[:] = 1.0
+        elif self.sublinear_tf:
+            tf = 1.0 + np.log(tf)
+        x        = tf * self.idf[cols]
+        contribs = x * self.coef[cols]
+        dot      = float(contribs.sum())
+        if self.norm == "l2":
+            dot /= float(np.sqrt(np.dot(x, x)))
+        elif self.norm == "l1":
+            dot /= float(np.abs(x).sum())
+        return dot + self.intercept, cols.tolist(), contribs.tolist()
+
+    def term(self, col: int) -> str:
+        return self.terms[col].decode("utf-8")
+
+
+def term_index(keys) -> np.ndarray:
+    """
+    index.npy for a term table: a power-of-two table at most half full;
+    keys[i] goes in the first free slot from crc32(keys[i]) & (size - 1).
+    """
+    size  = 1 << max(1, (2 * len(keys) - 1).bit_length())
+    mask  = size - 1
+    slots = [-1] * size
+    for i, key in enumerate(keys):
+        slot = zlib.crc32(key) & mask
+        while slots[slot] >= 0:
+            slot = (slot + 1) & mask
+        slots[slot] = i
+    return np.array(slots, dtype=np.int32 if len(keys) < 2 ** 31 else np.int64)
+
+
+def save_artifact(model, path: str, model_version: str = None) -> dict:
+    """
+    Export the tfidf + clf steps of a fitted Pipeline to an artifact directory.
+    Written to a temp directory first and swapped in, so readers never see a
+    half-written artifact. Raises ValueError if the model cannot be exported.
+    """
+    steps = getattr(model, "named_steps", {})
+    if "hash" in steps:
+        kind = "hashing_idf" if "idf" in steps else "hashing"
+        arrays, fields = _hashing_arrays(steps["hash"], steps.get("idf"), steps["clf"])
+    elif "tfidf" in steps:
+        kind, (arrays, fields) = "tfidf", _tfidf_arrays(steps["tfidf"], steps["clf"])
+    else:
+        raise ValueError("expected a Pipeline with 'tfidf' or 'hash' and 'clf' steps")
+
+    tmp = f"{path}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    for name, array in arrays.items():
+        np.save(os.path.join(tmp, name), array)
+
+    names     = ARRAY_FILES[kind]
+    checksums = {name: _sha256(os.path.join(tmp, name)) for name in names}
+    header = {
+        "format":         FORMAT_NAME,
+        "format_version": FORMAT_VERSION,
+        "vectorizer":     kind,
+        "model_version":  model_version or hashlib.sha256(
+                              "".join(checksums[n] for n in names).encode()).hexdigest()[:12],
+        **fields,
+        "intercept":      float(steps["clf"].intercept_[0]),
+        "sha256":         checksums,
+    }
+    with open(os.path.join(tmp, "header.json"), "w", encoding="utf-8") as f:
+        json.dump(header, f, indent=2)
+
+    old = f"{path}.old-{os.getpid()}"
+    if os.path.exists(path):
+        os.rename(path, old)
+    os.rename(tmp, path)
+    shutil.rmtree(old, ignore_errors=True)
+    return header
+
+
+def _tfidf_arrays(vectorizer, classifier):
+    analyzer = word_analyzer_config(vectorizer)
+    if classifier.coef_.shape[0] != 1:
+        raise ValueError("expected a binary classifier")
+
+    vocab = vectorizer.vocabulary_
+    terms = sorted(vocab, key=lambda t: t.encode("utf-8"))
+    keys  = [t.encode("utf-8") for t in terms]
+    cols  = np.fromiter((vocab[t] for t in terms), dtype=np.int64, count=len(terms))
+    idf   = vectorizer.idf_[cols] if vectorizer.use_idf else np.ones(len(terms))
+    coef  = classifier.coef_[0][cols]
+    arrays = {
+        "terms.npy": np.array(keys),
+        "idf.npy":   np.ascontiguousarray(idf),
+        "coef.npy":  np.ascontiguousarray(coef),
+        "index.npy": term_index(keys),
+    }
+    fields = {
+        "n_terms":      len(terms),
+        "analyzer":     analyzer,
+        "norm":         vectorizer.norm,
+        "sublinear_tf": bool(vectorizer.sublinear_tf),
+        "binary":       bool(vectorizer.binary),
+    }
+    return arrays, fields
+
+
+def _hashing_arrays(vectorizer, transformer, classifier):
+    analyzer = word_analyzer_config(vectorizer)
+    hashed_classifier_check(classifier)
+    idf, norm = hashed_idf(vectorizer, transformer)
+    arrays = {"coef.npy": np.ascontiguousarray(classifier.coef_[0])}   # float32 stays float32
+    if idf is not None:
+        arrays["idf.npy"] = np.ascontiguousarray(idf)
+    fields = {
+        "n_features":     int(vectorizer.n_features),
+        "alternate_sign": bool(vectorizer.alternate_sign),
+        "analyzer":       analyzer,
+        "norm":           norm,
+        "binary":         bool(vectorizer.binary),
+    }
+    return arrays, fields
+
+
+def read_header(path: str) -> dict:
+    try:
+        with open(os.path.join(path, "header.json"), "r", encoding="utf-8") as f:
+            header = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError) as e:
+        raise ArtifactError(f"cannot read {path}/header.json: {e}")
+    if header.get("format") != FORMAT_NAME or header.get("format_version") not in READ_VERSIONS:
+        raise ArtifactError(f"unsupported artifact format in {path}: "
+                            f"{header.get('format')} v{header.get('format_version')}")
+    header.setdefault("vectorizer", "tfidf")
+    if header["vectorizer"] not in ARRAY_FILES:
+        raise ArtifactError(f"unsupported vectorizer in {path}: {header['vectorizer']!r}")
+    return header
+
+
+def load_artifact(path: str, verify: bool = False):
+    """
+    Returns (MappedScorer, header). verify=True checks every array's sha256,
+    which reads the whole artifact — use it when installing a new model,
+    not on every worker start.
+    """
+    header = read_header(path)
+    if verify:
+        for name, digest in header["sha256"].items():
+            if _sha256(os.path.join(path, name)) != digest:
+                raise ArtifactError(f"checksum mismatch for {path}/{name}")
+
+    names = ARRAY_FILES[header["vectorizer"]]
+    if header["format_version"] < 3:
+        names = tuple(n for n in names if n != "index.npy")
+    arrays = {}
+    for name in names:
+        try:
+            arrays[name] = np.load(os.path.join(path, name), mmap_mode="r")
+        except (OSError, ValueError) as e:
+            raise ArtifactError(f"cannot map {path}/{name}: {e}")
+
+    if header["vectorizer"] in ("hashing", "hashing_idf"):
+        if any(len(a) != header["n_features"] for a in arrays.values()):
+            raise ArtifactError(f"arrays in {path} do not match n_features in its header")
+        scorer = HashedScorer(
+            analyzer       = build_word_analyzer(header["analyzer"]),
+            coef           = arrays["coef.npy"],
+            n_features     = header["n_features"],
+            intercept      = header["intercept"],
+            norm           = header["norm"],
+            alternate_sign = header["alternate_sign"],
+            binary         = header["binary"],
+            idf            = arrays.get("idf.npy"),
+        )
+        return scorer, header
+
+    if not (len(arrays["terms.npy"]) == len(arrays["idf.npy"]) == len(arrays["coef.npy"])
+            == header["n_terms"]):
+        raise ArtifactError(f"array lengths in {path} do not match its header")
+    index = arrays.get("index.npy")
+    if index is not None and (len(index) < 2 * header["n_terms"] or len(index) & (len(index) - 1)):
+        raise ArtifactError(f"index.npy in {path} is not a hash table over its terms")
+
+    scorer = MappedScorer(
+        analyzer     = build_word_analyzer(header["analyzer"]),
+        terms        = arrays["terms.npy"],
+        idf          = arrays["idf.npy"],
+        coef         = arrays["coef.npy"],
+        intercept    = header["intercept"],
+        norm         = header["norm"],
+        sublinear_tf = header["sublinear_tf"],
+        binary       = header["binary"],
+        index        = index,
+    )
+    return scorer, header
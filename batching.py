@@ -0,0 +1,136 @@
+"""
+batching.py
+- Micro-batching scheduler for the /predict API
+- Request threads put (text, opts) on a bounded queue and wait
+- One scheduler thread drains the queue into batches, bounded by a max batch
+  size and a max wait window, scores each batch with one vectorized call and
+  completes every waiting request with its own result
+- Trades a little latency (at most the wait window) for batch throughput
+"""
+
+import os
+import time
+import queue
+import threading
+
+
+class QueueFull(Exception):
+    """Raised by submit() when the request queue is at max depth."""
+
+
+class _Pending:
+    __slots__ = ("text", "opts", "done", "result", "error")
+
+    def __init__(self, text: str, opts):
+        self.text      = text
+        self.opts      = opts
+        self.done      = threading.Event()
+        self.result    = None
+        self.error     = None
+
+
+class MicroBatcher:
+
+    def __init__(self, score_batch, max_batch_size: int = 64, max_wait_us: int = 2000,
+                 max_queue: int = 10_000, timeout: float = 30.0):
+        """
+        score_batch(texts, opts) -> list of results, same order as texts.
+        opts is whatever the caller passed to submit() (e.g. threshold + model);
+        requests with equal opts are scored together.
+        """
+        self.score_batch    = score_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait       = max_wait_us / 1e6
+        self.max_queue      = max_queue
+        self.timeout        = timeout
+
+        self._queue  = queue.Queue(maxsize=max_queue)
+        self._lock   = threading.Lock()
+        self._thread = None
+        self._pid    = None
+
+        self.requests       = 0
+        self.batches        = 0
+        self.rejected       = 0
+        self.max_batch_seen = 0
+        self.size_counts    = {}   # batch size bucket (power of two) -> count
+
+    def _ensure_started(self):
+        # threads do not survive fork(), so (re)start per process
+        if self._pid == os.getpid() and self._thread is not None:
+            return
+        with self._lock:
+            if self._pid != os.getpid() or self._thread is None:
+                self._queue  = queue.Queue(maxsize=self.max_queue)
+                self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+                self._pid    = os.getpid()
+                self._thread.start()
+
+    def submit(self, text: str, opts):
+        """Blocks until the request's batch has been scored; returns its result."""
+        self._ensure_started()
+        item = _Pending(text, opts)
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.rejected += 1
+            raise QueueFull(f"prediction queue is full ({self.max_queue} requests)")
+        if not item.done.wait(self.timeout):
+            raise TimeoutError("prediction timed out in the batch queue")
+        if item.error is not None:
+            raise item.error
+        return item.result
+
+    def _collect(self):
+        batch    = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            self._record(len(batch))
+
+            # one vectorized call per distinct opts (normally there is just one)
+            groups = {}
+            for item in batch:
+                groups.setdefault(item.opts, []).append(item)
+            for opts, items in groups.items():
+                try:
+                    results = self.score_batch([it.text for it in items], opts)
+                    for it, r in zip(items, results):
+                        it.result = r
+                except Exception as e:
+                    for it in items:
+                        it.error = e
+                for it in items:
+                    it.done.set()
+
+    def _record(self, size: int):
+        self.requests += size
+        self.batches  += 1
+        self.max_batch_seen = max(self.max_batch_seen, size)
+        bucket = 1 << (size - 1).bit_length()
+        self.size_counts[bucket] = self.size_counts.get(bucket, 0) + 1
+
+    def stats(self) -> dict:
+        return {
+            "max_batch_size":  self.max_batch_size,
+            "max_wait_us":     int(self.max_wait * 1e6),
+            "max_queue":       self.max_queue,
+            "queue_depth":     self._queue.qsize(),
+            "requests":        self.requests,
+            "batches":         self.batches,
+            "rejected":        self.rejected,
+            "avg_batch_size":  round(self.requests / self.batches, 2) if self.batches else 0.0,
+            "max_batch_seen":  self.max_batch_seen,
+            "batch_size_hist": {f"<={k}": v for k, v in sorted(self.size_counts.items())},
+        }
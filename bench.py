@@ -0,0 +1,656 @@
+"""
+bench.py
+- Reproducible, offline benchmark suite for the scoring / web paths
+- Corpus: a local copy of the training TSV (--data sms.tsv) or a deterministic
+  synthetic SMS corpus (same --seed -> same messages -> same model)
+- Trains a small model from it into a temp directory (same Pipeline as
+  train.py), then imports app.py against that model — never touches your
+  model.pkl or user_data.jsonl
+- Micro: predict_message (cold + cached), get_top_spam_words,
+  looks_like_gibberish, generate_sigmoid_chart, save_feedback,
+  and the model exported as an artifact: load_artifact, then scoring with
+  its hash-table term index (what the app serves) vs a binary search over
+  terms.npy
+- Load: cold start in a fresh interpreter (import + Predictor.load) of
+  model.pkl vs the artifact, for the benchmark model and for one with a
+  --load-terms vocabulary
+- Macro: POST /predict, POST /, GET /sigmoid through the Flask test client
+  at several concurrency levels
+- Batch: /predict/batch's predict_messages() against a predict_message()
+  loop over the same messages, per message, at batch sizes from 1 up; and
+  the compiled scorer's batch pass against its per-message loop, which gives
+  the measured crossover to compare with predictor.VECTORIZE_MIN
+- Overhead: POST /predict (uncached and cached) in one interpreter each with
+  LOGIFY_METRICS=0, =1, and =1 plus LOGIFY_SERVER_TIMING=1, taking turns
+  pass by pass; reports each one's cost over metrics off, next to a repeat
+  of metrics off that shows the run's noise floor
+- Scaling: Predictor.score_messages on one large batch with a
+  parallel.ScoringPool of 1..N threads (messages/s and speedup over 1 thread)
+- Writes JSON; with --baseline, flags results slower than the baseline by more
+  than --tolerance and exits 1
+
+Usage:
+    python bench.py -o bench.json
+    python bench.py --save-baseline bench_baseline.json
+    python bench.py --baseline bench_baseline.json --tolerance 0.15
+    python bench.py --data sms.tsv --only micro
+    python bench.py --only batch --batch-sizes 1,2,8,64,128,512
+    python bench.py --only scaling --threads 1,2,4,8,16,32 --scaling-batch 50000
+    python bench.py --only load --load-terms 1000000
+    python bench.py --only overhead --overhead-rounds 300
+"""
+
+import gc
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+import threading
+
+import numpy as np
+import pandas as pd
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+CONCURRENCY      = (1, 4, 16)
+BATCH_SIZES      = (1, 2, 4, 8, 16, 32, 64, 128, 256, 1024)
+SCALING_BATCH    = 20_000
+SCALING_CHUNK    = 1000
+LOAD_TERMS       = 200_000
+LOAD_RUNS        = 5
+OVERHEAD_ROUNDS  = 40    # passes of every interpreter in the overhead benchmark
+OVERHEAD_LAYOUTS = 4     # interpreters per instrumentation setting
+
+# (name, environment) of each instrumentation setting the overhead run compares; the
+# control repeats the baseline, so its "overhead" is the noise floor of the run
+OVERHEAD_SETTINGS = (
+    ("metrics=0",               {"LOGIFY_METRICS": "0", "LOGIFY_SERVER_TIMING": "0"}),
+    ("metrics=0 control",       {"LOGIFY_METRICS": "0", "LOGIFY_SERVER_TIMING": "0"}),
+    ("metrics=1",               {"LOGIFY_METRICS": "1", "LOGIFY_SERVER_TIMING": "0"}),
+    ("metrics=1 server-timing", {"LOGIFY_METRICS": "1", "LOGIFY_SERVER_TIMING": "1"}),
+)
+
+
+def default_thread_levels():
+    """1, 2, 4, ... up to the core count, and the core count itself."""
+    cores  = os.cpu_count() or 1
+    levels = [1]
+    while levels[-1] * 2 < cores:
+        levels.append(levels[-1] * 2)
+    return levels + ([cores] if cores > 1 else [])
+
+
+# ════════════════════════════════════════════════════════════════
+#  CORPUS
+# ════════════════════════════════════════════════════════════════
+
+SPAM_WORDS = ("free win winner won prize claim urgent cash txt call now mobile offer reply stop "
+              "award guaranteed click link text ringtone bonus voucher entry draw tone rate "
+              "customer service landline week apply valid").split()
+HAM_WORDS  = ("hey lunch see you later home tonight ok love going dinner tomorrow work sorry "
+              "meeting thanks good morning call when where sure gonna wat got da lor come "
+              "back need think time").split()
+COMMON     = "the a to and you your is for on at i me my it this that be have u ur 2 4".split()
+GIBBERISH  = ("qwrtp zxcvbnm", "asdfghjkl qwrtypsdf", "rfvwgsedfsw efwdwqefd", "hjkl bnmv cxzq")
+
+
+def synthetic_corpus(n: int = 5000, seed: int = 0, spam_rate: float = 0.15):
+    """Deterministic SMS-like (label, text) pairs: same n and seed, same corpus."""
+    r    = random.Random(seed)
+    rows = []
+    for _ in range(n):
+        spam  = r.random() < spam_rate
+        own   = SPAM_WORDS if spam else HAM_WORDS
+        other = HAM_WORDS if spam else SPAM_WORDS
+        words = []
+        for _ in range(r.randint(3, 24)):
+            roll = r.random()
+            words.append(r.choice(own if roll < 0.55 else COMMON if roll < 0.9 else other))
+        if spam and r.random() < 0.35:
+            words.append(str(r.randint(10000, 99999)))
+        if spam and r.random() < 0.25:
+            words = [w.upper() for w in words]
+        text = " ".join(words).capitalize() + r.choice(("", "", ".", "!", "?", "!!"))
+        rows.append((1 if spam else 0, text))
+    return rows
+
+
+def load_tsv(path: str):
+    # same layout train.py downloads: label \t text
+    df = pd.read_csv(path, sep="\t", names=["label", "text"], dtype=str, keep_default_na=False)
+    df["label"] = df["label"].map({"ham": 0, "spam": 1})
+    df = df.dropna(subset=["label"])
+    return list(zip(df["label"].astype(int), df["text"].astype(str)))
+
+
+def train_model(rows, workdir: str) -> str:
+    """Same Pipeline as train.py, saved to workdir/model.pkl. Returns the path."""
+    import joblib
+    from sklearn.pipeline import Pipeline
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+
+    model = Pipeline([
+        ("tfidf", TfidfVectorizer(lowercase=True, stop_words="english")),
+        ("clf", LogisticRegression(max_iter=2000)),
+    ])
+    model.fit([t for _, t in rows], [y for y, _ in rows])
+    path = os.path.join(workdir, "model.pkl")
+    joblib.dump(model, path)
+    return path
+
+
+def vocabulary_rows(rows, n_terms: int, seed: int = 0):
+    """rows plus extra messages that add about n_terms distinct made-up words to the vocabulary."""
+    r     = random.Random(seed)
+    extra = []
+    for start in range(0, n_terms, 100):
+        words = [f"w{i:x}q" for i in range(start, min(start + 100, n_terms))]
+        extra.append((r.randint(0, 1), " ".join(words + r.sample(SPAM_WORDS + HAM_WORDS, 5))))
+    return rows + extra
+
+
+# ════════════════════════════════════════════════════════════════
+#  TIMING
+# ════════════════════════════════════════════════════════════════
+
+def summarize(samples, calls_per_sample: int = 1) -> dict:
+    """samples: seconds per sample -> microseconds per call."""
+    per_call = sorted(s / calls_per_sample * 1e6 for s in samples)
+    return {
+        "median_us": round(statistics.median(per_call), 3),
+        "p95_us":    round(per_call[min(len(per_call) - 1, int(0.95 * len(per_call)))], 3),
+        "min_us":    round(per_call[0], 3),
+        "ops_per_s": round(1e6 / statistics.median(per_call), 1),
+        "samples":   len(per_call),
+    }
+
+
+def time_calls(fn, inputs, repeat: int, setup=None) -> dict:
+    """Runs fn over all inputs `repeat` times; one sample per pass."""
+    for x in inputs[:50]:   # warm up
+        fn(x)
+    samples = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            if setup is not None:
+                setup()
+            started = time.perf_counter()
+            for x in inputs:
+                fn(x)
+            samples.append(time.perf_counter() - started)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return summarize(samples, len(inputs))
+
+
+def run_concurrent(app, make_request, requests_total: int, concurrency: int) -> dict:
+    """requests_total requests split over `concurrency` threads, one test client each."""
+    latencies = [[] for _ in range(concurrency)]
+    errors    = [0] * concurrency
+    barrier   = threading.Barrier(concurrency + 1)
+
+    def worker(k):
+        client = app.test_client()
+        make_request(client, k)   # warm up this client
+        barrier.wait()
+        for i in range(k, requests_total, concurrency):
+            started = time.perf_counter()
+            resp    = make_request(client, i)
+            latencies[k].append(time.perf_counter() - started)
+            if resp.status_code >= 400:
+                errors[k] += 1
+
+    threads = [threading.Thread(target=worker, args=(k,)) for k in range(concurrency)]
+    for t in threads:
+        t.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    lat = sorted(x * 1e6 for chunk in latencies for x in chunk)
+    pct = lambda q: round(lat[min(len(lat) - 1, int(q * len(lat)))], 1)
+    return {
+        "concurrency": concurrency,
+        "requests":    len(lat),
+        "errors":      sum(errors),
+        "req_per_s":   round(len(lat) / elapsed, 1),
+        "median_us":   pct(0.50),
+        "p95_us":      pct(0.95),
+        "p99_us":      pct(0.99),
+    }
+
+
+# ════════════════════════════════════════════════════════════════
+#  BENCHMARKS
+# ════════════════════════════════════════════════════════════════
+
+def import_app(model_path: str, workdir: str):
+    """Import app.py against the benchmark model; feedback/stats files land in workdir."""
+    os.environ["LOGIFY_MODEL"] = model_path
+    for var in ("LOGIFY_STATS_DB", "LOGIFY_WATCH_MODEL", "LOGIFY_MICROBATCH", "LOGIFY_SERVER_TIMING"):
+        os.environ.pop(var, None)
+    sys.path.insert(0, HERE)
+    os.chdir(workdir)
+    import app
+    return app
+
+
+def micro_benchmarks(app, texts, repeat: int) -> dict:
+    p       = app.current_model()
+    spam    = [t for t in texts if p.score_message(t)[0] == 1] or texts
+    results = {}
+
+    results["predict_message.cold"] = time_calls(
+        lambda t: app.predict_message(t), texts, repeat, setup=app.verdict_cache.clear)
+    results["predict_message.cached"] = time_calls(lambda t: app.predict_message(t), texts, repeat)
+    results["get_top_spam_words"] = time_calls(app.get_top_spam_words, spam, repeat)
+    results["looks_like_gibberish"] = time_calls(
+        app.looks_like_gibberish, texts + list(GIBBERISH) * 10, repeat)
+
+    probs = [p.score_message(t)[1] for t in texts[:200]]
+    results["generate_sigmoid_chart"] = time_calls(
+        lambda x: app.generate_sigmoid_chart(x, inline=True), probs, repeat)
+
+    labels = [(t, i % 2) for i, t in enumerate(texts[:500])]
+    results["save_feedback"] = time_calls(lambda tl: app.save_feedback(*tl), labels, repeat)
+
+    from artifact import save_artifact, load_artifact
+    save_artifact(p.pipeline, "bench_artifact")   # cwd is the benchmark's workdir
+    results["load_artifact"] = time_calls(load_artifact, ["bench_artifact"], repeat)
+    mapped, _ = load_artifact("bench_artifact")
+    results["compiled.analyze"]        = time_calls(p.scorer.analyze, texts, repeat)   # model.pkl's dict
+    results["artifact.analyze.index"]  = time_calls(mapped.analyze, texts, repeat)
+    results["artifact.analyze.search"] = time_calls(mapped.search_analyze, texts, repeat)
+    return results
+
+
+COLD_LOAD = """
+import sys, time
+started = time.perf_counter()
+sys.path.insert(0, sys.argv[1])
+from predictor import Predictor
+imported = time.perf_counter()
+Predictor.load(sys.argv[2], verify=sys.argv[3] == "1").score_message("free prize, call now")
+print(imported - started, time.perf_counter() - imported)
+"""
+
+
+def cold_load(path: str, runs: int, verify: bool = False) -> dict:
+    """
+    Predictor.load + one score in a fresh interpreter, as a worker starting
+    without preload does. The import of predictor.py is timed separately.
+    """
+    imports, samples = [], []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", COLD_LOAD, HERE, path, "1" if verify else "0"],
+                             capture_output=True, text=True, check=True).stdout
+        imported, loaded = map(float, out.split()[-2:])
+        imports.append(imported)
+        samples.append(loaded)
+    r = summarize(samples)
+    r["import_us"] = round(statistics.median(imports) * 1e6, 1)
+    return r
+
+
+def load_benchmarks(model_path: str, rows, n_terms: int, runs: int, workdir: str) -> dict:
+    """Cold start of model.pkl vs the artifact, for the benchmark model and a large vocabulary."""
+    import joblib
+    from artifact import save_artifact
+
+    results = {}
+    big     = os.path.join(workdir, "big")
+    os.makedirs(big, exist_ok=True)
+    models  = [("", model_path), (" big", train_model(vocabulary_rows(rows, n_terms), big))]
+    for label, pkl in models:
+        terms    = len(joblib.load(pkl).named_steps["tfidf"].vocabulary_)
+        artifact = os.path.join(os.path.dirname(pkl), "model_artifact")
+        save_artifact(joblib.load(pkl), artifact)
+        for name, path, verify in (("model.pkl", pkl, False), ("artifact", artifact, False),
+                                   ("artifact+verify", artifact, True)):
+            r = cold_load(path, runs, verify)
+            r["terms"] = terms
+            results[f"cold load {name}{label}"] = r
+    return results
+
+
+REQUEST_LOOP = """
+import gc, os, sys, json, time
+sys.path.insert(0, sys.argv[1])
+os.chdir(sys.argv[2])
+import app
+texts  = json.load(open(sys.argv[3], encoding="utf-8"))
+client = app.app.test_client()
+gc.freeze()   # as gunicorn.conf.py does after preload: collections only see request garbage
+for command in sys.stdin:   # "uncached" or "cached": one timed pass over texts
+    if command.strip() == "uncached":
+        app.verdict_cache.clear()
+    started = time.thread_time()   # CPU time: a VM's steal and other processes do not count
+    for t in texts:
+        client.post("/predict", json={"text": t})
+    print((time.thread_time() - started) / len(texts), flush=True)
+"""
+
+
+def overhead_benchmarks(model_path: str, texts, rounds: int, layouts: int, workdir: str) -> dict:
+    """
+    POST /predict latency under each OVERHEAD_SETTINGS. Both switches are
+    read at import, so a setting needs its own interpreters. An interpreter's
+    memory layout alone moves its speed by a percent or two, more than the
+    overhead being measured, so each setting gets `layouts` of them, started
+    with environments of different sizes. They all stay up and take turns,
+    one pass each per round, so CPU drift hits every setting alike. The
+    overhead is the median over rounds of a setting's mean pass time over
+    metrics=0's.
+    """
+    sample = os.path.join(workdir, "overhead_texts.json")
+    with open(sample, "w", encoding="utf-8") as f:
+        json.dump(list(texts), f)
+    env = {k: v for k, v in os.environ.items() if k not in ("LOGIFY_STATS_DB", "LOGIFY_WATCH_MODEL",
+                                                           "LOGIFY_MICROBATCH")}
+    env.update(LOGIFY_MODEL=model_path, LOGIFY_WARMUP="0", PYTHONHASHSEED="0")
+    procs = [(name, subprocess.Popen([sys.executable, "-c", REQUEST_LOOP, HERE, workdir, sample],
+                                     stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True,
+                                     env={**env, **setting, "BENCH_LAYOUT": "x" * (layout * 1000)}))
+             for layout in range(layouts) for name, setting in OVERHEAD_SETTINGS]
+
+    def one_pass(proc, kind):
+        proc.stdin.write(kind + "\n")
+        proc.stdin.flush()
+        return float(proc.stdout.readline())
+
+    kinds   = ("uncached", "cached")
+    samples = {(name, kind): [] for name, _ in OVERHEAD_SETTINGS for kind in kinds}   # per pass
+    ratios  = {(name, kind): [] for name, _ in OVERHEAD_SETTINGS for kind in kinds}   # per round
+    try:
+        for _, proc in procs:   # warm up
+            one_pass(proc, "uncached")
+        for i in range(rounds):
+            for kind in kinds:
+                this_round = {name: [] for name, _ in OVERHEAD_SETTINGS}
+                for k in range(len(procs)):
+                    name, proc = procs[(i + k) % len(procs)]   # rotate who goes first
+                    this_round[name].append(one_pass(proc, kind))
+                base = statistics.mean(this_round[OVERHEAD_SETTINGS[0][0]])
+                for name, passes in this_round.items():
+                    samples[(name, kind)] += passes
+                    ratios[(name, kind)].append(statistics.mean(passes) / base)
+    finally:
+        for _, proc in procs:
+            proc.stdin.close()
+            proc.wait()
+
+    results = {}
+    for kind in kinds:
+        for name, _ in OVERHEAD_SETTINGS:
+            r = summarize(samples[(name, kind)])
+            r["overhead_pct"] = round((statistics.median(ratios[(name, kind)]) - 1) * 100, 2)
+            results[f"POST /predict {kind} {name}"] = r
+    return results
+
+
+def macro_benchmarks(app, texts, requests_total: int, concurrency_levels) -> dict:
+    n = len(texts)
+    endpoints = {
+        "POST /predict": lambda c, i: c.post("/predict", json={"text": texts[i % n]}),
+        "POST /":        lambda c, i: c.post("/", data={"text": texts[i % n]}),
+        "GET /sigmoid":  lambda c, i: c.get("/sigmoid"),
+    }
+    results = {}
+    for name, make_request in endpoints.items():
+        for conc in concurrency_levels:
+            app.verdict_cache.clear()
+            results[f"{name} c={conc}"] = run_concurrent(app.app, make_request, requests_total, conc)
+    return results
+
+
+def batch_benchmarks(app, texts, sizes, repeat: int) -> dict:
+    """Per-message cost of predict_messages(batch) vs a predict_message() loop, uncached."""
+    def cold():
+        app.verdict_cache.clear()
+        if app.campaigns is not None:
+            app.campaigns.clear()
+
+    results = {}
+    for n in sizes:
+        batch = (texts * (n // len(texts) + 1))[:n]
+        loop  = time_calls(lambda b: [app.predict_message(t) for t in b], [batch], repeat, setup=cold)
+        r     = time_calls(app.predict_messages, [batch], repeat, setup=cold)
+        r["median_us"]  = round(r["median_us"] / n, 3)
+        r["loop_us"]    = round(loop["median_us"] / n, 3)
+        r["speedup"]    = round(r["loop_us"] / r["median_us"], 3)
+        r["msgs_per_s"] = round(1e6 / r["median_us"], 1)
+        results[f"predict_messages x{n}"] = r
+    return results
+
+
+def crossover_benchmarks(app, texts, sizes, repeat: int):
+    """
+    Per-message cost of Predictor._score_batch (one analyze_batch pass) vs a
+    _score_compiled loop, on disjoint batches of each size. Returns (results,
+    crossover): the smallest size from which the batch pass is faster at every
+    larger size measured, or None.
+    """
+    p       = app.current_model()
+    results = {}
+    for n in sizes:
+        batches = [texts[k:k + n] for k in range(0, len(texts) - n + 1, n)][:max(1, 1024 // n)]
+        calls   = n * len(batches)
+        loop    = time_calls(lambda b: [p._score_compiled(t, 0.5) for t in b], batches, repeat)
+        r       = time_calls(lambda b: p._score_batch(b, range(len(b)), 0.5, [None] * len(b)), batches, repeat)
+        r["median_us"]  = round(r["median_us"] * len(batches) / calls, 3)
+        r["loop_us"]    = round(loop["median_us"] * len(batches) / calls, 3)
+        r["speedup"]    = round(r["loop_us"] / r["median_us"], 3)
+        r["msgs_per_s"] = round(1e6 / r["median_us"], 1)
+        results[f"analyze_batch x{n}"] = r
+    speedups  = [r["speedup"] for r in results.values()]
+    crossover = next((n for k, n in enumerate(sizes) if min(speedups[k:]) >= 1.0), None)
+    return results, crossover
+
+
+def scaling_benchmarks(app, texts, thread_levels, batch: int, chunk_size: int, repeat: int) -> dict:
+    """Throughput of one `batch`-message score_messages() call per thread count."""
+    from parallel import ScoringPool
+
+    p        = app.current_model()
+    messages = (texts * (batch // len(texts) + 1))[:batch]
+    results  = {}
+    for threads in thread_levels:
+        pool = ScoringPool(threads, chunk_size) if threads > 1 else None
+        r    = time_calls(lambda _: p.score_messages(messages, pool=pool), [None], repeat)
+        if pool is not None:
+            pool.close()
+        r["threads"]    = threads
+        r["msgs_per_s"] = round(batch / (r["median_us"] / 1e6), 1)
+        results[f"score_messages x{batch} threads={threads}"] = r
+    single = next(iter(results.values()))["msgs_per_s"]
+    for r in results.values():
+        r["speedup"] = round(r["msgs_per_s"] / single, 3)
+    return results
+
+
+# ════════════════════════════════════════════════════════════════
+#  BASELINE COMPARISON
+# ════════════════════════════════════════════════════════════════
+
+def compare(current: dict, baseline: dict, tolerance: float):
+    """Returns (rows, regressions). Compares median latency per benchmark."""
+    rows, regressions = [], []
+    for section in ("micro", "macro", "batch", "scaling", "load", "overhead"):
+        for name, cur in current.get(section, {}).items():
+            base = baseline.get(section, {}).get(name)
+            if base is None or not base.get("median_us"):
+                continue
+            ratio = cur["median_us"] / base["median_us"]
+            row   = {"section": section, "name": name, "baseline_us": base["median_us"],
+                     "current_us": cur["median_us"], "ratio": round(ratio, 3),
+                     "regression": ratio > 1.0 + tolerance}
+            rows.append(row)
+            if row["regression"]:
+                regressions.append(row)
+    return rows, regressions
+
+
+def environment(args, corpus_name: str, n_texts: int) -> dict:
+    import sklearn
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE,
+                                capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "sklearn": sklearn.__version__,
+        "corpus": corpus_name,
+        "messages": n_texts,
+        "seed": args.seed,
+        "repeat": args.repeat,
+    }
+
+
+# ════════════════════════════════════════════════════════════════
+#  MAIN
+# ════════════════════════════════════════════════════════════════
+
+def main():
+    ap = argparse.ArgumentParser(description="Offline benchmark suite for LogifyNeural.")
+    ap.add_argument("-o", "--output", default="bench.json", help="results JSON (default: bench.json)")
+    ap.add_argument("--data", help="local TSV (label<TAB>text); default: synthetic corpus")
+    ap.add_argument("--messages", type=int, default=5000, help="synthetic corpus size")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--sample", type=int, default=1000, help="messages used per micro pass")
+    ap.add_argument("--repeat", type=int, default=7, help="timed passes per micro benchmark")
+    ap.add_argument("--requests", type=int, default=2000, help="requests per macro benchmark")
+    ap.add_argument("--concurrency", default=",".join(map(str, CONCURRENCY)),
+                    help="comma-separated thread counts for macro benchmarks")
+    ap.add_argument("--only", choices=["micro", "macro", "batch", "scaling", "load", "overhead"])
+    ap.add_argument("--batch-sizes", default=",".join(map(str, BATCH_SIZES)),
+                    help="comma-separated batch sizes for the batch benchmark")
+    ap.add_argument("--threads", default=",".join(map(str, default_thread_levels())),
+                    help="comma-separated thread counts for the scaling benchmark (default: 1..cores)")
+    ap.add_argument("--scaling-batch", type=int, default=SCALING_BATCH, help="messages per scaling batch")
+    ap.add_argument("--scaling-chunk", type=int, default=SCALING_CHUNK, help="messages per thread task")
+    ap.add_argument("--load-terms", type=int, default=LOAD_TERMS,
+                    help="vocabulary size of the large model in the load benchmark")
+    ap.add_argument("--load-runs", type=int, default=LOAD_RUNS, help="fresh interpreters per load benchmark")
+    ap.add_argument("--overhead-rounds", type=int, default=OVERHEAD_ROUNDS,
+                    help="--only overhead: passes of every interpreter")
+    ap.add_argument("--overhead-layouts", type=int, default=OVERHEAD_LAYOUTS,
+                    help="--only overhead: interpreters per metrics setting")
+    ap.add_argument("--baseline", help="compare against this results JSON")
+    ap.add_argument("--tolerance", type=float, default=0.10,
+                    help="allowed slowdown vs baseline before flagging (default 0.10 = 10%%)")
+    ap.add_argument("--save-baseline", help="also write the results here")
+    args = ap.parse_args()
+
+    output   = os.path.abspath(args.output)
+    baseline = os.path.abspath(args.baseline) if args.baseline else None
+    save_to  = os.path.abspath(args.save_baseline) if args.save_baseline else None
+
+    if args.data:
+        rows, corpus_name = load_tsv(args.data), os.path.basename(args.data)
+    else:
+        rows, corpus_name = synthetic_corpus(args.messages, args.seed), f"synthetic(n={args.messages})"
+    texts = [t for _, t in rows]
+    random.Random(args.seed).shuffle(texts)
+    sample = texts[:args.sample]
+
+    workdir = tempfile.mkdtemp(prefix="logify-bench-")
+    try:
+        print(f"Training benchmark model on {len(rows)} messages ({corpus_name})...", file=sys.stderr)
+        model_path = train_model(rows, workdir)
+        app = import_app(model_path, workdir)
+
+        results = {"environment": environment(args, corpus_name, len(rows))}
+        if args.only in (None, "micro"):
+            print("Running micro benchmarks...", file=sys.stderr)
+            results["micro"] = micro_benchmarks(app, sample, args.repeat)
+        if args.only in (None, "macro"):
+            print("Running macro benchmarks...", file=sys.stderr)
+            levels = [int(c) for c in args.concurrency.split(",") if c.strip()]
+            results["macro"] = macro_benchmarks(app, sample, args.requests, levels)
+        if args.only in (None, "batch"):
+            print("Running batch benchmarks...", file=sys.stderr)
+            sizes = [int(n) for n in args.batch_sizes.split(",") if n.strip()]
+            results["batch"] = batch_benchmarks(app, texts, sizes, args.repeat)
+            passes, crossover = crossover_benchmarks(app, texts, sizes, args.repeat)
+            results["batch"].update(passes)
+            from predictor import VECTORIZE_MIN
+            results["crossover"] = {"measured": crossover, "vectorize_min": VECTORIZE_MIN}
+        if args.only in (None, "scaling"):
+            print("Running scaling benchmarks...", file=sys.stderr)
+            threads = [int(t) for t in args.threads.split(",") if t.strip()]
+            results["scaling"] = scaling_benchmarks(app, texts, threads, args.scaling_batch,
+                                                    args.scaling_chunk, args.repeat)
+        if args.only in (None, "load"):
+            print("Running load benchmarks...", file=sys.stderr)
+            results["load"] = load_benchmarks(model_path, rows, args.load_terms, args.load_runs, workdir)
+        if args.only in (None, "overhead"):
+            print("Running overhead benchmarks...", file=sys.stderr)
+            results["overhead"] = overhead_benchmarks(model_path, sample[:200], args.overhead_rounds,
+                                                      args.overhead_layouts, workdir)
+    finally:
+        os.chdir(HERE)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    for section in ("micro", "macro", "batch", "scaling", "load", "overhead"):
+        for name, r in results.get(section, {}).items():
+            if "overhead_pct" in r:
+                extra = f"  {r['overhead_pct']:>+8.2f} % vs metrics=0"
+            elif "terms" in r:
+                extra = f"  {r['terms']:>9} terms  (+{r['import_us'] / 1000:.0f} ms import)"
+            elif "loop_us" in r:
+                extra = f"  {r['msgs_per_s']:>9.0f} msg/s  x{r['speedup']:.2f} vs loop ({r['loop_us']:.1f} us)"
+            elif "speedup" in r:
+                extra = f"  {r['msgs_per_s']:>9.0f} msg/s  x{r['speedup']:.2f}"
+            elif "req_per_s" in r:
+                extra = f"  {r['req_per_s']:>9.1f} req/s"
+            else:
+                extra = f"  {r['ops_per_s']:>11.1f} ops/s"
+            print(f"{section:7}  {name:38} {r['median_us']:>10.1f} us{extra}", file=sys.stderr)
+
+    if "crossover" in results:
+        c = results["crossover"]
+        print(f"crossover: the batch pass is faster from {c['measured']} messages "
+              f"(predictor.VECTORIZE_MIN = {c['vectorize_min']})", file=sys.stderr)
+
+    exit_code = 0
+    if baseline:
+        with open(baseline, "r", encoding="utf-8") as f:
+            rows_cmp, regressions = compare(results, json.load(f), args.tolerance)
+        results["comparison"] = {"baseline": baseline, "tolerance": args.tolerance,
+                                 "results": rows_cmp, "regressions": len(regressions)}
+        for r in regressions:
+            print(f"REGRESSION  {r['name']}: {r['baseline_us']:.1f} us -> {r['current_us']:.1f} us "
+                  f"(x{r['ratio']:.2f})", file=sys.stderr)
+        if regressions:
+            exit_code = 1
+        else:
+            print(f"No regressions vs {baseline} (tolerance {args.tolerance:.0%})", file=sys.stderr)
+
+    for path in filter(None, (output, save_to)):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Wrote {path}", file=sys.stderr)
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
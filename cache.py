@@ -0,0 +1,146 @@
+"""
+cache.py
+- Bounded LRU cache of verdicts, keyed by a hash of the normalized message
+  text + model version + threshold
+- Bounded by entry count AND approximate memory use
+- Hit / miss / eviction counters
+- An entry may belong to a group (e.g. a campaign id); discard_group() drops
+  just that group's entries when their verdicts go stale
+- Clears itself when the model file on disk changes
+"""
+
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+ENTRY_OVERHEAD = 240   # rough bytes per entry: key, tuple, dict slot, floats
+
+
+def normalize_text(text: str) -> str:
+    """Case and whitespace never change a verdict (the vectorizer lowercases, rules split on whitespace)."""
+    return " ".join(text.split()).lower()
+
+
+def file_signature(path: str):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+class VerdictCache:
+
+    def __init__(self, max_entries: int = 50_000, max_bytes: int = 32 * 1024 * 1024,
+                 watch_path: str = None, check_interval: float = 1.0):
+        self.max_entries    = max_entries
+        self.max_bytes      = max_bytes
+        self.watch_path     = watch_path
+        self.check_interval = check_interval
+
+        self._data   = OrderedDict()   # key -> (value, size, group)
+        self._groups = {}              # group -> set of keys
+        self._bytes  = 0
+        self._lock  = threading.Lock()
+
+        self.hits          = 0
+        self.misses        = 0
+        self.evictions     = 0
+        self.invalidations = 0
+
+        self._signature  = file_signature(watch_path) if watch_path else None
+        self._next_check = time.monotonic() + check_interval
+
+    @staticmethod
+    def key(text: str, threshold: float, model_version: str) -> bytes:
+        h = hashlib.blake2b(digest_size=16)
+        h.update(f"{model_version}\x00{threshold:.6f}\x00".encode("utf-8"))
+        h.update(normalize_text(text).encode("utf-8", "surrogatepass"))
+        return h.digest()
+
+    @staticmethod
+    def _size(value) -> int:
+        words = value[3] if len(value) > 3 else ()
+        reason = value[2] or ""
+        return ENTRY_OVERHEAD + len(reason) + sum(len(w) + 56 for w in words)
+
+    def _check_model_file(self):
+        now = time.monotonic()
+        if self.watch_path is None or now < self._next_check:
+            return
+        self._next_check = now + self.check_interval
+        sig = file_signature(self.watch_path)
+        if sig != self._signature:
+            self._signature = sig
+            self.clear()
+            self.invalidations += 1
+
+    def get(self, key: bytes):
+        self._check_model_file()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def _pop(self, key: bytes):
+        value, size, group = self._data.pop(key)
+        self._bytes -= size
+        if group is not None:
+            keys = self._groups[group]
+            keys.discard(key)
+            if not keys:
+                del self._groups[group]
+
+    def put(self, key: bytes, value, group=None):
+        size = self._size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._data:
+                self._pop(key)
+            self._data[key] = (value, size, group)
+            self._bytes += size
+            if group is not None:
+                self._groups.setdefault(group, set()).add(key)
+            while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+                self._pop(next(iter(self._data)))
+                self.evictions += 1
+
+    def discard_group(self, group) -> int:
+        """Drop every entry put with `group`; returns how many."""
+        with self._lock:
+            keys = self._groups.pop(group, ())
+            for key in keys:
+                self._bytes -= self._data.pop(key)[1]
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._groups.clear()
+            self._bytes = 0
+
+    def after_fork(self):
+        """New lock in a forked child: one a parent thread held at fork() would never be released."""
+        self._lock = threading.Lock()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries":       len(self._data),
+                "bytes":         self._bytes,
+                "max_entries":   self.max_entries,
+                "max_bytes":     self.max_bytes,
+                "hits":          self.hits,
+                "misses":        self.misses,
+                "evictions":     self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate":      round(self.hits / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,295 @@
+"""
+campaigns.py
+- In-memory index of recent spam campaigns: near-duplicate messages that
+  differ only in names, links, amounts, ...
+- Text is normalized (case, URLs, numbers, whitespace) and cut into 5-byte
+  shingles. A 64-value MinHash signature estimates Jaccard similarity, and
+  LSH (16 bands of 4) finds candidate clusters without comparing against
+  every one
+- Only spam campaigns are indexed, so a match can only ever short-circuit to
+  a spam verdict. A cluster is one representative signature plus that
+  verdict. It is seeded by high-confidence spam verdicts and by trusted
+  (admin) spam labels, and stops being used when the model changes (verdict
+  clusters) or when it has not been seen for `ttl` seconds
+- A "not spam" label retracts the matching cluster: anyone's label for one
+  the model confirmed, only a trusted label for one an admin confirmed.
+  Retracting only sends the campaign's messages back to the model, so an
+  anonymous label can never make the index serve a verdict of its own
+- seed() reads recent trusted labels back from user_data.jsonl, so a
+  restarted worker still knows the campaigns admins have confirmed
+- Bounded: at most max_clusters, the least recently seen evicted first
+- lookup() returns the matching cluster and similarity, so the caller can
+  answer without running the model and say why
+"""
+
+import os
+import re
+import json
+import time
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from feedback import feedback_files, parse_record
+
+NUM_PERM     = 64
+BANDS        = 16            # x 4 rows: P(candidate) ~ 0.99 at Jaccard 0.7, ~0.06 at 0.3
+ROWS         = NUM_PERM // BANDS
+SHINGLE      = 5             # bytes per shingle
+MIN_CHARS    = 20            # shorter texts are too generic to call a campaign
+CONFIDENT    = 0.95          # model verdicts at least this sure seed a cluster
+TRUSTED_PROB = 0.99          # a trusted spam label, reported like the gibberish rule
+
+_URL    = re.compile(r"(?:https?://|www\.)\S+|\S+\.(?:com|net|org|uk|ly|info|biz)\b\S*", re.I)
+_NUMBER = re.compile(r"[£$€]?\d[\d,.:/-]*")
+
+_MASK   = np.uint64((1 << 8 * SHINGLE) - 1)
+_MIX    = np.uint64(0x9E3779B97F4A7C15)         # shingle bytes -> well-spread 32-bit value
+_rng    = np.random.default_rng(20240601)       # fixed: every worker builds the same signatures
+_A      = (_rng.integers(0, 2 ** 32, NUM_PERM, dtype=np.uint64) | np.uint64(1)).astype(np.uint32)[:, None]
+_B      = _rng.integers(0, 2 ** 32, NUM_PERM, dtype=np.uint64).astype(np.uint32)[:, None]
+
+
+def _is_trusted(line: str) -> bool:
+    try:
+        row = json.loads(line)
+    except ValueError:
+        return False
+    return isinstance(row, dict) and row.get("trusted") is True
+
+
+def normalize(text: str) -> str:
+    text = _URL.sub(" u ", text.lower())
+    return " ".join(_NUMBER.sub("0", text).split())
+
+
+def signature(text: str):
+    """MinHash signature of the normalized text (uint32[NUM_PERM]), or None if it is too short."""
+    data = normalize(text).encode("utf-8")
+    if len(data) < MIN_CHARS:
+        return None
+    # every 5-byte shingle at once: unaligned 8-byte reads at each offset, masked to 5 bytes
+    windows  = np.ndarray((len(data) - SHINGLE + 1,), dtype="<u8",
+                          buffer=data + bytes(8 - SHINGLE), strides=(1,))
+    shingles = (((windows & _MASK) * _MIX) >> np.uint64(32)).astype(np.uint32)
+    # one (a * x + b) mod 2^32 permutation per row; repeated shingles cannot change a minimum
+    return (_A * shingles + _B).min(axis=1)
+
+
+class Cluster:
+    __slots__ = ("id", "signature", "prob", "spam_words", "source", "size", "created", "seen")
+
+    def __init__(self, cid: int, sig, prob: float, spam_words, source: str, now: float):
+        self.id         = cid
+        self.signature  = sig
+        self.prob       = prob
+        self.spam_words = list(spam_words)
+        self.source     = source          # "verdict" or "trusted"
+        self.size       = 1
+        self.created    = now
+        self.seen       = now
+
+    def describe(self) -> dict:
+        return {"id": self.id, "prob": round(self.prob, 4), "source": self.source,
+                "size": self.size, "age_s": round(time.time() - self.created, 1)}
+
+
+class CampaignIndex:
+
+    def __init__(self, threshold: float = 0.8, ttl: float = 6 * 3600, max_clusters: int = 20_000):
+        self.threshold    = threshold
+        self.ttl          = ttl
+        self.max_clusters = max_clusters
+
+        self._clusters = OrderedDict()                  # id -> Cluster, least recently seen first
+        self._bands    = [dict() for _ in range(BANDS)]  # band bytes -> set of cluster ids
+        self._next_id  = 1
+        self._lock     = threading.Lock()
+
+        self.lookups   = 0
+        self.hits      = 0
+        self.added     = 0
+        self.merged    = 0
+        self.evictions = 0
+        self.retracted = 0
+        self.seeded    = 0
+
+    @staticmethod
+    def _band_keys(sig):
+        raw = sig.tobytes()
+        step = ROWS * 4
+        return [raw[i * step:(i + 1) * step] for i in range(BANDS)]
+
+    def _best(self, sig, keys, now: float):
+        """(cluster, similarity) of the most similar live candidate at or above threshold, else (None, 0)."""
+        candidates = set()
+        for band, key in zip(self._bands, keys):
+            ids = band.get(key)
+            if ids:
+                candidates.update(ids)
+        best, best_sim = None, 0.0
+        for cid in candidates:
+            cluster = self._clusters.get(cid)
+            if cluster is None or now - cluster.seen > self.ttl:
+                continue
+            sim = float(np.count_nonzero(cluster.signature == sig)) / NUM_PERM
+            if sim >= self.threshold and sim > best_sim:
+                best, best_sim = cluster, sim
+        return best, best_sim
+
+    # ── hot path ─────────────────────────────────────────────────
+
+    def lookup(self, text: str):
+        """(Cluster, similarity) for a known campaign, else None. A hit keeps the cluster alive."""
+        if not self._clusters:
+            return None
+        sig = signature(text)
+        if sig is None:
+            return None
+        now = time.time()
+        with self._lock:
+            self.lookups += 1
+            cluster, sim = self._best(sig, self._band_keys(sig), now)
+            if cluster is None:
+                return None
+            self.hits    += 1
+            cluster.size += 1
+            cluster.seen  = now
+            self._clusters.move_to_end(cluster.id)
+            return cluster, sim
+
+    # ── learning ─────────────────────────────────────────────────
+
+    def add(self, text: str, prob: float, spam_words=(), source: str = "verdict", now: float = None):
+        """
+        Record a confirmed spam message ("verdict": the model, "trusted": an
+        admin label). A near-duplicate of an existing cluster joins it;
+        anything else starts a new cluster. Returns the cluster, or None.
+        """
+        sig = signature(text)
+        if sig is None:
+            return None
+        now  = time.time() if now is None else now
+        keys = self._band_keys(sig)
+        with self._lock:
+            cluster, _ = self._best(sig, keys, now)
+            if cluster is not None:
+                if source == "trusted" and cluster.source != "trusted":
+                    cluster.prob, cluster.source = prob, source   # now survives model swaps
+                    cluster.spam_words = list(spam_words)
+                cluster.size += 1
+                cluster.seen  = max(cluster.seen, now)
+                self._clusters.move_to_end(cluster.id)
+                self.merged += 1
+                return cluster
+
+            cluster = Cluster(self._next_id, sig, prob, spam_words, source, now)
+            self._next_id += 1
+            self._clusters[cluster.id] = cluster
+            for band, key in zip(self._bands, keys):
+                band.setdefault(key, set()).add(cluster.id)
+            self.added += 1
+            self._evict(now)
+            return cluster
+
+    def retract(self, text: str, trusted: bool = False, now: float = None):
+        """
+        A "not spam" label: drop the cluster `text` is a near-duplicate of, if
+        the label may overrule it (trusted labels overrule any cluster, others
+        only model-confirmed ones). Returns the dropped cluster, or None.
+        """
+        sig = signature(text)
+        if sig is None:
+            return None
+        now = time.time() if now is None else now
+        with self._lock:
+            cluster, _ = self._best(sig, self._band_keys(sig), now)
+            if cluster is None or (cluster.source == "trusted" and not trusted):
+                return None
+            self._remove(cluster)
+            self.retracted += 1
+            return cluster
+
+    def live(self, cid: int) -> bool:
+        """Whether cluster `cid` is still indexed (not retracted, evicted or cleared)."""
+        with self._lock:
+            return cid in self._clusters
+
+    def seed(self, path: str) -> int:
+        """
+        Replay the trusted labels of the last `ttl` seconds from the log at
+        `path` (and its rotated segments), oldest first. Returns the number
+        of labels read.
+        """
+        since = time.time() - self.ttl
+        count = 0
+        for name in feedback_files(path):
+            try:
+                if os.path.getmtime(name) < since:
+                    continue   # nothing in this segment is recent enough
+                f = open(name, "r", encoding="utf-8", errors="replace")
+            except FileNotFoundError:
+                continue
+            with f:
+                for line in f:
+                    if '"trusted"' not in line or not _is_trusted(line):
+                        continue   # anonymous labels never seed the index
+                    record = parse_record(line)
+                    if record is None or record[2] is None or record[2] < since:
+                        continue
+                    text, label, ts = record
+                    if label == 1:
+                        self.add(text, TRUSTED_PROB, source="trusted", now=ts)
+                    else:
+                        self.retract(text, trusted=True, now=ts)
+                    count += 1
+        self.seeded += count
+        return count
+
+    def _evict(self, now: float):
+        # oldest-seen first: expired clusters, then anything over the size bound
+        while self._clusters:
+            cluster = next(iter(self._clusters.values()))
+            if len(self._clusters) <= self.max_clusters and now - cluster.seen <= self.ttl:
+                break
+            self._remove(cluster)
+            self.evictions += 1
+
+    def _remove(self, cluster):
+        del self._clusters[cluster.id]
+        for band, key in zip(self._bands, self._band_keys(cluster.signature)):
+            ids = band.get(key)
+            if ids is not None:
+                ids.discard(cluster.id)
+                if not ids:
+                    del band[key]
+
+    def expire(self):
+        with self._lock:
+            self._evict(time.time())
+
+    def clear(self, source: str = None):
+        """Forget every cluster, or only those from one source (e.g. "verdict" after a model swap)."""
+        with self._lock:
+            for cluster in [c for c in self._clusters.values() if source is None or c.source == source]:
+                self._remove(cluster)
+
+    def after_fork(self):
+        """New lock in a forked child: one a parent thread held at fork() would never be released."""
+        self._lock = threading.Lock()
+
+    def stats(self) -> dict:
+        with self._lock:
+            by_source = {"verdict": 0, "trusted": 0}
+            for c in self._clusters.values():
+                by_source[c.source] += 1
+            return {"clusters": len(self._clusters), "max_clusters": self.max_clusters,
+                    "threshold": self.threshold, "ttl_s": self.ttl, **by_source,
+                    "lookups": self.lookups, "hits": self.hits, "added": self.added,
+                    "merged": self.merged, "evictions": self.evictions, "retracted": self.retracted,
+                    "seeded": self.seeded}
+
+    def top(self, n: int = 20) -> list:
+        with self._lock:
+            return [c.describe() for c in sorted(self._clusters.values(), key=lambda c: -c.size)[:n]]
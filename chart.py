@@ -0,0 +1,166 @@
+"""
+chart.py
+- Sigmoid chart engine for the web app
+- The static curve background (S-curve, zones, labels, axes) is drawn with
+  matplotlib ONCE per size and kept as an SVG template
+- Each request only formats the message dot + annotation into that template,
+  so no figure, layout pass or PNG encode happens per request, and nothing
+  is cached per probability: a worker holds one encoded template per size
+  (~37 KB), whatever probabilities are requested
+- matplotlib is imported by the first background render, not with this
+  module: importing app.py stays fast, and a process that never draws a
+  chart never loads it (app.warmup() renders both sizes before forking)
+"""
+
+import io
+import math
+import hashlib
+import threading
+import numpy as np
+
+SIZES = {
+    "inline": {"figsize": (5.5, 2.8), "title_size": 10},
+    "full":   {"figsize": (7, 4),     "title_size": 12},
+}
+
+X_LIMIT = 8.8   # x-axis range; dots beyond it are pinned to the edge
+
+_render_lock = threading.Lock()   # matplotlib is only touched while building a background
+
+OVERLAY = """<g id="message-dot">
+  <defs>
+   <marker id="dot-arrow" viewBox="0 0 10 10" refX="9" refY="5" markerWidth="6" markerHeight="6" orient="auto">
+    <path d="M 0 1 L 9 5 L 0 9" fill="none" stroke="#ffffff" stroke-width="1.5"/>
+   </marker>
+  </defs>
+  <line x1="{tx:.2f}" y1="{ty:.2f}" x2="{ax:.2f}" y2="{ay:.2f}" stroke="#ffffff" stroke-width="0.8" marker-end="url(#dot-arrow)"/>
+  <circle cx="{cx:.2f}" cy="{cy:.2f}" r="4.74" fill="{color}" stroke="#ffffff" stroke-width="1.5"/>
+  <text x="{lx:.2f}" y="{ly:.2f}" fill="#ffffff" font-size="7.5px" font-family="DejaVu Sans, sans-serif">
+   <tspan x="{lx:.2f}">your message</tspan>
+   <tspan x="{lx:.2f}" dy="1.2em">p = {prob:.3f}</tspan>
+  </text>
+ </g>
+"""
+
+
+class SigmoidBackground:
+    """Pre-rendered SVG of the curve plus the data -> SVG coordinate mapping."""
+
+    def __init__(self, size: str):
+        # deferred to the first render (~0.5 s of imports); Figure directly, no pyplot / backend
+        import matplotlib
+        from matplotlib.figure import Figure
+
+        spec = SIZES[size]
+        x = np.linspace(-8, 8, 400)
+        y = 1 / (1 + np.exp(-x))
+
+        fig = Figure(figsize=spec["figsize"])
+        fig.patch.set_facecolor("#080c14")
+        ax = fig.add_subplot()
+        ax.set_facecolor("#0d1120")
+
+        # S curve
+        ax.plot(x, y, color="#22d3a5", linewidth=2.5, zorder=3)
+
+        # Decision boundary lines
+        ax.axhline(y=0.5, color="#f5c542", linestyle="--", linewidth=1.2, alpha=0.7)
+        ax.axvline(x=0.0, color="#f5c542", linestyle="--", linewidth=1.2, alpha=0.7)
+
+        # Shaded zones
+        ax.fill_between(x, y, 0.5, where=(y > 0.5), color="#f4536a", alpha=0.10)
+        ax.fill_between(x, y, 0.5, where=(y < 0.5), color="#22d3a5", alpha=0.10)
+
+        # Zone labels
+        ax.text( 4.5, 0.06, "HAM",  color="#22d3a5", fontsize=10, fontweight="bold", alpha=0.8)
+        ax.text(-7.0, 0.90, "SPAM", color="#f4536a", fontsize=10, fontweight="bold", alpha=0.8)
+        ax.text( 0.2, 0.52, "threshold = 0.5", color="#f5c542", fontsize=7.5, alpha=0.75)
+
+        # Styling
+        ax.set_xlabel("Log-odds score (raw model output)", color="#666", fontsize=8)
+        ax.set_ylabel("Spam probability", color="#666", fontsize=8)
+        ax.set_title("Logistic Regression — Sigmoid Curve", color="white",
+                     fontsize=spec["title_size"], pad=8)
+        ax.set_xlim(-X_LIMIT, X_LIMIT)
+        ax.set_ylim(-0.05, 1.05)
+        ax.tick_params(colors="#555", labelsize=7)
+        for spine in ax.spines.values():
+            spine.set_color("#222")
+
+        fig.tight_layout()
+        buf = io.StringIO()
+        with matplotlib.rc_context({"svg.fonttype": "none", "svg.hashsalt": "logifyneural"}):
+            fig.savefig(buf, format="svg", facecolor=fig.get_facecolor(), metadata={"Date": None})
+        svg = buf.getvalue()
+
+        # Both axes are linear, so data -> SVG is a fixed affine map. SVG user
+        # units are points (72 per inch) with y pointing down.
+        scale  = 72.0 / fig.dpi
+        height = fig.get_figheight() * 72.0
+        (x0, y0), (x1, y1) = ax.transData.transform([(0.0, 0.0), (1.0, 1.0)])
+        self.x_map = (float(x1 - x0) * scale, float(x0) * scale)
+        self.y_map = (-float(y1 - y0) * scale, height - float(y0) * scale)
+
+        end         = svg.rindex("</svg>")
+        self.head   = svg[:end].encode("utf-8")
+        self.tail   = svg[end:].encode("utf-8")
+        self.digest = hashlib.sha1(self.head + self.tail).digest()
+
+    def to_svg(self, x: float, y: float):
+        return x * self.x_map[0] + self.x_map[1], y * self.y_map[0] + self.y_map[1]
+
+    def render(self, current_prob=None) -> bytes:
+        return self.head + self.overlay(current_prob) + self.tail
+
+    def overlay(self, current_prob=None) -> bytes:
+        """The dot + annotation markup for current_prob (empty for None)."""
+        if current_prob is None:
+            return b""
+
+        p         = max(min(current_prob, 0.9999), 0.0001)
+        log_odds  = max(min(math.log(p / (1 - p)), X_LIMIT), -X_LIMIT)
+        color     = "#f4536a" if current_prob >= 0.5 else "#22d3a5"
+        x_offset  = 0.25 if log_odds < 5 else -3.8
+
+        cx, cy = self.to_svg(log_odds, current_prob)
+        tx, ty = self.to_svg(log_odds + x_offset, current_prob + 0.10)
+        # stop the arrow at the edge of the dot
+        dist = math.hypot(tx - cx, ty - cy) or 1.0
+        shrink = 6.0 / dist
+        ax, ay = cx + (tx - cx) * shrink, cy + (ty - cy) * shrink
+
+        overlay = OVERLAY.format(
+            tx=tx, ty=ty, ax=ax, ay=ay, cx=cx, cy=cy, color=color,
+            lx=tx + 4.0, ly=ty - 9.0, prob=current_prob,
+        )
+        return overlay.encode("utf-8")
+
+
+_backgrounds = {}
+
+
+def background(size: str) -> SigmoidBackground:
+    bg = _backgrounds.get(size)
+    if bg is None:
+        with _render_lock:
+            bg = _backgrounds.get(size)
+            if bg is None:
+                bg = _backgrounds[size] = SigmoidBackground(size)
+    return bg
+
+
+def sigmoid_svg(size: str, prob_key):
+    """
+    Returns (svg_bytes, etag) for a chart size and a dot position.
+    prob_key is the probability rounded to 4 decimals (or None for no dot),
+    which keeps the URLs stable. The ETag hashes the template's digest and
+    the overlay, not the whole document.
+    """
+    bg      = background(size)
+    overlay = bg.overlay(None if prob_key is None else float(prob_key))
+    return bg.head + overlay + bg.tail, hashlib.sha1(bg.digest + overlay).hexdigest()[:20]
+
+
+def chart_prob_key(prob):
+    """Canonical URL/cache form of a probability."""
+    return None if prob is None else f"{prob:.4f}"
@@ -0,0 +1,166 @@
+"""
+compact.py
+- Smaller, faster-loading variants of train.py's model (python train.py --compact)
+- Pruning: terms whose |coef| is below a threshold are dropped from the
+  vocabulary and the classifier is refitted on what is left (idf of the
+  kept terms is unchanged, so no second vectorizer fit)
+- float32: idf and coef are stored as float32; scoring still computes in
+  float64, so the compiled scorer and the artifact match the Pipeline exactly
+- Drops the vectorizer's stop_words_ (introspection only, can be large)
+- Hashed (--compact hashed): HashingVectorizer + LogisticRegression, a fixed
+  number of columns however large the feedback-augmented corpus grows, and
+  no vocabulary at all (served by scorer.HashedScorer)
+- footprint() measures a saved model as a worker would see it: file sizes
+  plus the RSS growth of a fresh process that loads it and scores once,
+  for both model.pkl and the artifact
+"""
+
+import os
+import sys
+import json
+import subprocess
+
+import numpy as np
+from sklearn.base import clone
+from sklearn.pipeline import Pipeline
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import LogisticRegression
+
+MODES          = ("prune", "hashed")
+PRUNE_BELOW    = 0.05      # |coef| under this is treated as no evidence either way
+HASH_FEATURES  = 2 ** 18   # 1 MB of float32 coefficients
+
+# run in a fresh interpreter by footprint(); prints one JSON line
+_RSS_PROBE = r"""
+import sys, json, resource
+sys.path.insert(0, sys.argv[1])
+
+def rss_kb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss   # peak, Linux units
+
+import joblib, sklearn.pipeline, sklearn.linear_model, sklearn.feature_extraction.text
+from predictor import Predictor
+from scorer import PROBE_TEXTS
+before = rss_kb()
+p = Predictor.load(sys.argv[2])
+p.score_messages(PROBE_TEXTS)
+for t in PROBE_TEXTS:
+    p.score_message(t)
+print(json.dumps({"rss_kb": rss_kb(), "model_rss_kb": rss_kb() - before}))
+"""
+
+
+def prune(model, X_train, y_train, below: float = PRUNE_BELOW):
+    """Copy of a fitted tfidf + LR Pipeline without the near-zero-weight terms, refitted."""
+    vectorizer = model.named_steps["tfidf"]
+    classifier = model.named_steps["clf"]
+    coef       = classifier.coef_[0]
+    names      = vectorizer.get_feature_names_out()
+    keep       = np.flatnonzero(np.abs(coef) >= below)
+    if not len(keep):
+        raise ValueError(f"no term has |coef| >= {below}")
+
+    # same settings, fitted state set by hand: kept terms renumbered in their sorted order
+    pruned = Pipeline([("tfidf", clone(vectorizer)),
+                       ("clf",   LogisticRegression(**classifier.get_params()))])
+    pruned.named_steps["tfidf"].vocabulary_ = {str(names[i]): j for j, i in enumerate(keep)}
+    pruned.named_steps["tfidf"].idf_        = vectorizer.idf_[keep]
+    pruned.named_steps["clf"].fit(pruned.named_steps["tfidf"].transform(X_train), y_train)
+    return pruned
+
+
+def to_float32(model):
+    """Store idf / coef as float32 in place; drop stop_words_."""
+    steps = model.named_steps
+    if "tfidf" in steps:
+        vectorizer = steps["tfidf"]
+        if hasattr(vectorizer, "stop_words_"):
+            del vectorizer.stop_words_
+        if vectorizer.use_idf:
+            vectorizer.idf_ = vectorizer.idf_.astype(np.float32)
+    steps["clf"].coef_ = steps["clf"].coef_.astype(np.float32)
+    return model
+
+
+def hashed_model(n_features: int = HASH_FEATURES, C: float = 1.0):
+    return Pipeline([
+        ("hash", HashingVectorizer(lowercase=True, stop_words="english",
+                                   n_features=n_features, alternate_sign=False)),
+        ("clf",  LogisticRegression(max_iter=2000, C=C)),
+    ])
+
+
+def compact_model(model, X_train, y_train, mode: str = "prune", below: float = PRUNE_BELOW,
+                  n_features: int = HASH_FEATURES):
+    """The compact counterpart of a fitted train.py model, float32 either way."""
+    if mode == "prune":
+        compact = prune(model, X_train, y_train, below)
+    elif mode == "hashed":
+        compact = hashed_model(n_features).fit(X_train, y_train)
+    else:
+        raise ValueError(f"mode must be one of {MODES}, got {mode!r}")
+    return to_float32(compact)
+
+
+def n_weights(model) -> int:
+    return int(model.named_steps["clf"].coef_.shape[1])
+
+
+# ── measuring ────────────────────────────────────────────────────
+
+def disk_size(path: str) -> int:
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+    return os.path.getsize(path)
+
+
+def footprint(model_file: str, artifact: str = None) -> dict:
+    """Sizes on disk and the per-worker RSS growth of loading model_file and the artifact."""
+    has_artifact = bool(artifact) and os.path.isdir(artifact)
+    return {
+        "model_file_bytes": disk_size(model_file),
+        "artifact_bytes":   disk_size(artifact) if has_artifact else None,
+        "model_file_rss":   _load_rss(model_file),
+        "artifact_rss":     _load_rss(artifact) if has_artifact else None,
+    }
+
+
+def _load_rss(path: str):
+    """{rss_kb, model_rss_kb} of a fresh process after loading `path` (None if the probe fails)."""
+    root = os.path.dirname(os.path.abspath(__file__))
+    try:
+        probe = subprocess.run([sys.executable, "-c", _RSS_PROBE, root, path],
+                               capture_output=True, text=True, timeout=300, check=True)
+        return json.loads(probe.stdout.strip().splitlines()[-1])
+    except (subprocess.SubprocessError, ValueError, IndexError) as e:
+        print(f"RSS probe for {path} failed: {e}")
+        return None
+
+
+def print_comparison(rows: dict):
+    """rows: {name: {accuracy, weights, **footprint()}}; the first row is the baseline."""
+    base = next(iter(rows.values()))
+
+    def mb(n):
+        return "-" if n is None else f"{n / 1e6:.2f} MB"
+
+    def rss(probe):
+        return "-" if probe is None else f"+{probe['model_rss_kb'] / 1024:.1f} MB"
+
+    print(f"\n{'model':<8} {'accuracy':>8} {'delta':>8} {'weights':>8} {'model.pkl':>10} {'load RSS':>9} "
+          f"{'artifact':>10} {'load RSS':>9}")
+    for name, r in rows.items():
+        print(f"{name:<8} {r['accuracy']:>8.4f} {r['accuracy'] - base['accuracy']:>+8.4f} "
+              f"{r['weights']:>8} {mb(r['model_file_bytes']):>10} {rss(r['model_file_rss']):>9} "
+              f"{mb(r['artifact_bytes']):>10} {rss(r['artifact_rss']):>9}")
+    probe = base["artifact_rss"] or base["model_file_rss"]
+    if probe:
+        print(f"(load RSS: growth of a fresh worker process after loading the model and scoring; "
+              f"the process itself is {probe['rss_kb'] / 1024:.0f} MB)")
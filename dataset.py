@@ -0,0 +1,297 @@
+"""
+dataset.py
+- Where train.py gets the SMS corpus: a local, content-addressed cache first,
+  the network only when the corpus is not cached yet
+- A source is the public URL (default), a mirror URL, a local TSV path, or
+  "sha256:<hex>" to pin an exact cached copy (LOGIFY_DATA or train.py --data)
+- Cache layout (data_cache/, or LOGIFY_DATA_CACHE):
+    index.json            source -> sha256 (+ size/mtime for local files)
+    <sha256>/raw.tsv      the bytes exactly as fetched
+    <sha256>/labels.npy   parsed labels (int8, 0 = ham, 1 = spam)
+    <sha256>/offsets.npy  row boundaries into texts.txt
+    <sha256>/texts.txt    every message text, concatenated
+    <sha256>/parsed.json  row count + parse format (written last)
+- Parsing happens once per content hash; later runs load two arrays and one
+  string instead of re-running read_csv on the raw text
+- Offline mode never touches the network and fails fast when the source is
+  not cached
+- corpus_file() + iter_tsv() are the streaming counterpart of load_corpus():
+  the raw TSV's path, then parsed chunks of it (train.py --stream)
+"""
+
+import io
+import os
+import json
+import shutil
+import hashlib
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+DATA_URL     = "https://raw.githubusercontent.com/justmarkham/pycon-2016-tutorial/master/data/sms.tsv"
+CACHE_DIR    = os.environ.get("LOGIFY_DATA_CACHE", "data_cache")
+PARSE_FORMAT = 1   # bump when parse_tsv() changes; older parsed copies are rebuilt from raw.tsv
+
+
+class DatasetError(Exception):
+    pass
+
+
+def default_source() -> str:
+    return os.environ.get("LOGIFY_DATA") or DATA_URL
+
+
+def is_url(source: str) -> bool:
+    return source.startswith(("http://", "https://"))
+
+
+def parse_tsv(raw: bytes) -> pd.DataFrame:
+    """label \\t text rows -> DataFrame(label 0/1, text); the parsing train.py has always used."""
+    df = pd.read_csv(io.BytesIO(raw), sep="\t", names=["label", "text"], encoding="utf-8")
+    return _clean(df)
+
+
+def iter_tsv(path: str, chunk_size: int):
+    """parse_tsv() of a TSV file, chunk_size rows at a time, without reading the whole file."""
+    with pd.read_csv(path, sep="\t", names=["label", "text"], encoding="utf-8",
+                     chunksize=chunk_size) as reader:
+        for df in reader:
+            yield _clean(df)
+
+
+def _clean(df: pd.DataFrame) -> pd.DataFrame:
+    # Convert "ham"/"spam" -> 0/1
+    df["label"] = df["label"].map({"ham": 0, "spam": 1})
+    df["text"] = df["text"].astype(str)
+
+    # Drop any weird rows
+    df = df.dropna(subset=["label", "text"])
+    df["label"] = df["label"].astype(np.int64)
+    return df.reset_index(drop=True)
+
+
+class DatasetCache:
+
+    def __init__(self, root: str = CACHE_DIR):
+        self.root = root
+
+    # ── index: source -> content hash ────────────────────────────
+
+    def _index_path(self) -> str:
+        return os.path.join(self.root, "index.json")
+
+    def _read_index(self) -> dict:
+        try:
+            with open(self._index_path(), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except ValueError:
+            print(f"Ignoring corrupted {self._index_path()}")
+            return {}
+
+    def _remember(self, source: str, digest: str, **extra):
+        index = self._read_index()
+        index[source] = {"sha256": digest, "stored": datetime.now().isoformat(timespec="seconds"),
+                         **extra}
+        os.makedirs(self.root, exist_ok=True)
+        tmp = f"{self._index_path()}.tmp-{os.getpid()}"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(index, f, indent=2)
+        os.replace(tmp, self._index_path())
+
+    def lookup(self, source: str):
+        """Content hash recorded for a source, or None."""
+        entry = self._read_index().get(source)
+        return entry["sha256"] if entry and self.has(entry["sha256"]) else None
+
+    # ── content-addressed entries ────────────────────────────────
+
+    def _dir(self, digest: str) -> str:
+        return os.path.join(self.root, digest)
+
+    def has(self, digest: str) -> bool:
+        return os.path.exists(os.path.join(self._dir(digest), "raw.tsv"))
+
+    def store(self, raw: bytes) -> str:
+        """Add raw TSV bytes (plus their parsed columns); returns the content hash."""
+        digest = hashlib.sha256(raw).hexdigest()
+        if not self.has(digest):
+            tmp = f"{self._dir(digest)}.tmp-{os.getpid()}"
+            shutil.rmtree(tmp, ignore_errors=True)
+            os.makedirs(tmp)
+            with open(os.path.join(tmp, "raw.tsv"), "wb") as f:
+                f.write(raw)
+            self._write_parsed(tmp, parse_tsv(raw))
+            try:
+                os.rename(tmp, self._dir(digest))
+            except OSError:   # another run stored the same content first
+                shutil.rmtree(tmp, ignore_errors=True)
+        return digest
+
+    def raw_path(self, digest: str) -> str:
+        return os.path.join(self._dir(digest), "raw.tsv")
+
+    def store_stream(self, blocks) -> str:
+        """
+        Add raw TSV bytes arriving in blocks, hashing as they are written;
+        returns the content hash. Only raw.tsv is written: the parsed columns
+        are built by load() if a run ever needs them in memory.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        tmp = os.path.join(self.root, f"download.tmp-{os.getpid()}")
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        h = hashlib.sha256()
+        with open(os.path.join(tmp, "raw.tsv"), "wb") as f:
+            for block in blocks:
+                h.update(block)
+                f.write(block)
+        digest = h.hexdigest()
+        if self.has(digest):
+            shutil.rmtree(tmp, ignore_errors=True)
+            return digest
+        try:
+            os.rename(tmp, self._dir(digest))
+        except OSError:   # another run stored the same content first
+            shutil.rmtree(tmp, ignore_errors=True)
+        return digest
+
+    def load(self, digest: str) -> pd.DataFrame:
+        """The parsed corpus for a content hash; re-parses raw.tsv if the columnar copy is stale."""
+        path = self._dir(digest)
+        try:
+            with open(os.path.join(path, "parsed.json"), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("format") != PARSE_FORMAT:
+                raise ValueError(f"parsed format {meta.get('format')}")
+            labels  = np.load(os.path.join(path, "labels.npy"))
+            offsets = np.load(os.path.join(path, "offsets.npy"))
+            with open(os.path.join(path, "texts.txt"), "r", encoding="utf-8", newline="") as f:
+                blob = f.read()
+            if len(labels) != meta["rows"] or len(offsets) != meta["rows"] + 1 or len(blob) != offsets[-1]:
+                raise ValueError("columns do not match parsed.json")
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Rebuilding parsed copy of {digest[:12]} ({e})")
+            with open(os.path.join(path, "raw.tsv"), "rb") as f:
+                df = parse_tsv(f.read())
+            self._write_parsed(path, df)
+            return df
+
+        bounds = offsets.tolist()
+        texts  = [blob[a:b] for a, b in zip(bounds, bounds[1:])]
+        return pd.DataFrame({"label": labels.astype(np.int64), "text": texts})
+
+    @staticmethod
+    def _write_parsed(path: str, df: pd.DataFrame):
+        texts   = df["text"].tolist()
+        offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+        np.cumsum([len(t) for t in texts], out=offsets[1:])
+        np.save(os.path.join(path, "labels.npy"), df["label"].to_numpy(dtype=np.int8))
+        np.save(os.path.join(path, "offsets.npy"), offsets)
+        with open(os.path.join(path, "texts.txt"), "w", encoding="utf-8", newline="") as f:
+            f.write("".join(texts))
+        # written last: its presence means the columns above are complete
+        with open(os.path.join(path, "parsed.json"), "w", encoding="utf-8") as f:
+            json.dump({"format": PARSE_FORMAT, "rows": len(texts)}, f)
+
+
+def load_corpus(source: str = None, offline: bool = False, refresh: bool = False,
+                cache: DatasetCache = None) -> pd.DataFrame:
+    """
+    DataFrame(label, text) for a source (see the module docstring).
+    refresh re-downloads a URL even if it is cached. Raises DatasetError when
+    the corpus cannot be found (offline, or a missing file / pinned hash).
+    """
+    source = source or default_source()
+    cache  = cache or DatasetCache()
+
+    if source.startswith("sha256:"):
+        digest = source[len("sha256:"):]
+        if not cache.has(digest):
+            raise DatasetError(f"{source} is not in {cache.root}/")
+        print(f"Using cached dataset {digest[:12]}")
+        return cache.load(digest)
+
+    if not is_url(source):
+        return _load_local(source, cache)
+
+    digest = cache.lookup(source)
+    if digest and not refresh:
+        print(f"Using cached dataset {digest[:12]} for {source}")
+        return cache.load(digest)
+    if offline:
+        raise DatasetError(f"{source} is not cached in {cache.root}/ and --offline forbids "
+                           f"downloading it. Copy the TSV over and pass --data <path>, "
+                           f"or set LOGIFY_DATA.")
+
+    import requests
+    print(f"Downloading dataset from {source}...")
+    resp = requests.get(source, timeout=30)
+    resp.raise_for_status()
+    digest = cache.store(resp.content)
+    del resp   # the raw bytes are on disk now; do not hold them next to the DataFrame
+    cache._remember(source, digest)
+    print(f"Cached dataset as {digest[:12]}")
+    return cache.load(digest)
+
+
+def corpus_file(source: str = None, offline: bool = False, refresh: bool = False,
+                cache: DatasetCache = None) -> str:
+    """
+    Path of the raw TSV for a source, for streaming it (see iter_tsv) rather
+    than loading it: a local file is used where it is, a URL is downloaded
+    into the cache in blocks if it is not there yet. Raises DatasetError like
+    load_corpus().
+    """
+    source = source or default_source()
+    cache  = cache or DatasetCache()
+
+    if source.startswith("sha256:"):
+        digest = source[len("sha256:"):]
+        if not cache.has(digest):
+            raise DatasetError(f"{source} is not in {cache.root}/")
+        return cache.raw_path(digest)
+
+    if not is_url(source):
+        if not os.path.exists(source):
+            raise DatasetError(f"dataset file {source} not found")
+        return source
+
+    digest = cache.lookup(source)
+    if digest and not refresh:
+        print(f"Using cached dataset {digest[:12]} for {source}")
+        return cache.raw_path(digest)
+    if offline:
+        raise DatasetError(f"{source} is not cached in {cache.root}/ and --offline forbids "
+                           f"downloading it.")
+
+    import requests
+    print(f"Downloading dataset from {source}...")
+    with requests.get(source, timeout=30, stream=True) as resp:
+        resp.raise_for_status()
+        digest = cache.store_stream(resp.iter_content(chunk_size=1 << 20))
+    cache._remember(source, digest)
+    print(f"Cached dataset as {digest[:12]}")
+    return cache.raw_path(digest)
+
+
+def _load_local(path: str, cache: DatasetCache) -> pd.DataFrame:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        raise DatasetError(f"dataset file {path} not found")
+    key   = os.path.abspath(path)
+    entry = cache._read_index().get(key)
+    # unchanged file (same size and mtime): skip reading and hashing it again
+    if entry and entry.get("size") == st.st_size and entry.get("mtime") == st.st_mtime \
+            and cache.has(entry["sha256"]):
+        print(f"Using cached dataset {entry['sha256'][:12]} for {path}")
+        return cache.load(entry["sha256"])
+
+    print(f"Reading dataset from {path}...")
+    with open(path, "rb") as f:
+        digest = cache.store(f.read())
+    cache._remember(key, digest, size=st.st_size, mtime=st.st_mtime)
+    return cache.load(digest)
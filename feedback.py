@@ -0,0 +1,341 @@
+"""
+feedback.py
+- Asynchronous, group-committing writer for user_data.jsonl
+- Requests put a record on a bounded queue and return immediately; one writer
+  thread per process drains it in batches (by size or max delay) and appends
+  each batch with a single write()
+- Durability is explicit: fsync after every batch, at most every N seconds,
+  or never (leave it to the OS)
+- Safe with several worker processes: appends hold an exclusive flock on a
+  side lock file, and a writer reopens the log if another process rotated it
+- Size-based rotation to timestamped segments (user_data.jsonl.<time>);
+  train.py reads them all via feedback_files()
+- Flushes whatever is queued on shutdown (atexit)
+- Reader side: read_log() streams complete lines from a checkpoint (inode +
+  byte offset, so it follows rotation); parse_record() is the one rule for
+  what counts as a usable line
+"""
+
+import os
+import glob
+import json
+import time
+import queue
+import atexit
+import threading
+from datetime import datetime, timezone
+
+try:
+    import fcntl
+except ImportError:   # Windows: no cross-process locking, single process is still safe
+    fcntl = None
+
+FSYNC_POLICIES = ("batch", "interval", "never")
+
+
+def feedback_files(path: str) -> list:
+    """Rotated segments oldest first, then the live file — the full feedback history in order."""
+    segments = sorted(glob.glob(glob.escape(path) + ".[0-9]*T*"))
+    return segments + ([path] if os.path.exists(path) else [])
+
+
+def read_log(path: str, position=None):
+    """
+    Yields (line, position after it) for every complete line after `position`,
+    one line at a time. The checkpointed file is found by inode, so a rotated
+    segment is finished first and every newer file is read from the start.
+    A trailing line without its newline yet is left for the next reader.
+    """
+    files = feedback_files(path)
+    start = 0
+    if position is not None:
+        for i, name in enumerate(files):
+            try:
+                st = os.stat(name)
+            except FileNotFoundError:
+                continue
+            if (st.st_ino, st.st_dev) == (position["inode"], position["dev"]):
+                start = i
+                break
+        else:
+            print(f"Checkpointed feedback file is gone; reading all of {path}*")
+            position = None
+
+    for i in range(start, len(files)):
+        offset = position["offset"] if position is not None and i == start else 0
+        try:
+            f = open(files[i], "rb")
+        except FileNotFoundError:
+            continue   # rotated away after we listed it; its new name was listed too
+        with f:
+            st = os.fstat(f.fileno())
+            if offset > st.st_size:   # truncated in place: start over
+                offset = 0
+            f.seek(offset)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break
+                offset += len(raw)
+                yield (raw.decode("utf-8", errors="replace"),
+                       {"inode": st.st_ino, "dev": st.st_dev, "offset": offset})
+
+
+def parse_record(line):
+    """
+    (text, label, ts) from one log line, or None for blank, corrupted or
+    unlabeled lines. ts is epoch seconds, or None if the line has no valid one.
+    """
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        row = json.loads(line)
+    except json.JSONDecodeError:
+        return None   # skip corrupted lines
+    if not isinstance(row, dict):
+        return None
+    text  = str(row.get("text", "")).strip()
+    label = row.get("label", None)
+    if not text or label not in (0, 1):
+        return None
+    try:
+        when = datetime.fromisoformat(row["ts"])
+        ts   = (when if when.tzinfo else when.replace(tzinfo=timezone.utc)).timestamp()   # app writes UTC
+    except (KeyError, TypeError, ValueError):
+        ts = None
+    return text, int(label), ts
+
+
+class FeedbackWriter:
+
+    def __init__(self, path: str, max_batch: int = 256, max_delay: float = 0.05,
+                 max_queue: int = 10_000, fsync: str = "interval", fsync_interval: float = 1.0,
+                 max_bytes: int = 64 * 1024 * 1024, put_timeout: float = 0.5):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {FSYNC_POLICIES}, got {fsync!r}")
+        self.path           = path
+        self.max_batch      = max_batch
+        self.max_delay      = max_delay
+        self.max_queue      = max_queue
+        self.fsync          = fsync
+        self.fsync_interval = fsync_interval
+        self.max_bytes      = max_bytes
+        self.put_timeout    = put_timeout
+
+        self._queue    = queue.Queue(maxsize=max_queue)
+        self._lock     = threading.Lock()   # one writer at a time within this process
+        self._thread   = None
+        self._pid      = None
+        self._stopping = False
+        self._fd       = None
+        self._dirty    = False              # written but not fsynced yet
+        self._synced   = time.monotonic()
+
+        self.queued      = 0
+        self.written     = 0
+        self.batches     = 0
+        self.fsyncs      = 0
+        self.rotations   = 0
+        self.sync_writes = 0   # records written in the request thread because the queue was full
+        self.errors      = 0
+
+        atexit.register(self.close)
+
+    # ── request side ─────────────────────────────────────────────
+
+    def submit(self, record: dict):
+        """
+        Queue one record; returns at once unless the queue is full, in which
+        case it waits up to put_timeout for room (keeps file order) and then
+        writes the record itself rather than dropping it.
+        """
+        self._ensure_started()
+        try:
+            self._queue.put(record, timeout=self.put_timeout)   # serialized by the writer thread
+            self.queued += 1
+        except queue.Full:
+            self.sync_writes += 1
+            self._commit([record])
+
+    def _ensure_started(self):
+        # threads do not survive fork(), so (re)start per process
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._queue  = queue.Queue(maxsize=self.max_queue)
+                self._fd     = None
+                self._pid    = os.getpid()
+                self._thread = threading.Thread(target=self._run, name="feedback-writer", daemon=True)
+                self._thread.start()
+
+    # ── writer thread ────────────────────────────────────────────
+
+    def _collect(self):
+        """
+        Block for the first record (or until an interval fsync is due), then
+        group up to max_batch. A None on the queue is close()'s stop signal.
+        """
+        try:
+            first = self._queue.get(timeout=self.fsync_interval if self._dirty else None)
+        except queue.Empty:
+            return []
+        if first is None:
+            return []
+        batch    = [first]
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                record = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if record is None:
+                break
+            batch.append(record)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch:
+                self._commit(batch)
+            elif self._dirty:
+                with self._lock:
+                    self._sync()
+            if self._stopping:
+                return
+
+    def _commit(self, records):
+        data = "".join(json.dumps(r) + "\n" for r in records).encode("utf-8")
+        with self._lock:
+            try:
+                with self._file_lock():
+                    fd   = self._open()
+                    size = os.fstat(fd).st_size
+                    if self.max_bytes and size > 0 and size + len(data) > self.max_bytes:
+                        fd = self._rotate()
+                    os.write(fd, data)   # O_APPEND: one write, never interleaved with other processes
+                    self._dirty = True
+                    if self.fsync == "batch" or (self.fsync == "interval" and
+                                                 time.monotonic() - self._synced >= self.fsync_interval):
+                        self._sync()
+                self.written += len(records)
+                self.batches += 1
+            except OSError as e:
+                self.errors += 1
+                print(f"Feedback write to {self.path} failed ({len(records)} record(s) lost): {e}")
+
+    # ── file handling (called with self._lock held) ──────────────
+
+    def _open(self) -> int:
+        """The append fd for the current file at self.path (reopened after another process rotated it)."""
+        if self._fd is not None:
+            try:
+                current = os.stat(self.path)
+                mine    = os.fstat(self._fd)
+                if (current.st_ino, current.st_dev) == (mine.st_ino, mine.st_dev):
+                    return self._fd
+            except FileNotFoundError:
+                pass
+            self._close_fd()
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        return self._fd
+
+    def _rotate(self) -> int:
+        self._sync()
+        stamp = datetime.now().strftime("%Y%m%dT%H%M%S.%f")
+        os.rename(self.path, f"{self.path}.{stamp}")
+        self.rotations += 1
+        self._close_fd()
+        return self._open()
+
+    def _sync(self):
+        if self._fd is not None and self._dirty:
+            os.fsync(self._fd)
+            self.fsyncs += 1
+        self._dirty  = False
+        self._synced = time.monotonic()
+
+    def _close_fd(self):
+        if self._fd is not None:
+            if self._dirty:
+                self._sync()
+            os.close(self._fd)
+            self._fd = None
+
+    def _file_lock(self):
+        return FileLock(self.path + ".lock")
+
+    # ── shutdown / introspection ─────────────────────────────────
+
+    def flush(self):
+        """Write everything queued so far, in the caller's thread, and fsync it."""
+        records = []
+        while True:
+            try:
+                record = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if record is not None:
+                records.append(record)
+        for i in range(0, len(records), self.max_batch):
+            self._commit(records[i:i + self.max_batch])
+        with self._lock:
+            try:
+                self._sync()
+            except OSError as e:
+                print(f"Feedback fsync of {self.path} failed: {e}")
+
+    def close(self):
+        """Stop the writer thread after it commits what it holds, then flush the rest."""
+        if self._pid != os.getpid():
+            return
+        self._stopping = True
+        try:
+            self._queue.put(None, timeout=1.0)
+        except queue.Full:
+            pass
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+        self.flush()
+        with self._lock:
+            self._close_fd()
+
+    def stats(self) -> dict:
+        return {
+            "path":        self.path,
+            "fsync":       self.fsync,
+            "queue_depth": self._queue.qsize(),
+            "max_queue":   self.max_queue,
+            "queued":      self.queued,
+            "written":     self.written,
+            "batches":     self.batches,
+            "avg_batch":   round(self.written / self.batches, 2) if self.batches else 0.0,
+            "fsyncs":      self.fsyncs,
+            "rotations":   self.rotations,
+            "sync_writes": self.sync_writes,
+            "errors":      self.errors,
+        }
+
+
+class FileLock:
+    """Exclusive flock on a side file that is never rotated (no-op where fcntl is missing)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.fd   = None
+
+    def __enter__(self):
+        if fcntl is not None:
+            self.fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            fcntl.flock(self.fd, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if self.fd is not None:
+            fcntl.flock(self.fd, fcntl.LOCK_UN)
+            os.close(self.fd)
+            self.fd = None
@@ -0,0 +1,220 @@
+"""
+feedback_store.py
+- Deduplicated, indexed copy of the feedback log for training (feedback.db)
+- One row per distinct message text, keyed by its sha256: the latest label,
+  spam / ham vote counts and first / last label times, so millions of
+  repeated clicks cost one row
+- Conflicting labels are resolved at read time, either "last" (the most
+  recent label wins) or "majority" (most votes, ties go to the latest)
+- Imports user_data.jsonl (and its rotated segments) incrementally: a
+  checkpoint in the database remembers the byte position, and each batch of
+  lines is committed together with it, so an interrupted import resumes
+  without counting anything twice
+- Indexes on last-label time and on a change sequence number support
+  time-range queries and "what changed since" queries
+- examples() streams (text, label) rows in chunks; memory stays flat however
+  large the store grows
+- SQLite in WAL mode, like stats.py: readers never block the importer
+- feedback.db, not the log, is what train.py learns from: once a line is
+  imported, truncating or deleting user_data.jsonl does not take it back.
+  forget() / purge() remove rows (python train.py --forget-feedback /
+  --purge-feedback); the import position is kept, so those lines are not
+  read again. Deleting feedback.db rebuilds it from whatever the log holds
+"""
+
+import json
+import sqlite3
+import hashlib
+from time import time
+
+from feedback import read_log, parse_record, FileLock
+
+POLICIES     = ("last", "majority")
+IMPORT_BATCH = 5000   # log lines per transaction
+FETCH_CHUNK  = 2000   # rows per fetch when streaming
+
+# label chosen per row under each policy
+_LABEL_SQL = {
+    "last":     "label",
+    "majority": "CASE WHEN spam > ham THEN 1 WHEN ham > spam THEN 0 ELSE label END",
+}
+
+# one more observation of a text: the newest label wins, votes accumulate
+_UPSERT = """
+    INSERT INTO feedback (hash, text, label, spam, ham, first_ts, last_ts, seq)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(hash) DO UPDATE SET
+        label    = CASE WHEN excluded.last_ts >= feedback.last_ts THEN excluded.label ELSE feedback.label END,
+        spam     = feedback.spam + excluded.spam,
+        ham      = feedback.ham + excluded.ham,
+        first_ts = MIN(feedback.first_ts, excluded.first_ts),
+        last_ts  = MAX(feedback.last_ts, excluded.last_ts),
+        seq      = excluded.seq
+"""
+
+
+def text_hash(text: str) -> bytes:
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+
+class FeedbackStore:
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.conn    = sqlite3.connect(db_path, timeout=30.0)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            self.conn.execute("""CREATE TABLE IF NOT EXISTS feedback (
+                hash BLOB PRIMARY KEY, text TEXT NOT NULL, label INTEGER NOT NULL,
+                spam INTEGER NOT NULL, ham INTEGER NOT NULL,
+                first_ts REAL NOT NULL, last_ts REAL NOT NULL, seq INTEGER NOT NULL)""")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS feedback_last_ts ON feedback (last_ts)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS feedback_seq ON feedback (seq)")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+
+    def close(self):
+        self.conn.close()
+
+    # ── meta ─────────────────────────────────────────────────────
+
+    def _get_meta(self, key: str, default=None):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def _set_meta(self, key: str, value):
+        self.conn.execute("INSERT INTO meta (key, value) VALUES (?, ?) "
+                          "ON CONFLICT(key) DO UPDATE SET value = excluded.value", (key, json.dumps(value)))
+
+    @property
+    def seq(self) -> int:
+        """Change sequence number of the latest write; pass it to examples(after_seq=...) later."""
+        return self._get_meta("seq", 0)
+
+    # ── import ───────────────────────────────────────────────────
+
+    def import_log(self, path: str, batch: int = IMPORT_BATCH) -> dict:
+        """
+        Add every log line written since the last import of `path`.
+        Lines without a timestamp inherit the previous line's (the log is
+        append-only, so file order is time order). Repeats of a text within a
+        batch are merged in memory first, so each costs one upsert per batch.
+        Returns counts.
+        """
+        # one importer at a time, or two runs would both count the same lines
+        with FileLock(self.db_path + ".lock"):
+            return self._import(path, batch)
+
+    def _import(self, path: str, batch: int) -> dict:
+        key      = f"import:{path}"
+        state    = self._get_meta(key, {"position": None, "ts": 0.0})
+        position = state["position"]
+        last_ts  = state["ts"]
+        seq      = self.seq
+        counts   = {"lines": 0, "records": 0, "new": 0}
+        before   = self.count()
+
+        pending = {}   # hash -> [text, label, spam, ham, first_ts, last_ts, seq], merged per batch
+        for line, position in read_log(path, position):
+            counts["lines"] += 1
+            record = parse_record(line)
+            if record is not None:
+                text, label, ts = record
+                last_ts = ts if ts is not None else last_ts
+                seq    += 1
+                counts["records"] += 1
+                h   = text_hash(text)
+                row = pending.get(h)
+                if row is None:
+                    pending[h] = [text, label, label, 1 - label, last_ts, last_ts, seq]
+                else:
+                    if last_ts >= row[5]:
+                        row[1], row[5] = label, last_ts
+                    row[2] += label
+                    row[3] += 1 - label
+                    row[4]  = min(row[4], last_ts)
+                    row[6]  = seq
+            if counts["lines"] % batch == 0:
+                self._write(pending, key, position, last_ts, seq)
+                pending = {}
+        if pending or position != state["position"]:
+            self._write(pending, key, position, last_ts, seq)
+
+        counts["new"] = self.count() - before
+        return counts
+
+    def _write(self, pending: dict, key: str, position, last_ts: float, seq: int):
+        # the rows and the position after them commit together
+        with self.conn:
+            self.conn.executemany(_UPSERT, ((h, *row) for h, row in pending.items()))
+            self._set_meta(key, {"position": position, "ts": last_ts})
+            self._set_meta("seq", seq)
+
+    def add(self, text: str, label: int, ts: float = None):
+        """Record one label directly (the same upsert the import uses)."""
+        ts  = time() if ts is None else ts
+        with self.conn:
+            seq = self.seq + 1
+            self.conn.execute(_UPSERT, (text_hash(text), text, int(label), int(label), 1 - int(label),
+                                        ts, ts, seq))
+            self._set_meta("seq", seq)
+
+    # ── removal ──────────────────────────────────────────────────
+
+    def forget(self, texts) -> int:
+        """Delete the rows of these texts (stripped, as the import stores them). Returns rows deleted."""
+        hashes = [(text_hash(str(t).strip()),) for t in texts]
+        with FileLock(self.db_path + ".lock"), self.conn:
+            before = self.conn.total_changes
+            self.conn.executemany("DELETE FROM feedback WHERE hash = ?", hashes)
+            return self.conn.total_changes - before
+
+    def purge(self, since: float = None, until: float = None) -> int:
+        """Delete every row, or those whose latest label falls in [since, until). Returns rows deleted."""
+        where, args = self._where(since, until, None)
+        with FileLock(self.db_path + ".lock"), self.conn:
+            return self.conn.execute(f"DELETE FROM feedback{where}", args).rowcount
+
+    # ── queries ──────────────────────────────────────────────────
+
+    @staticmethod
+    def _where(since, until, after_seq):
+        clauses, args = [], []
+        if since is not None:
+            clauses.append("last_ts >= ?"); args.append(since)
+        if until is not None:
+            clauses.append("last_ts < ?");  args.append(until)
+        if after_seq is not None:
+            clauses.append("seq > ?");      args.append(after_seq)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), args
+
+    def examples(self, policy: str = "last", since: float = None, until: float = None,
+                 after_seq: int = None, chunk: int = FETCH_CHUNK):
+        """
+        Yields (text, label) for every distinct text, oldest label first
+        (rowid breaks ties, so the order is the same on every pass).
+        since / until bound the time of the latest label (epoch seconds);
+        after_seq keeps only texts labeled after that store.seq.
+        """
+        if policy not in POLICIES:
+            raise ValueError(f"policy must be one of {POLICIES}, got {policy!r}")
+        where, args = self._where(since, until, after_seq)
+        order = "seq, rowid" if after_seq is not None else "last_ts, rowid"
+        cursor = self.conn.execute(f"SELECT text, {_LABEL_SQL[policy]} FROM feedback{where} "
+                                   f"ORDER BY {order}", args)
+        while True:
+            rows = cursor.fetchmany(chunk)
+            if not rows:
+                return
+            yield from rows
+
+    def count(self, since: float = None, until: float = None, after_seq: int = None) -> int:
+        where, args = self._where(since, until, after_seq)
+        return self.conn.execute(f"SELECT COUNT(*) FROM feedback{where}", args).fetchone()[0]
+
+    def stats(self) -> dict:
+        texts, labels, conflicts = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(spam + ham), 0), "
+            "COALESCE(SUM(spam > 0 AND ham > 0), 0) FROM feedback").fetchone()
+        return {"texts": texts, "labels": labels, "duplicates": labels - texts,
+                "conflicting": conflicts, "seq": self.seq}
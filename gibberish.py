@@ -0,0 +1,116 @@
+"""
+gibberish.py
+- The keyboard-smash rule that runs before every prediction:
+  a word is gibberish if it has 3+ ASCII letters and under 20% of them are
+  vowels; a message (5+ chars) is gibberish if at least half its words are
+- Table-driven: one bytes.translate() maps every character to a class
+  (vowel / consonant / space) and drops the rest, so the per-word work is a
+  len() and a count() in C instead of a re.sub + Python generator
+- Exits as soon as the verdict is decided either way
+- gibberish_flags() does whole batches with NumPy over one concatenated buffer
+- Verdicts are identical to the original per-word regex rule
+"""
+
+import numpy as np
+
+BATCH_MIN = 32   # below this, per-message calls beat the NumPy setup cost
+
+_VOWEL     = ord("v")
+_CONSONANT = ord("c")
+_SEP       = ord("|")   # message separator in the batch buffer (never a class byte)
+
+# ASCII characters str.split() treats as whitespace (includes \x1c-\x1f, which bytes.split() does not)
+_ASCII_SPACE = bytes(b for b in range(128) if chr(b).isspace())
+_LETTERS     = bytes(range(ord("A"), ord("Z") + 1)) + bytes(range(ord("a"), ord("z") + 1))
+
+
+def _class_table():
+    table = bytearray(range(256))
+    for b in range(256):
+        if b in b"aeiouAEIOU":
+            table[b] = _VOWEL
+        elif b in _LETTERS:
+            table[b] = _CONSONANT
+        elif b in _ASCII_SPACE:
+            table[b] = ord(" ")
+    return bytes(table)
+
+
+CLASS_TABLE = _class_table()
+DELETE      = bytes(b for b in range(256) if b not in _LETTERS and b not in _ASCII_SPACE)
+
+
+class _NonAsciiTable(dict):
+    """str.translate table: non-ASCII whitespace -> " ", other non-ASCII -> deleted, ASCII kept."""
+
+    def __missing__(self, cp: int):
+        value = self[cp] = cp if cp < 128 else (" " if chr(cp).isspace() else None)
+        return value
+
+
+_NON_ASCII = _NonAsciiTable()
+
+
+def _classes(t: str) -> bytes:
+    """Letters as b"v"/b"c", words separated by spaces, everything else gone."""
+    if not t.isascii():
+        t = t.translate(_NON_ASCII)
+    return t.encode("ascii").translate(CLASS_TABLE, DELETE)
+
+
+def looks_like_gibberish(text: str) -> bool:
+    t = text.strip()
+    if len(t) < 5:
+        return False
+
+    # words with no letters never count as gibberish, but still count as words
+    need  = (len(t.split()) + 1) // 2   # gibberish words needed to flag it
+    words = _classes(t).split()
+    left  = len(words)
+    if left < need:
+        return False
+
+    gibberish_words = 0
+    for word in words:
+        left -= 1
+        letters = len(word)
+        if letters >= 3 and 5 * word.count(b"v") < letters:   # vowel ratio < 0.20
+            gibberish_words += 1
+            if gibberish_words >= need:
+                return True
+        elif gibberish_words + left < need:
+            return False
+    return False
+
+
+def gibberish_flags(texts) -> list:
+    """looks_like_gibberish() for a whole batch; list of bools in input order."""
+    if len(texts) < BATCH_MIN:
+        return [looks_like_gibberish(t) for t in texts]
+
+    flags = np.zeros(len(texts), dtype=bool)
+    rows, bufs, n_words = [], [], []
+    for i, text in enumerate(texts):
+        t = text.strip()
+        if len(t) >= 5:
+            rows.append(i)
+            n_words.append(len(t.split()))
+            bufs.append(_classes(t))
+    if not rows:
+        return flags.tolist()
+
+    # every letter run in the joined buffer is one word; "|" marks message boundaries
+    buf    = np.frombuffer(b"|" + b"|".join(bufs) + b"|", dtype=np.uint8)
+    letter = (buf == _VOWEL) | (buf == _CONSONANT)
+    edges  = np.flatnonzero(letter[1:] != letter[:-1]) + 1
+    starts, ends = edges[0::2], edges[1::2]
+
+    vowels_before = np.concatenate(([0], np.cumsum(buf == _VOWEL)))
+    letters   = ends - starts
+    vowels    = vowels_before[ends] - vowels_before[starts]
+    gibberish = (letters >= 3) & (5 * vowels < letters)
+
+    message = np.cumsum(buf == _SEP)[starts] - 1
+    counts  = np.bincount(message[gibberish], minlength=len(bufs))
+    flags[rows] = 2 * counts >= np.asarray(n_words)
+    return flags.tolist()
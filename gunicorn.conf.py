@@ -0,0 +1,36 @@
+"""
+gunicorn.conf.py
+- Production serving:  gunicorn -c gunicorn.conf.py app:app
+- preload_app: app.py and the model are loaded once, in the master; forked
+  workers share those pages copy-on-write instead of each loading its own
+- when_ready (master, before the first fork): app.before_fork() waits for
+  the campaign seeder, app.warmup() runs every request path once and prints
+  boot timings, then gc.freeze() moves everything loaded so far out of the
+  collector's reach, so collections in the workers do not write to (and
+  un-share) those pages
+- post_fork: fresh locks for the shared objects, and restarts the
+  per-process threads fork() does not carry over
+- LOGIFY_BIND, LOGIFY_WORKERS, LOGIFY_THREADS; every other LOGIFY_* setting
+  is read by app.py as usual
+"""
+
+import gc
+import os
+
+bind        = os.environ.get("LOGIFY_BIND", "127.0.0.1:5000")
+workers     = int(os.environ.get("LOGIFY_WORKERS", str(os.cpu_count() or 1)))
+threads     = int(os.environ.get("LOGIFY_THREADS", "4"))
+preload_app = True
+
+
+def when_ready(server):
+    import app
+    app.before_fork()
+    if app.WARMUP:
+        app.warmup()
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    import app
+    app.after_fork()
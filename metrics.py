@@ -0,0 +1,342 @@
+"""
+metrics.py
+- Hot-path latency instrumentation for the web app
+- Fixed log-spaced bucket histograms (1µs .. ~45s, 2 buckets per doubling):
+  observe() appends to a buffer, no lock; the buffer is binned in one NumPy
+  pass every FLUSH_EVERY values, or by the reader
+- p50 / p95 / p99 are estimated from the buckets at read time
+- Everything lives in one module-level REGISTRY so predictor.py, app.py, ...
+  can all record into it without passing objects around
+- Exposed as Prometheus text (GET /metrics) and, per request, as a
+  Server-Timing header built from the stages that request went through
+"""
+
+import os
+import math
+import threading
+from collections import deque
+from time import perf_counter
+
+import numpy as np
+
+# upper bounds in seconds: 1µs * sqrt(2)^k
+BUCKETS     = tuple(1e-6 * 2 ** (k / 2) for k in range(52))
+QUANTILES   = (0.5, 0.95, 0.99)
+FLUSH_EVERY = 256   # observations a histogram buffers before binning them
+
+_BOUNDS = np.array(BUCKETS)
+
+
+class _Local(threading.local):
+    # class-level defaults: a missing attribute on a plain threading.local
+    # costs an AttributeError, which would dominate inc()
+    shard = None
+    trace = None
+
+
+_request = _Local()   # .trace = {stage: seconds} while a request is being traced
+_tracing = False      # set once a RequestTimer with server_timing=True exists
+
+
+class _Sharded:
+    """Per-thread lists of numbers; shards of finished threads are folded into _retired."""
+
+    def __init__(self, width: int):
+        self.width    = width
+        self._local   = _Local()
+        self._shards  = []
+        self._retired = [0] * width
+        self._reg     = threading.Lock()
+
+    def _new_shard(self):
+        shard = self._local.shard = [0] * self.width
+        with self._reg:
+            self._shards.append((threading.current_thread(), shard))
+        return shard
+
+    def totals(self):
+        with self._reg:
+            live = []
+            for thread, shard in self._shards:
+                if thread.is_alive():
+                    live.append((thread, shard))
+                else:
+                    self._retired = [a + b for a, b in zip(self._retired, shard)]
+            self._shards = live
+            totals = list(self._retired)
+            for _, shard in live:
+                totals = [a + b for a, b in zip(totals, shard)]
+        return totals
+
+
+def _binned(counts, values):
+    """counts (bucket counts, +Inf, sum) with values added."""
+    if not values:
+        return counts
+    values = np.array(values, dtype=np.float64)
+    added  = np.bincount(np.searchsorted(_BOUNDS, values), minlength=len(BUCKETS) + 1)
+    return [c + int(a) for c, a in zip(counts, added.tolist())] + [counts[-1] + float(values.sum())]
+
+
+class Histogram:
+    """
+    A bisect per observe() cost more than the rest of the request's
+    instrumentation, so values are buffered and binned in bulk. The buffer
+    is one deque shared by all threads: its appends and pops are
+    thread-safe, so observe() takes no lock and no per-thread lookup. Only
+    the binning, every FLUSH_EVERY values or on read, takes _reg.
+    """
+
+    def __init__(self, name: str, enabled: bool = True):
+        self.name     = name
+        self.enabled  = enabled
+        self._pending = deque()
+        self._counts  = [0] * (len(BUCKETS) + 2)   # bucket counts, +Inf, sum
+        self._reg     = threading.Lock()
+
+    def observe(self, seconds: float):
+        if not self.enabled:
+            return
+        pending = self._pending
+        pending.append(seconds)
+        if len(pending) >= FLUSH_EVERY:
+            self._flush()
+        if _tracing:
+            trace = _request.trace
+            if trace is not None:
+                trace[self.name] = trace.get(self.name, 0.0) + seconds
+
+    def _flush(self):
+        with self._reg:
+            pending = self._pending
+            # only flushes pop, under _reg; appends made meanwhile wait for the next one
+            values  = [pending.popleft() for _ in range(len(pending))]
+            self._counts = _binned(self._counts, values)
+
+    def totals(self):
+        self._flush()
+        return list(self._counts)
+
+    def snapshot(self) -> dict:
+        totals = self.totals()
+        counts, total = totals[:-1], totals[-1]
+        return {"counts": counts, "count": sum(counts), "sum": total,
+                **{f"p{int(q * 100)}": quantile(counts, q) for q in QUANTILES}}
+
+
+class Counter(_Sharded):
+
+    def __init__(self, enabled: bool = True):
+        super().__init__(1)
+        self.enabled = enabled
+
+    def inc(self, n: int = 1):
+        if self.enabled:
+            (self._local.shard or self._new_shard())[0] += n
+
+    @property
+    def value(self):
+        return self.totals()[0]
+
+
+def quantile(counts, q: float):
+    """Estimate a quantile from bucket counts (log-linear inside the bucket); None if empty."""
+    total = sum(counts)
+    if not total:
+        return None
+    rank, seen = q * total, 0
+    for i, c in enumerate(counts):
+        if c and seen + c >= rank:
+            if i >= len(BUCKETS):
+                return BUCKETS[-1]
+            lo = BUCKETS[i - 1] if i else BUCKETS[0] / math.sqrt(2)
+            return lo * (BUCKETS[i] / lo) ** ((rank - seen) / c)
+        seen += c
+    return BUCKETS[-1]
+
+
+class Registry:
+    """
+    Named histogram / counter families, each keyed by one label value,
+    plus gauges read from callbacks at scrape time.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled    = enabled
+        self._families  = {}   # name -> (kind, help, label, {label value: metric})
+        self._gauges    = []   # (name, help, kind, fn -> number or {labels tuple: number})
+        self._lock      = threading.Lock()
+
+    def _get(self, kind: str, name: str, help: str, label: str, value: str, make):
+        family = self._families.get(name)
+        if family is None:
+            with self._lock:
+                family = self._families.setdefault(name, (kind, help, label, {}))
+        metric = family[3].get(value)
+        if metric is None:
+            with self._lock:
+                metric = family[3].setdefault(value, make())
+        return metric
+
+    def histogram(self, name: str, help: str, label: str, value: str) -> Histogram:
+        return self._get("histogram", name, help, label, value,
+                         lambda: Histogram(value, self.enabled))
+
+    def counter(self, name: str, help: str, label: str, value: str) -> Counter:
+        return self._get("counter", name, help, label, value, lambda: Counter(self.enabled))
+
+    def gauge(self, name: str, help: str, fn, kind: str = "gauge"):
+        """fn() -> number, or {((label, value), ...): number}. kind may be "counter"."""
+        self._gauges.append((name, help, kind, fn))
+
+    def after_fork(self):
+        """New locks in a forked child: one a parent thread held at fork() would never be released."""
+        self._lock = threading.Lock()
+        for _, _, _, metrics in list(self._families.values()):
+            for metric in list(metrics.values()):
+                metric._reg = threading.Lock()
+
+    # ── reading ──────────────────────────────────────────────────
+
+    def summary(self) -> dict:
+        """{histogram family: {label value: {count, sum, p50, p95, p99}}} for JSON views."""
+        out = {}
+        for name, (kind, _, _, metrics) in list(self._families.items()):
+            if kind != "histogram":
+                continue
+            out[name] = {}
+            for value, h in sorted(metrics.items()):
+                snap = h.snapshot()
+                del snap["counts"]
+                out[name][value] = snap
+        return out
+
+    def prometheus(self) -> str:
+        lines = []
+        for name, (kind, help, label, metrics) in list(self._families.items()):
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for value, m in sorted(metrics.items()):
+                lv = f'{label}="{_escape(value)}"'
+                if kind == "counter":
+                    lines.append(f"{name}{{{lv}}} {m.value}")
+                    continue
+                snap, cumulative = m.snapshot(), 0
+                for bound, c in zip(BUCKETS, snap["counts"]):
+                    cumulative += c
+                    lines.append(f'{name}_bucket{{{lv},le="{bound:.9g}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{{lv},le="+Inf"}} {snap["count"]}')
+                lines.append(f"{name}_sum{{{lv}}} {snap['sum']:.9g}")
+                lines.append(f"{name}_count{{{lv}}} {snap['count']}")
+
+            if kind == "histogram":   # precomputed quantiles, for dashboards without histogram_quantile()
+                qname = f"{name}_quantile"
+                lines.append(f"# HELP {qname} {help} (estimated quantiles)")
+                lines.append(f"# TYPE {qname} gauge")
+                for value, m in sorted(metrics.items()):
+                    snap = m.snapshot()
+                    for q in QUANTILES:
+                        est = snap[f"p{int(q * 100)}"]
+                        if est is not None:
+                            lines.append(f'{qname}{{{label}="{_escape(value)}",quantile="{q}"}} {est:.9g}')
+
+        for name, help, kind, fn in self._gauges:
+            try:
+                value = fn()
+            except Exception as e:
+                print(f"metrics: gauge {name} failed: {e}")
+                continue
+            if value is None:
+                continue
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            if isinstance(value, dict):
+                for labels, v in value.items():
+                    lv = ",".join(f'{k}="{_escape(str(x))}"' for k, x in labels)
+                    lines.append(f"{name}{{{lv}}} {v}")
+            else:
+                lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# ── per-request timing (WSGI middleware) ─────────────────────────
+
+class RequestTimer:
+    """
+    Wraps a WSGI app: request latency per endpoint (its _count is the request
+    count), non-2xx responses per status, and (server_timing=True) a
+    Server-Timing header with the request's stages.
+    Plain WSGI rather than Flask before/after_request hooks, which cost
+    several times more than the timing itself.
+    """
+
+    def __init__(self, wsgi_app, registry, endpoints: dict, server_timing: bool = False):
+        """endpoints: {path: endpoint name}; any other path is counted as "other"."""
+        self.wsgi_app      = wsgi_app
+        self.registry      = registry
+        self.server_timing = server_timing
+        self.latency       = {path: self._histogram(name) for path, name in endpoints.items()}
+        self.other         = self._histogram("other")
+        self.errors        = {}
+        if server_timing:
+            global _tracing
+            _tracing = True
+
+    def _histogram(self, endpoint: str) -> Histogram:
+        return self.registry.histogram("logify_request_seconds", "Request latency per endpoint",
+                                       "endpoint", endpoint)
+
+    def _error(self, code: str) -> Counter:
+        counter = self.errors.get(code)
+        if counter is None:
+            counter = self.errors[code] = self.registry.counter(
+                "logify_error_responses_total", "Non-2xx responses per status code", "status", code)
+        return counter
+
+    def __call__(self, environ, start_response):
+        started = perf_counter()
+        latency = self.latency.get(environ.get("PATH_INFO"), self.other)
+        if self.server_timing:
+            start_trace()
+
+        def timed_start_response(status, headers, exc_info=None):
+            elapsed = perf_counter() - started
+            if self.server_timing:
+                trace = end_trace()
+                trace["total"] = elapsed
+                headers.append(("Server-Timing", server_timing(trace)))
+            latency.observe(elapsed)
+            if status[0] != "2":
+                self._error(status[:3]).inc()
+            return start_response(status, headers, exc_info)
+
+        return self.wsgi_app(environ, timed_start_response)
+
+
+# ── per-request tracing (Server-Timing) ──────────────────────────
+
+def start_trace():
+    _request.trace = {}
+
+
+def end_trace() -> dict:
+    trace, _request.trace = _request.trace, None
+    return trace or {}
+
+
+def server_timing(trace: dict) -> str:
+    return ", ".join(f"{stage};dur={seconds * 1000:.3f}" for stage, seconds in trace.items())
+
+
+# ── the process-wide registry and the scoring stages ─────────────
+
+REGISTRY = Registry(enabled=os.environ.get("LOGIFY_METRICS", "1") != "0")
+
+
+def stage(name: str) -> Histogram:
+    return REGISTRY.histogram("logify_stage_seconds", "Time spent per processing stage",
+                              "stage", name)
@@ -0,0 +1,135 @@
+"""
+online.py
+- Incremental learning from the feedback log, without a full retrain
+- Model: HashingVectorizer + SGDClassifier (logistic loss). Hashing needs no
+  vocabulary fit and SGD supports partial_fit, so new feedback is folded into
+  the existing weights in seconds
+- Fed from feedback.db (see feedback_store.py), not the raw log: each run
+  imports new user_data.jsonl lines into the store, then trains on the texts
+  labeled since the checkpoint's store seq. A text clicked a thousand times
+  is one example, with its conflicts resolved by the feedback policy
+- The checkpoint is that seq. Checkpoints from before the store (a log byte
+  position) are refused; `python train.py --online` starts a new one
+- A held-out set (the full retrain's test split, plus a fixed hash-chosen
+  slice of the feedback) is never trained on; accuracy on it is reported
+  before and after every update
+- State lives in online_model/: model.pkl, checkpoint.json, holdout.tsv,
+  and the published serving artifact in online_model/artifact/
+- train.py drives it: `python train.py --online` bootstraps this model
+  alongside a full retrain, and `python train.py --incremental` runs an update
+- The checkpoint also records how many rows holdout.tsv had when it was
+  written; a run that died before saving its checkpoint leaves extra rows
+  behind, and the next run drops them before adding its own
+"""
+
+import os
+import json
+import zlib
+from itertools import islice
+from datetime import datetime
+
+import numpy as np
+from sklearn.pipeline import Pipeline
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import SGDClassifier
+
+ONLINE_DIR      = "online_model"
+ONLINE_MODEL    = os.path.join(ONLINE_DIR, "model.pkl")
+ONLINE_ARTIFACT = os.path.join(ONLINE_DIR, "artifact")
+CHECKPOINT_FILE = os.path.join(ONLINE_DIR, "checkpoint.json")
+HOLDOUT_FILE    = os.path.join(ONLINE_DIR, "holdout.tsv")
+
+N_FEATURES     = 2 ** 20
+UPDATE_EPOCHS  = 5    # shuffled partial_fit passes over each batch of new feedback
+HOLDOUT_MODULO = 10   # 1 in 10 feedback texts (by crc32, so stable) is held out
+
+
+def build_model():
+    return Pipeline([
+        ("hash", HashingVectorizer(lowercase=True, stop_words="english",
+                                   n_features=N_FEATURES, alternate_sign=False)),
+        ("clf",  SGDClassifier(loss="log_loss", alpha=1e-5, max_iter=50, tol=1e-4, random_state=0)),
+    ])
+
+
+def partial_update(model, texts, labels, epochs: int = UPDATE_EPOCHS, seed: int = 0):
+    """Fold a batch of labeled texts into the model's current weights."""
+    X   = model.named_steps["hash"].transform(texts)   # stateless: no fit needed
+    y   = np.asarray(labels)
+    rng = np.random.default_rng(seed)
+    for _ in range(epochs):
+        order = rng.permutation(len(y))
+        model.named_steps["clf"].partial_fit(X[order], y[order], classes=[0, 1])
+    return model
+
+
+def accuracy(model, texts, labels):
+    if not texts:
+        return None
+    return float(np.mean(model.predict(texts) == np.asarray(labels)))
+
+
+def is_holdout(text: str) -> bool:
+    return zlib.crc32(text.encode("utf-8")) % HOLDOUT_MODULO == 0
+
+
+# ── reading the store from a checkpoint ──────────────────────────
+
+def read_new_examples(store, after_seq: int, policy: str = "last"):
+    """(texts, labels, seq) of every text labeled in `store` after `after_seq`, by seq."""
+    seq = store.seq   # taken first: a label added meanwhile is read again next run, never skipped
+    texts, labels = [], []
+    for text, label in store.examples(policy, after_seq=after_seq):
+        texts.append(text)
+        labels.append(label)
+    return texts, labels, seq
+
+
+# ── persisted state ──────────────────────────────────────────────
+
+def load_checkpoint():
+    try:
+        with open(CHECKPOINT_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def save_checkpoint(seq: int, records: int, holdout_accuracy, model_version: str, holdout_rows: int):
+    checkpoint = {
+        "seq":              seq,
+        "records":          records,
+        "holdout_accuracy": holdout_accuracy,
+        "model_version":    model_version,
+        "holdout_rows":     holdout_rows,
+        "updated":          datetime.now().isoformat(timespec="seconds"),
+    }
+    _write_atomic(CHECKPOINT_FILE, json.dumps(checkpoint, indent=2))
+    return checkpoint
+
+
+def load_holdout(limit: int = None):
+    """(texts, labels) of holdout.tsv; only the first `limit` rows if given."""
+    texts, labels = [], []
+    try:
+        with open(HOLDOUT_FILE, "r", encoding="utf-8") as f:
+            for line in islice(f, limit):
+                label, _, text = line.rstrip("\n").partition("\t")
+                texts.append(text)
+                labels.append(int(label))
+    except FileNotFoundError:
+        pass
+    return texts, labels
+
+
+def save_holdout(texts, labels):
+    rows = "".join(f"{int(y)}\t{' '.join(str(t).split())}\n" for t, y in zip(texts, labels))
+    _write_atomic(HOLDOUT_FILE, rows)
+
+
+def _write_atomic(path: str, data: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp-{os.getpid()}"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(data)
+    os.replace(tmp, path)
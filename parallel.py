@@ -0,0 +1,72 @@
+"""
+parallel.py
+- Chunked multi-threaded execution of Predictor.score_messages() for large
+  batches (/predict/batch bursts, score.py chunks)
+- A batch's rows are split into chunks of chunk_size; each chunk runs the
+  compiled scorer's batch pass (analyze_batch) and top-word extraction on a
+  pool thread and writes its verdicts straight into the caller's result
+  list, so nothing is concatenated or copied afterwards
+- Only the NumPy / SciPy kernels (the batch pass's array arithmetic,
+  argpartition) release the GIL; tokenization is Python and runs one thread
+  at a time, so scaling is bounded by the kernels' share of the work
+  (measure it with `python bench.py --only scaling`)
+- Batches smaller than two chunks run in the calling thread: no handoff cost
+- The pool is started lazily per process (threads do not survive fork())
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ScoringPool:
+
+    def __init__(self, workers: int = 4, chunk_size: int = 1000):
+        if workers < 1 or chunk_size < 1:
+            raise ValueError("workers and chunk_size must be >= 1")
+        self.workers    = workers
+        self.chunk_size = chunk_size
+
+        self._executor = None
+        self._pid      = None
+        self._lock     = threading.Lock()
+
+        self.batches = 0   # batches split across the pool
+        self.chunks  = 0
+        self.inline  = 0   # batches too small to split
+
+    def _ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="score")
+                self._pid      = os.getpid()
+
+    def run(self, fn, rows: list):
+        """
+        fn(chunk_of_rows) for consecutive chunks of `rows`, spread over the
+        pool; returns when every chunk is done (re-raising the first error).
+        fn writes its own results, so the order of completion does not matter.
+        """
+        if self.workers == 1 or len(rows) < 2 * self.chunk_size:
+            self.inline += 1
+            fn(rows)
+            return
+        self._ensure_started()
+        chunks  = [rows[i:i + self.chunk_size] for i in range(0, len(rows), self.chunk_size)]
+        futures = [self._executor.submit(fn, chunk) for chunk in chunks[1:]]
+        fn(chunks[0])   # the caller scores a chunk too instead of only waiting
+        for future in futures:
+            future.result()
+        self.batches += 1
+        self.chunks  += len(chunks)
+
+    def stats(self) -> dict:
+        return {"workers": self.workers, "chunk_size": self.chunk_size,
+                "batches": self.batches, "chunks": self.chunks, "inline": self.inline}
+
+    def close(self):
+        if self._executor is not None and self._pid == os.getpid():
+            self._executor.shutdown(wait=True)
+        self._executor, self._pid = None, None
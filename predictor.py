@@ -0,0 +1,232 @@
+"""
+predictor.py
+- Everything needed to turn messages into verdicts with one model.pkl
+- Shared by the web app (app.py) and the bulk scoring CLI (score.py)
+- Gibberish rule (gibberish.py), confidence labels, compiled scorer with Pipeline fallback,
+  top spam word explanations
+- Loads either model.pkl (sklearn Pipeline) or a memory-mapped artifact
+  directory exported by train.py (see artifact.py)
+- Works with the TF-IDF model and the incremental hashing model (online.py)
+"""
+
+import os
+import hashlib
+from time import perf_counter
+
+import numpy as np
+
+import metrics
+from artifact import load_artifact
+from gibberish import looks_like_gibberish, gibberish_flags
+from scorer import compile_pipeline, max_pipeline_diff, sigmoid
+
+SCORER_TOLERANCE = 1e-9  # max |P(spam)| drift allowed between compiled scorer and Pipeline
+
+# Below this many messages per chunk, looping over the compiled scorer beats its
+# one-pass analyze_batch(): the pass has ~25 µs of fixed NumPy cost and saves
+# ~3 µs a message. `python bench.py --only batch` measures the crossover.
+VECTORIZE_MIN = 16
+
+GIBBERISH_REASON = "Looks like random keyboard-smash (gibberish rule)."
+
+# stage timers (metrics.py); with the compiled scorer, "transform" includes the dot product
+T_GIBBERISH = metrics.stage("gibberish")
+T_TRANSFORM = metrics.stage("transform")
+T_PREDICT   = metrics.stage("predict_proba")
+T_TOP_WORDS = metrics.stage("top_words")
+
+
+def get_confidence_label(prob: float, pred: int) -> str:
+    if pred == 1:
+        if prob > 0.87:   return "Very likely spam"
+        elif prob > 0.65: return "Probably spam"
+        else:             return "Borderline"
+    else:
+        if prob < 0.15:   return "Definitely clean"
+        elif prob < 0.35: return "Looks clean"
+        else:             return "Borderline"
+
+
+def prediction_json(pred: int, prob: float, reason, spam_words):
+    return {
+        "label":            "SPAM" if pred == 1 else "NOT_SPAM",
+        "spam_probability": prob,
+        "confidence":       get_confidence_label(prob, pred),
+        "spam_words":       spam_words,
+        "reason":           reason,
+    }
+
+
+def model_file_version(path: str) -> str:
+    """Short content hash of the model file; part of every cache key."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()[:12]
+
+
+def model_watch_path(path: str) -> str:
+    """File whose change means a new model: model.pkl itself, or an artifact's header."""
+    return os.path.join(path, "header.json") if os.path.isdir(path) else path
+
+
+def load_scorer(pipeline):
+    """Compile the Pipeline for the hot path; None means fall back to predict_proba."""
+    try:
+        compiled = compile_pipeline(pipeline)
+    except ValueError as e:
+        print(f"Compiled scorer unavailable ({e}); using Pipeline.predict_proba")
+        return None
+    diff = max_pipeline_diff(compiled, pipeline)
+    if diff > SCORER_TOLERANCE:
+        print(f"Compiled scorer differs from Pipeline by {diff:.3g}; using Pipeline.predict_proba")
+        return None
+    return compiled
+
+
+class Predictor:
+    """
+    One loaded model: the sklearn Pipeline (None for an artifact), its compiled
+    scorer (None if it could not be compiled) and, for TF-IDF pipelines, the
+    explanation tables (column -> term, per-term coefficient), all built once.
+    Hashing pipelines cannot map a column back to a term, so they always score
+    through the compiled scorer.
+    Verdicts are (pred, prob_spam, reason, spam_words) tuples.
+    """
+
+    def __init__(self, pipeline, version: str, scorer=None):
+        self.pipeline = pipeline
+        self.version  = version
+        self.scorer   = scorer if scorer is not None else load_scorer(pipeline)
+        # the Pipeline's TF-IDF transform, for batches when there is no compiled scorer
+        self.batch_pipeline = pipeline if pipeline is not None and "tfidf" in pipeline.named_steps else None
+        if self.batch_pipeline is None and self.scorer is None:
+            raise ValueError("model has no TF-IDF step and no compiled scorer")
+        if self.batch_pipeline is not None:
+            self.feature_names = (self.scorer.terms if self.scorer is not None
+                                  else pipeline.named_steps["tfidf"].get_feature_names_out())
+            self.coefs         = pipeline.named_steps["clf"].coef_[0]
+
+    @classmethod
+    def load(cls, path: str, verify: bool = False):
+        """path is model.pkl or an artifact directory. verify=True checks the artifact's checksums."""
+        if os.path.isdir(path):
+            scorer, header = load_artifact(path, verify=verify)
+            return cls(None, header["model_version"], scorer)
+        import joblib
+        return cls(joblib.load(path), model_file_version(path))
+
+    def top_spam_words_from_row(self, tfidf_mat, row: int, top_n: int = 6):
+        """Top spam words for one row of an already-transformed batch (no second transform)."""
+        start, end = tfidf_mat.indptr[row], tfidf_mat.indptr[row + 1]
+        if start == end: return []
+        cols   = tfidf_mat.indices[start:end]
+        scores = tfidf_mat.data[start:end] * self.coefs[cols]
+        if len(scores) > top_n:
+            idx = np.argpartition(-scores, top_n - 1)[:top_n]
+        else:
+            idx = np.arange(len(scores))
+        idx = idx[np.argsort(-scores[idx], kind="stable")]
+        return [str(self.feature_names[cols[i]]) for i in idx if scores[i] > 0]
+
+    def get_top_spam_words(self, text: str, top_n: int = 6):
+        try:
+            if self.scorer is not None:
+                _, cols, contribs = self.scorer.analyze(text)
+                return self.scorer.top_terms(cols, contribs, top_n)
+            tfidf_mat = self.pipeline.named_steps["tfidf"].transform([text])
+            return self.top_spam_words_from_row(tfidf_mat, 0, top_n)
+        except Exception:
+            return []
+
+    def score_messages(self, texts, threshold: float = 0.50, pool=None):
+        """
+        Batch version of score_message(); results come back in input order.
+        Messages that pass the gibberish rule are scored in one sparse-matrix
+        pass of the compiled scorer (analyze_batch), or one by one below
+        VECTORIZE_MIN. Without a compiled scorer: one TF-IDF transform +
+        predict_proba through the Pipeline.
+        With a parallel.ScoringPool, large batches run as chunks on its threads.
+        """
+        results = [None] * len(texts)
+        pending = []
+        t0 = perf_counter()
+        for i, gibberish in enumerate(gibberish_flags(texts)):
+            if gibberish:
+                results[i] = (1, 0.99, GIBBERISH_REASON, [])
+            else:
+                pending.append(i)
+        T_GIBBERISH.observe(perf_counter() - t0)
+        if not pending:
+            return results
+
+        def score_rows(rows):
+            if self.scorer is None:
+                self._score_rows(texts, rows, threshold, results)
+            elif len(rows) >= VECTORIZE_MIN:
+                self._score_batch(texts, rows, threshold, results)
+            else:
+                for i in rows:
+                    results[i] = self._score_compiled(texts[i], threshold)
+
+        if pool is None:
+            score_rows(pending)
+        else:
+            pool.run(score_rows, pending)
+        return results
+
+    def _score_batch(self, texts, rows, threshold: float, results: list):
+        """Verdicts for texts[i], i in rows, written into results[i]: one analyze_batch() call."""
+        t1 = perf_counter()
+        scores, cols, contribs, offsets = self.scorer.analyze_batch([texts[i] for i in rows])
+        t2 = perf_counter()
+        top_terms = self.scorer.top_terms
+        for k, (i, score) in enumerate(zip(rows, scores.tolist())):
+            prob_spam = sigmoid(score)
+            if prob_spam >= threshold:
+                start, end = offsets[k], offsets[k + 1]
+                results[i] = (1, prob_spam, None, top_terms(cols[start:end], contribs[start:end]))
+            else:
+                results[i] = (0, prob_spam, None, [])
+        T_TRANSFORM.observe(t2 - t1)
+        T_TOP_WORDS.observe(perf_counter() - t2)
+
+    def _score_rows(self, texts, rows, threshold: float, results: list):
+        """Verdicts for texts[i], i in rows, written into results[i], through the Pipeline."""
+        t0 = perf_counter()
+        tfidf_mat = self.pipeline.named_steps["tfidf"].transform([texts[i] for i in rows])
+        t1 = perf_counter()
+        probs     = self.pipeline.named_steps["clf"].predict_proba(tfidf_mat)[:, 1]
+        t2 = perf_counter()
+
+        for row, i in enumerate(rows):
+            prob_spam  = float(probs[row])
+            pred       = 1 if prob_spam >= threshold else 0
+            spam_words = self.top_spam_words_from_row(tfidf_mat, row) if pred == 1 else []
+            results[i] = (pred, prob_spam, None, spam_words)
+        T_TRANSFORM.observe(t1 - t0)
+        T_PREDICT.observe(t2 - t1)
+        T_TOP_WORDS.observe(perf_counter() - t2)
+
+    def score_message(self, text: str, threshold: float = 0.50):
+        if self.scorer is None:
+            return self.score_messages([text], threshold)[0]
+        t0 = perf_counter()
+        gibberish = looks_like_gibberish(text)
+        T_GIBBERISH.observe(perf_counter() - t0)
+        if gibberish:
+            return 1, 0.99, GIBBERISH_REASON, []
+        return self._score_compiled(text, threshold)
+
+    def _score_compiled(self, text: str, threshold: float):
+        """score_message() after the gibberish rule, through the compiled scorer."""
+        t1 = perf_counter()
+        score, cols, contribs = self.scorer.analyze(text)
+        prob_spam  = sigmoid(score)
+        t2 = perf_counter()
+        pred       = 1 if prob_spam >= threshold else 0
+        spam_words = self.scorer.top_terms(cols, contribs) if pred == 1 else []
+        T_TRANSFORM.observe(t2 - t1)
+        T_TOP_WORDS.observe(perf_counter() - t2)
+        return pred, prob_spam, None, spam_words
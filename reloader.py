@@ -0,0 +1,179 @@
+"""
+reloader.py
+- Zero-downtime model reload for the web app
+- A ModelSlot holds the active Predictor; requests read it once and keep that
+  reference, so a swap never affects a request already in flight
+- ModelReloader loads the new model in the background, checks an artifact's
+  checksums, warms it, scores a canary set, and only then swaps it in (a
+  single reference assignment)
+- Triggered by watching the model file or explicitly (POST /admin/reload)
+- An explicit reload only runs in the process that received it; broadcast()
+  then touches a trigger file that every other process's watch thread polls,
+  so all of a server's worker processes load the same model
+"""
+
+import os
+import math
+import time
+import threading
+from datetime import datetime, timezone
+
+from cache import file_signature
+from predictor import Predictor, model_watch_path
+
+# (text, expected label) — a new model must get most of these right to go live
+CANARY_SET = [
+    ("URGENT! You have WON a FREE prize worth $1000. Click the link NOW to claim!", 1),
+    ("Congratulations! You have won a free cash prize. Txt CLAIM to 80082 now", 1),
+    ("FREE entry to win a mobile offer. Text WIN to 87121, reply STOP to end", 1),
+    ("Hey, are we still on for lunch at 1pm today?", 0),
+    ("Sorry I'll call you later, I'm in a meeting", 0),
+    ("Ok see you at home tonight, love you", 0),
+]
+
+
+class ModelSlot:
+    """The active Predictor. Read .current once per request and use that object throughout."""
+
+    def __init__(self, predictor: Predictor):
+        self.current = predictor
+
+
+class ModelReloader:
+
+    def __init__(self, slot: ModelSlot, path: str, on_swap=None,
+                 canaries=CANARY_SET, min_canary_accuracy: float = 0.8,
+                 poll_interval: float = 2.0, trigger_path: str = None):
+        self.slot                = slot
+        self.path                = path
+        self.trigger_path        = trigger_path
+        self.on_swap             = on_swap
+        self.canaries            = canaries
+        self.min_canary_accuracy = min_canary_accuracy
+        self.poll_interval       = poll_interval
+        self.watch_model         = False   # the watch thread also reloads when the model file changes
+
+        self._lock      = threading.Lock()   # one reload at a time
+        self._signature = file_signature(model_watch_path(path))
+        self._trigger   = file_signature(trigger_path) if trigger_path else None
+        self._watch_pid = None   # process whose watch thread is running (threads do not survive fork)
+
+        self.status = {"state": "idle", "version": slot.current.version,
+                       "error": None, "at": None, "reloads": 0, "failures": 0}
+
+    # ── validation ───────────────────────────────────────────────
+
+    def validate(self, candidate: Predictor):
+        """Warm the candidate and score the canary set. Raises ValueError if it is unfit to serve."""
+        texts   = [t for t, _ in self.canaries]
+        results = candidate.score_messages(texts)
+        for t in texts:   # single-message hot path too
+            candidate.score_message(t)
+
+        correct = 0
+        for (text, expected), (pred, prob, _, _) in zip(self.canaries, results):
+            if not (isinstance(prob, float) and math.isfinite(prob) and 0.0 <= prob <= 1.0):
+                raise ValueError(f"invalid probability {prob!r} for canary {text!r}")
+            correct += int(pred == expected)
+        accuracy = correct / len(self.canaries) if self.canaries else 1.0
+        if accuracy < self.min_canary_accuracy:
+            raise ValueError(f"canary accuracy {accuracy:.2f} below {self.min_canary_accuracy:.2f}")
+        return accuracy
+
+    # ── reload ───────────────────────────────────────────────────
+
+    def reload(self, broadcast: bool = False) -> dict:
+        """
+        Load, validate and swap in the model at self.path. Blocks; returns the status.
+        broadcast=True: after a successful swap, tell the other processes to reload too.
+        """
+        with self._lock:
+            self.status.update(state="loading", error=None)
+            signature = file_signature(model_watch_path(self.path))
+            started   = time.perf_counter()
+            try:
+                candidate = Predictor.load(self.path, verify=True)   # ArtifactError keeps the old model
+                accuracy  = self.validate(candidate)
+            except Exception as e:
+                self.status.update(state="failed", error=f"{type(e).__name__}: {e}",
+                                   at=datetime.now(timezone.utc).isoformat(),
+                                   failures=self.status["failures"] + 1)
+                self._signature = signature   # do not retry the same broken file forever
+                print(f"Model reload failed, still serving {self.slot.current.version}: {e}")
+                return dict(self.status)
+
+            previous = self.slot.current
+            self.slot.current = candidate   # atomic swap; in-flight requests keep `previous`
+            self._signature   = signature
+            if self.on_swap is not None:
+                self.on_swap(previous, candidate)
+            if broadcast:
+                self.broadcast()
+
+            self.status.update(state="idle", version=candidate.version,
+                               previous_version=previous.version,
+                               canary_accuracy=round(accuracy, 4),
+                               load_seconds=round(time.perf_counter() - started, 4),
+                               at=datetime.now(timezone.utc).isoformat(),
+                               reloads=self.status["reloads"] + 1)
+            print(f"Model reloaded: {previous.version} -> {candidate.version}")
+            return dict(self.status)
+
+    def reload_in_background(self, broadcast: bool = False) -> bool:
+        """Starts a reload thread; False if one is already running."""
+        if self._lock.locked():
+            return False
+        threading.Thread(target=self.reload, args=(broadcast,), name="model-reload", daemon=True).start()
+        return True
+
+    def broadcast(self):
+        """Touch the trigger file; every other process's watch thread then reloads the model."""
+        if self.trigger_path is None:
+            return
+        with open(self.trigger_path, "a"):
+            pass
+        os.utime(self.trigger_path)
+        self._trigger = file_signature(self.trigger_path)   # this process already has the model
+        self.status["broadcast_at"] = datetime.now(timezone.utc).isoformat()
+
+    # ── file watching ────────────────────────────────────────────
+
+    def changed(self) -> bool:
+        return file_signature(model_watch_path(self.path)) != self._signature
+
+    def triggered(self) -> bool:
+        return self.trigger_path is not None and file_signature(self.trigger_path) != self._trigger
+
+    def _watch(self):
+        while True:
+            time.sleep(self.poll_interval)
+            if self.triggered():
+                self._trigger = file_signature(self.trigger_path)
+                self.reload()
+                continue
+            if not (self.watch_model and self.changed()):
+                continue
+            # wait for the writer to finish: the file must be stable for one interval
+            sig = file_signature(model_watch_path(self.path))
+            time.sleep(self.poll_interval)
+            if sig is not None and sig == file_signature(model_watch_path(self.path)):
+                self.reload()
+
+    def after_fork(self):
+        """
+        New lock in a forked child: the parent's watch thread may have been
+        mid-reload at fork(), and that thread does not exist here to finish it.
+        """
+        self._lock = threading.Lock()
+        if self.status["state"] == "loading":
+            self.status["state"] = "idle"
+
+    def start_watching(self, model: bool = True):
+        """
+        Poll the trigger file and, with model=True, the model file too.
+        A preloaded app calls this again in each forked worker.
+        """
+        self.watch_model = self.watch_model or model
+        if self._watch_pid != os.getpid():
+            self._watch_pid = os.getpid()
+            threading.Thread(target=self._watch, name="model-watch", daemon=True).start()
@@ -0,0 +1,189 @@
+"""
+score.py
+- Offline bulk scoring of large message files with model.pkl
+- Input: TSV (label \\t text, same layout train.py reads), JSONL with a
+  "text" field (like user_data.jsonl), or plain text with one message per line
+- Streams the input in chunks; chunks fan out to a process pool where each
+  worker loads the model once
+- Writes one result per input message, in input order, as JSONL or CSV
+- Memory stays flat: only a bounded number of chunks is in flight at a time
+- --threads additionally splits each chunk across a thread pool inside the
+  worker (parallel.py); processes scale on every Python, threads only as far
+  as the NumPy / SciPy kernels release the GIL
+
+Usage:
+    python score.py messages.tsv -o scored.jsonl
+    python score.py user_data.jsonl --output-format csv -o scored.csv --workers 8
+    python score.py messages.tsv -o scored.jsonl --workers 4 --threads 8 --thread-chunk 500
+    cat messages.txt | python score.py - --input-format lines > scored.jsonl
+"""
+
+import io
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from parallel import ScoringPool
+from predictor import Predictor, prediction_json
+
+MODEL_FILE = "model.pkl"
+
+CSV_FIELDS = ["label", "spam_probability", "confidence", "spam_words", "reason", "error"]
+
+_worker_predictor = None   # one per worker process, set by _init_worker
+_worker_pool      = None   # its ScoringPool, if --threads > 1
+
+
+# ── input ────────────────────────────────────────────────────────
+
+def detect_format(path: str) -> str:
+    if path.endswith((".tsv", ".tab")):
+        return "tsv"
+    if path.endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    return "lines"
+
+
+def read_messages(path: str, fmt: str, chunk_size: int):
+    """Yields lists of message texts, chunk_size at a time, in file order."""
+    stream = sys.stdin if path == "-" else open(path, "r", encoding="utf-8", errors="replace")
+    try:
+        if fmt == "tsv":
+            # same parsing as train.py, just chunked
+            for df in pd.read_csv(stream, sep="\t", names=["label", "text"],
+                                  chunksize=chunk_size, dtype=str, keep_default_na=False):
+                yield df["text"].tolist()
+            return
+
+        chunk = []
+        for line in stream:
+            if fmt == "jsonl":
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    text = str(json.loads(line).get("text", ""))
+                except (json.JSONDecodeError, AttributeError):
+                    text = ""   # keep the slot so output lines up with input
+            else:
+                text = line.rstrip("\r\n")
+            chunk.append(text)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+# ── scoring (runs in workers) ────────────────────────────────────
+
+def _init_worker(model_path: str, threads: int = 1, thread_chunk: int = 1000):
+    global _worker_predictor, _worker_pool
+    _worker_predictor = Predictor.load(model_path)
+    _worker_pool      = ScoringPool(threads, thread_chunk) if threads > 1 else None
+
+
+def _score_chunk(args):
+    """Scores one chunk and returns it already serialized, so encoding is parallel too."""
+    texts, threshold, output_format = args
+    cleaned = [t.strip() for t in texts]
+    valid   = [i for i, t in enumerate(cleaned) if t]
+    scored  = _worker_predictor.score_messages([cleaned[i] for i in valid], threshold, pool=_worker_pool)
+
+    rows = [{"error": "Missing 'text'"}] * len(cleaned)
+    for i, r in zip(valid, scored):
+        rows[i] = prediction_json(*r)
+
+    if output_format == "jsonl":
+        return len(rows), "".join(json.dumps(r) + "\n" for r in rows)
+
+    buf    = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=CSV_FIELDS, lineterminator="\n")
+    for r in rows:
+        writer.writerow({**r, "spam_words": " ".join(r.get("spam_words") or [])})
+    return len(rows), buf.getvalue()
+
+
+def score_chunks(chunks, model_path: str, threshold: float, output_format: str, workers: int,
+                 threads: int = 1, thread_chunk: int = 1000):
+    """Yields (n_messages, serialized_text) per chunk, in input order."""
+    if workers <= 1:
+        _init_worker(model_path, threads, thread_chunk)
+        for texts in chunks:
+            yield _score_chunk((texts, threshold, output_format))
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(model_path, threads, thread_chunk)) as pool:
+        in_flight = deque()
+        max_in_flight = workers * 2   # bounded read-ahead keeps memory flat
+        for texts in chunks:
+            in_flight.append(pool.submit(_score_chunk, (texts, threshold, output_format)))
+            if len(in_flight) >= max_in_flight:
+                yield in_flight.popleft().result()
+        while in_flight:
+            yield in_flight.popleft().result()
+
+
+# ── main ─────────────────────────────────────────────────────────
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk-score a message file with model.pkl")
+    parser.add_argument("input", help="input file, or - for stdin")
+    parser.add_argument("-o", "--output", default="-", help="output file (default: stdout)")
+    parser.add_argument("--input-format", choices=["auto", "tsv", "jsonl", "lines"], default="auto")
+    parser.add_argument("--output-format", choices=["jsonl", "csv"], default=None,
+                        help="default: from the output file extension, else jsonl")
+    parser.add_argument("--model", default=MODEL_FILE)
+    parser.add_argument("--threshold", type=float, default=0.50)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--threads", type=int, default=1, help="scoring threads per worker (default: 1)")
+    parser.add_argument("--thread-chunk", type=int, default=1000,
+                        help="messages per thread task when --threads > 1")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.model):
+        parser.error(f"{args.model} not found. Run: python train.py")
+
+    in_fmt  = detect_format(args.input) if args.input_format == "auto" else args.input_format
+    out_fmt = args.output_format or ("csv" if args.output.endswith(".csv") else "jsonl")
+
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8", newline="")
+    total   = 0
+    started = time.perf_counter()
+    last_report = started
+    try:
+        if out_fmt == "csv":
+            out.write(",".join(CSV_FIELDS) + "\n")
+        chunks = read_messages(args.input, in_fmt, args.chunk_size)
+        for n, text in score_chunks(chunks, args.model, args.threshold, out_fmt, args.workers,
+                                    args.threads, args.thread_chunk):
+            out.write(text)
+            total += n
+            now = time.perf_counter()
+            if now - last_report >= 5.0:
+                last_report = now
+                print(f"  {total:,} messages  ({total / (now - started):,.0f} msg/s)", file=sys.stderr)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    elapsed = time.perf_counter() - started
+    rate = total / elapsed if elapsed > 0 else 0.0
+    print(f"Scored {total:,} messages in {elapsed:.2f}s ({rate:,.0f} msg/s) "
+          f"with {args.workers} worker(s) x {args.threads} thread(s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
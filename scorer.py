@@ -0,0 +1,447 @@
+"""
+scorer.py
+- Compiles the tfidf + clf steps of a trained Pipeline (model.pkl) into a
+  compact linear scorer used on the serving hot path
+- Same tokenizer / stop-word rules as the vectorizer (its own analyzer)
+- Skips Pipeline dispatch, input validation and CSR construction; for one
+  message the score is just a handful of dict lookups and a dot product.
+  analyze_batch() scores many messages as one CSR pass: the same lookups,
+  then NumPy arithmetic over all the matched terms at once
+- Also compiles hashing + SGD pipelines (the incremental model, see online.py)
+  into a HashedScorer with the same interface, including the hashing +
+  idf + SGD model of the streaming trainer (see streaming.py)
+"""
+
+import re
+import math
+import unicodedata
+from collections import Counter
+
+import numpy as np
+
+# Messages used to check the compiled scorer against the Pipeline at load time
+PROBE_TEXTS = [
+    "URGENT! You have WON a FREE prize worth $1000. Click the link NOW to claim!",
+    "Hey, are we still on for lunch at 1pm today?",
+    "Txt STOP to 85069 to unsubscribe. Ringtone club: 4 free tones a week",
+    "ok",
+    "",
+]
+
+# Below this many matched terms top_terms() sorts in Python instead of argpartition
+ARGPARTITION_MIN = 32
+
+
+class CompiledScorer:
+    """
+    Linear scorer compiled from a fitted TfidfVectorizer + LogisticRegression.
+
+    weights maps term -> (column, idf, idf * coef); the decision score of a message is
+        sum(tf * idf * coef) / ||tf * idf|| + intercept
+    which is exactly what the Pipeline computes with an L2-normalised TF-IDF row.
+    terms is the column -> term table used to explain a verdict.
+    """
+
+    def __init__(self, analyzer, weights: dict, terms, intercept: float,
+                 norm="l2", sublinear_tf=False, binary=False):
+        self.analyzer     = analyzer
+        self.weights      = weights
+        self.terms        = terms
+        self.intercept    = float(intercept)
+        self.norm         = norm
+        self.sublinear_tf = sublinear_tf
+        self.binary       = binary
+
+    def _tf(self, count: int) -> float:
+        if self.binary:
+            return 1.0
+        if self.sublinear_tf:
+            return 1.0 + math.log(count)
+        return float(count)
+
+    def analyze(self, text: str):
+        """
+        Single pass over a message.
+        Returns (decision score, columns, contributions) where contributions[i]
+        is tf * idf * coef for columns[i] before normalisation — the same ranking
+        as the per-term share of the score, so it doubles as the explanation.
+        """
+        dot      = 0.0
+        scale    = 0.0
+        cols     = []
+        contribs = []
+        for term, count in Counter(self.analyzer(text)).items():
+            w = self.weights.get(term)
+            if w is None:
+                continue
+            tf = self._tf(count)
+            c  = tf * w[2]
+            dot += c
+            cols.append(w[0])
+            contribs.append(c)
+            if self.norm == "l2":
+                scale += (tf * w[1]) ** 2
+            elif self.norm == "l1":
+                scale += abs(tf * w[1])
+        if scale > 0.0:
+            dot /= math.sqrt(scale) if self.norm == "l2" else scale
+        return dot + self.intercept, cols, contribs
+
+    def analyze_batch(self, texts):
+        """
+        analyze() for many messages as one sparse-matrix pass: the term lookups
+        build the rows of a CSR tf matrix, then tf-idf, the per-row dot products
+        and norms are a few NumPy operations over all of its entries.
+        Returns (decision scores, columns, contributions, offsets); the entries
+        of texts[k] are columns[offsets[k]:offsets[k + 1]] (and contributions).
+        Sums run in the same order as analyze(), so the scores are the same.
+        """
+        get, analyzer = self.weights.get, self.analyzer
+        cols, tfs, idfs, weights = [], [], [], []
+        offsets = [0]
+        for text in texts:
+            for term, count in Counter(analyzer(text)).items():
+                w = get(term)
+                if w is not None:
+                    cols.append(w[0])
+                    tfs.append(count)
+                    idfs.append(w[1])
+                    weights.append(w[2])
+            offsets.append(len(cols))
+        if not cols:
+            return np.full(len(texts), self.intercept), cols, [], offsets
+
+        tf = np.array(tfs, dtype=np.float64)
+        if self.binary:
+            tf[:] = 1.0
+        elif self.sublinear_tf:
+            tf = 1.0 + np.log(tf)
+        contribs = tf * np.array(weights, dtype=np.float64)
+        rows     = np.repeat(np.arange(len(texts)), np.diff(offsets))
+        dot      = np.bincount(rows, weights=contribs, minlength=len(texts))
+        if self.norm in ("l2", "l1"):
+            x     = tf * np.array(idfs, dtype=np.float64)
+            scale = np.bincount(rows, weights=x * x if self.norm == "l2" else np.abs(x), minlength=len(texts))
+            if self.norm == "l2":
+                scale = np.sqrt(scale)
+            np.divide(dot, scale, out=dot, where=scale > 0.0)
+        return dot + self.intercept, cols, contribs.tolist(), offsets
+
+    def decision_function(self, text: str) -> float:
+        return self.analyze(text)[0]
+
+    def predict_proba(self, text: str) -> float:
+        """P(spam) for a single message."""
+        return sigmoid(self.decision_function(text))
+
+    def top_terms(self, cols, contribs, top_n: int = 6):
+        """Terms with the largest positive contributions, strongest first."""
+        if len(contribs) <= ARGPARTITION_MIN:
+            # short messages: a plain sort beats NumPy's per-call overhead
+            idx = sorted(range(len(contribs)), key=contribs.__getitem__, reverse=True)[:top_n]
+            return [self.term(cols[i]) for i in idx if contribs[i] > 0]
+        scores = np.asarray(contribs)
+        idx = np.argpartition(-scores, top_n - 1)[:top_n]
+        idx = idx[np.argsort(-scores[idx], kind="stable")]
+        return [self.term(cols[i]) for i in idx if scores[i] > 0]
+
+    def term(self, col: int) -> str:
+        return str(self.terms[col])
+
+
+class HashedScorer(CompiledScorer):
+    """
+    Linear scorer for a HashingVectorizer + linear classifier (log loss).
+    A term's column is murmurhash3_32(term) mod n_features, exactly as sklearn
+    hashes it; coef is the classifier's dense coefficient vector.
+    There is no column -> term table, so the "columns" analyze() returns for
+    explanations are the terms themselves.
+    idf (one weight per column, the streamed model's TfidfTransformer step) is
+    applied before normalisation, as TfidfTransformer does; None = raw counts.
+    """
+
+    def __init__(self, analyzer, coef, n_features: int, intercept: float,
+                 norm="l2", alternate_sign=True, binary=False, idf=None):
+        super().__init__(analyzer, weights=None, terms=None, intercept=intercept,
+                         norm=norm, sublinear_tf=False, binary=binary)
+        self.coef           = coef
+        self.idf            = idf
+        self.n_features     = n_features
+        self.alternate_sign = alternate_sign
+        self._hash          = murmurhash3_32_function()
+
+    def _column(self, term: str):
+        h = self._hash(term)
+        if h == -2147483648:   # sklearn's definition of abs(-2**31) % n
+            return (2147483647 - (self.n_features - 1)) % self.n_features, -1.0
+        return abs(h) % self.n_features, (1.0 if h >= 0 or not self.alternate_sign else -1.0)
+
+    def analyze(self, text: str):
+        # terms that collide share a column: sum per column first, as the CSR row does
+        values, owners = {}, {}
+        for term, count in Counter(self.analyzer(text)).items():
+            col, sign = self._column(term)
+            values[col] = values.get(col, 0.0) + sign * count
+            owners.setdefault(col, []).append((term, sign * count))
+
+        dot, scale = 0.0, 0.0
+        terms, contribs = [], []
+        for col, value in values.items():
+            if value == 0.0 and not self.binary:   # binary=True turns even a cancelled column into 1
+                continue
+            if self.binary:
+                value = 1.0
+            idf    = 1.0 if self.idf is None else float(self.idf[col])
+            value *= idf
+            w      = float(self.coef[col])
+            dot   += value * w
+            if self.norm == "l2":
+                scale += value * value
+            elif self.norm == "l1":
+                scale += abs(value)
+            for term, v in owners[col]:
+                terms.append(term)
+                contribs.append((1.0 if self.binary else v) * idf * w)
+        if scale > 0.0:
+            dot /= math.sqrt(scale) if self.norm == "l2" else scale
+        return dot + self.intercept, terms, contribs
+
+    def analyze_batch(self, texts):
+        """Same result layout as CompiledScorer.analyze_batch, one analyze() per message."""
+        scores, terms, contribs, offsets = [], [], [], [0]
+        for text in texts:
+            score, t, c = self.analyze(text)
+            scores.append(score)
+            terms.extend(t)
+            contribs.extend(c)
+            offsets.append(len(terms))
+        return np.array(scores, dtype=np.float64), terms, contribs, offsets
+
+    def term(self, col) -> str:
+        return col
+
+
+def _murmurhash3_32(key: str, seed: int = 0) -> int:
+    """Signed MurmurHash3 (x86, 32-bit) of the UTF-8 bytes — sklearn.utils.murmurhash3_32."""
+    data   = key.encode("utf-8")
+    n      = len(data)
+    h      = seed & 0xFFFFFFFF
+    c1, c2 = 0xCC9E2D51, 0x1B873593
+    tail   = n - n % 4
+    for i in range(0, tail, 4):
+        k = int.from_bytes(data[i:i + 4], "little")
+        k = (k * c1) & 0xFFFFFFFF
+        k = ((k << 15) | (k >> 17)) & 0xFFFFFFFF
+        k = (k * c2) & 0xFFFFFFFF
+        h ^= k
+        h = ((h << 13) | (h >> 19)) & 0xFFFFFFFF
+        h = (h * 5 + 0xE6546B64) & 0xFFFFFFFF
+    k = 0
+    rest = n & 3
+    if rest == 3:
+        k ^= data[tail + 2] << 16
+    if rest >= 2:
+        k ^= data[tail + 1] << 8
+    if rest >= 1:
+        k ^= data[tail]
+        k = (k * c1) & 0xFFFFFFFF
+        k = ((k << 15) | (k >> 17)) & 0xFFFFFFFF
+        k = (k * c2) & 0xFFFFFFFF
+        h ^= k
+    h ^= n
+    h ^= h >> 16
+    h = (h * 0x85EBCA6B) & 0xFFFFFFFF
+    h ^= h >> 13
+    h = (h * 0xC2B2AE35) & 0xFFFFFFFF
+    h ^= h >> 16
+    return h - (1 << 32) if h & 0x80000000 else h
+
+
+def murmurhash3_32_function():
+    """sklearn's C murmurhash when sklearn is installed, else the pure-Python one (same values)."""
+    try:
+        from sklearn.utils import murmurhash3_32
+    except ImportError:
+        return _murmurhash3_32
+    return lambda term: murmurhash3_32(term, seed=0)
+
+
+def sigmoid(z: float) -> float:
+    # numerically stable logistic, same as scipy.special.expit
+    if z >= 0:
+        return 1.0 / (1.0 + math.exp(-z))
+    e = math.exp(z)
+    return e / (1.0 + e)
+
+
+def compile_pipeline(model) -> CompiledScorer:
+    """
+    Build a CompiledScorer from a fitted Pipeline whose first step is a
+    TfidfVectorizer and whose last step is a binary LogisticRegression.
+    Raises ValueError for anything else so callers can fall back to the Pipeline.
+    """
+    # sklearn is only needed when compiling from a Pipeline, not when serving
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+
+    steps = getattr(model, "named_steps", None)
+    if steps and "hash" in steps and "clf" in steps:
+        return compile_hashed_pipeline(model)
+    if not steps or "tfidf" not in steps or "clf" not in steps:
+        raise ValueError("expected a Pipeline with 'tfidf' and 'clf' steps")
+
+    vectorizer = steps["tfidf"]
+    classifier = steps["clf"]
+    if not isinstance(vectorizer, TfidfVectorizer):
+        raise ValueError(f"unsupported vectorizer: {type(vectorizer).__name__}")
+    if not isinstance(classifier, LogisticRegression) or classifier.coef_.shape[0] != 1:
+        raise ValueError("expected a binary LogisticRegression")
+    if vectorizer.norm not in ("l2", "l1", None):
+        raise ValueError(f"unsupported norm: {vectorizer.norm!r}")
+
+    coefs = classifier.coef_[0]
+    idf   = vectorizer.idf_ if vectorizer.use_idf else None
+
+    weights = {}
+    for term, col in vectorizer.vocabulary_.items():
+        term_idf = float(idf[col]) if idf is not None else 1.0
+        weights[term] = (col, term_idf, term_idf * float(coefs[col]))
+
+    return CompiledScorer(
+        analyzer     = vectorizer.build_analyzer(),
+        weights      = weights,
+        terms        = vectorizer.get_feature_names_out(),
+        intercept    = classifier.intercept_[0],
+        norm         = vectorizer.norm,
+        sublinear_tf = vectorizer.sublinear_tf,
+        binary       = vectorizer.binary,
+    )
+
+
+def hashed_classifier_check(classifier):
+    """The classifiers a HashedScorer can stand in for: binary, linear, P(spam) = sigmoid(score)."""
+    from sklearn.linear_model import LogisticRegression, SGDClassifier
+
+    if isinstance(classifier, SGDClassifier):
+        if classifier.loss != "log_loss":
+            raise ValueError(f"SGDClassifier needs loss='log_loss', got {classifier.loss!r}")
+    elif not isinstance(classifier, LogisticRegression):
+        raise ValueError(f"unsupported classifier: {type(classifier).__name__}")
+    if classifier.coef_.shape[0] != 1:
+        raise ValueError("expected a binary classifier")
+
+
+def hashed_idf(vectorizer, transformer):
+    """(idf, norm) of an 'idf' TfidfTransformer step after a HashingVectorizer; (None, vectorizer norm) without one."""
+    from sklearn.feature_extraction.text import TfidfTransformer
+
+    if transformer is None:
+        return None, vectorizer.norm
+    if not isinstance(transformer, TfidfTransformer):
+        raise ValueError(f"unsupported idf step: {type(transformer).__name__}")
+    if vectorizer.norm is not None or transformer.sublinear_tf or not transformer.use_idf:
+        raise ValueError("an idf step needs norm=None hashing, use_idf=True and sublinear_tf=False")
+    return transformer.idf_, transformer.norm
+
+
+def compile_hashed_pipeline(model) -> HashedScorer:
+    """
+    HashedScorer for a fitted Pipeline with 'hash' (HashingVectorizer) and
+    'clf' steps, optionally with an 'idf' (TfidfTransformer) step between them.
+    """
+    from sklearn.feature_extraction.text import HashingVectorizer
+
+    vectorizer = model.named_steps["hash"]
+    classifier = model.named_steps["clf"]
+    if not isinstance(vectorizer, HashingVectorizer):
+        raise ValueError(f"unsupported vectorizer: {type(vectorizer).__name__}")
+    hashed_classifier_check(classifier)
+    idf, norm = hashed_idf(vectorizer, model.named_steps.get("idf"))
+    if norm not in ("l2", "l1", None):
+        raise ValueError(f"unsupported norm: {norm!r}")
+
+    return HashedScorer(
+        analyzer       = vectorizer.build_analyzer(),
+        coef           = np.asarray(classifier.coef_[0], dtype=np.float64),
+        n_features     = vectorizer.n_features,
+        intercept      = classifier.intercept_[0],
+        norm           = norm,
+        alternate_sign = vectorizer.alternate_sign,
+        binary         = vectorizer.binary,
+        idf            = None if idf is None else np.asarray(idf, dtype=np.float64),
+    )
+
+
+def word_analyzer_config(vectorizer) -> dict:
+    """
+    Plain-data description of a word analyzer (JSON-serialisable), so it can be
+    rebuilt with build_word_analyzer() without sklearn. Raises ValueError for
+    char analyzers and custom callables, which cannot be described this way.
+    """
+    if vectorizer.analyzer != "word" or vectorizer.tokenizer is not None \
+            or vectorizer.preprocessor is not None:
+        raise ValueError("only the built-in word analyzer can be exported")
+    if vectorizer.strip_accents not in (None, "ascii", "unicode"):
+        raise ValueError(f"unsupported strip_accents: {vectorizer.strip_accents!r}")
+    if vectorizer.input != "content":
+        raise ValueError(f"unsupported input: {vectorizer.input!r}")
+    stop_words = vectorizer.get_stop_words()
+    return {
+        "lowercase":     bool(vectorizer.lowercase),
+        "strip_accents": vectorizer.strip_accents,
+        "token_pattern": vectorizer.token_pattern,
+        "stop_words":    sorted(stop_words) if stop_words is not None else None,
+        "ngram_range":   list(vectorizer.ngram_range),
+    }
+
+
+def _strip_accents_unicode(s: str) -> str:
+    try:
+        s.encode("ASCII", errors="strict")
+        return s
+    except UnicodeEncodeError:
+        normalized = unicodedata.normalize("NFKD", s)
+        return "".join(c for c in normalized if not unicodedata.combining(c))
+
+
+def _strip_accents_ascii(s: str) -> str:
+    return unicodedata.normalize("NFKD", s).encode("ASCII", "ignore").decode("ASCII")
+
+
+def build_word_analyzer(config: dict):
+    """Same preprocessing, tokenizing, stop-word and n-gram steps as sklearn's word analyzer."""
+    lowercase  = config["lowercase"]
+    accents    = {"ascii": _strip_accents_ascii, "unicode": _strip_accents_unicode}.get(config["strip_accents"])
+    findall    = re.compile(config["token_pattern"]).findall
+    stop_words = frozenset(config["stop_words"]) if config["stop_words"] is not None else None
+    min_n, max_n = config["ngram_range"]
+
+    def analyze(doc: str):
+        if lowercase:
+            doc = doc.lower()
+        if accents is not None:
+            doc = accents(doc)
+        tokens = findall(doc)
+        if stop_words is not None:
+            tokens = [w for w in tokens if w not in stop_words]
+        if max_n == 1:
+            return tokens
+        original = tokens
+        if min_n == 1:
+            tokens = list(original)
+            start  = 2
+        else:
+            tokens = []
+            start  = min_n
+        for n in range(start, min(max_n + 1, len(original) + 1)):
+            for i in range(len(original) - n + 1):
+                tokens.append(" ".join(original[i:i + n]))
+        return tokens
+
+    return analyze
+
+
+def max_pipeline_diff(scorer: CompiledScorer, model, texts=PROBE_TEXTS) -> float:
+    """Largest |P(spam)| difference between the compiled scorer and the Pipeline."""
+    expected = model.predict_proba(list(texts))[:, 1]
+    return max(abs(scorer.predict_proba(t) - float(p)) for t, p in zip(texts, expected))
@@ -0,0 +1,23 @@
+// LogifyNeural page scripts: character/word counter and example buttons
+function updateCounter(ta) {
+  const chars = ta.value.length;
+  const words = ta.value.trim() === "" ? 0 : ta.value.trim().split(/\s+/).length;
+  document.getElementById("counter").textContent =
+    chars + " character" + (chars !== 1 ? "s" : "") +
+    " · " + words + " word" + (words !== 1 ? "s" : "");
+}
+window.addEventListener("DOMContentLoaded", () => {
+  const ta = document.getElementById("msgInput");
+  if (ta) updateCounter(ta);
+});
+function fillExample(isSpam) {
+  const ta = document.getElementById("msgInput");
+  ta.value = isSpam
+    ? "URGENT! You have WON a FREE prize worth $1000. Click the link NOW to claim before it expires!"
+    : "Hey, are we still on for lunch at 1pm today?";
+  updateCounter(ta); ta.focus();
+}
+function clearBox() {
+  const ta = document.getElementById("msgInput");
+  ta.value = ""; updateCounter(ta); ta.focus();
+}
@@ -0,0 +1,192 @@
+"""
+stats.py
+- Session stats (checked / spam / ham) and recent-message history for the web app
+- Safe under threaded AND multi-process serving, without a lock on the request path:
+    * counters are sharded per thread (each thread only writes its own shard)
+    * history is a fixed-size ring buffer (deque appends are atomic)
+- Multi-process: with a db_path, a background thread per worker flushes its
+  totals and new history rows to a local SQLite database in WAL mode; readers
+  add the other workers' flushed numbers to their own live ones
+- Rows carry the run id of the server that wrote them (made once in the
+  master and inherited by every forked worker), and readers only add up the
+  current run: workers of earlier runs, or ones that exited, are not counted
+"""
+
+import os
+import time
+import socket
+import sqlite3
+import threading
+from collections import deque
+from datetime import datetime
+
+HISTORY_KEEP = 1000   # rows kept in the shared history table
+
+
+class SessionStats:
+
+    def __init__(self, history_size: int = 5, db_path: str = None,
+                 flush_interval: float = 0.5, read_ttl: float = 0.25, run_id: str = None):
+        self.history_size   = history_size
+        self.db_path        = db_path
+        self.flush_interval = flush_interval
+        self.read_ttl       = read_ttl
+        self.run_id         = run_id or f"{socket.gethostname()}:{os.getpid()}:{time.time():.6f}"
+
+        self._local   = threading.local()
+        self._shards  = []                 # (thread, [checked, spam, ham]) per live thread
+        self._retired = [0, 0, 0]          # totals folded in from finished threads
+        self._reg     = threading.Lock()   # taken once per new thread, and by readers
+        self._history = deque(maxlen=history_size)
+        self._pending = deque(maxlen=HISTORY_KEEP)   # history rows not yet flushed
+
+        self._pid     = None
+        self._worker  = None
+        self._conns   = threading.local()
+        self._others  = (0.0, (0, 0, 0), [])   # (read at, totals, history) of other workers
+        if db_path:
+            self._init_db()
+
+    # ── write path ───────────────────────────────────────────────
+
+    def _shard(self):
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = [0, 0, 0]
+            with self._reg:
+                self._shards.append((threading.current_thread(), shard))
+        return shard
+
+    def record(self, text: str, pred: int, prob: float):
+        shard = self._shard()
+        shard[0] += 1
+        shard[1 if pred == 1 else 2] += 1
+
+        entry = {"text": text, "pred": pred, "p": prob, "ts": time.time()}
+        self._history.appendleft(entry)
+        if self.db_path:
+            self._ensure_flusher()
+            self._pending.append(entry)
+
+    # ── read path ────────────────────────────────────────────────
+
+    def _local_totals(self):
+        with self._reg:
+            # fold shards of finished threads (servers may use a thread per request)
+            live = []
+            for thread, shard in self._shards:
+                if thread.is_alive():
+                    live.append((thread, shard))
+                else:
+                    for k in range(3):
+                        self._retired[k] += shard[k]
+            self._shards = live
+            totals = list(self._retired)
+            for _, shard in live:
+                for k in range(3):
+                    totals[k] += shard[k]
+        return tuple(totals)
+
+    def snapshot(self):
+        """(stats dict, history list newest first) across all workers."""
+        checked, spam, ham = self._local_totals()
+        history = list(self._history)
+        if self.db_path:
+            (o_checked, o_spam, o_ham), o_history = self._other_workers()
+            checked += o_checked; spam += o_spam; ham += o_ham
+            history = sorted(history + o_history, key=lambda e: e["ts"], reverse=True)
+        history = [self._display(e) for e in history[:self.history_size]]
+        return {"checked": checked, "spam": spam, "ham": ham}, history
+
+    def last_prob(self):
+        _, history = self.snapshot()
+        return history[0]["p"] if history else None
+
+    @staticmethod
+    def _display(e: dict) -> dict:
+        return {**e, "prob": f"{e['p']:.3f}",
+                "time": datetime.fromtimestamp(e["ts"]).strftime("%H:%M:%S")}
+
+    # ── shared SQLite store ──────────────────────────────────────
+
+    def _connect(self):
+        conn = getattr(self._conns, "conn", None)
+        if conn is None or getattr(self._conns, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._conns.conn, self._conns.pid = conn, os.getpid()
+        return conn
+
+    def _init_db(self):
+        conn = self._connect()
+        with conn:
+            conn.execute("""CREATE TABLE IF NOT EXISTS worker_stats (
+                worker TEXT PRIMARY KEY, checked INTEGER, spam INTEGER, ham INTEGER, updated REAL,
+                run TEXT)""")
+            conn.execute("""CREATE TABLE IF NOT EXISTS history (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, worker TEXT, ts REAL,
+                text TEXT, pred INTEGER, prob REAL, run TEXT)""")
+            for table in ("worker_stats", "history"):   # databases from before run ids
+                if "run" not in {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}:
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN run TEXT")
+            conn.execute("DELETE FROM worker_stats WHERE run IS NOT ? AND updated < ?",
+                         (self.run_id, time.time() - 86400))   # runs idle for a day
+
+    def _other_workers(self):
+        read_at, totals, history = self._others
+        if time.monotonic() - read_at < self.read_ttl:
+            return totals, history
+        me   = f"{socket.gethostname()}:{os.getpid()}"
+        conn = self._connect()
+        row  = conn.execute("SELECT COALESCE(SUM(checked),0), COALESCE(SUM(spam),0), "
+                            "COALESCE(SUM(ham),0) FROM worker_stats WHERE run = ? AND worker != ?",
+                            (self.run_id, me)).fetchone()
+        rows = conn.execute("SELECT text, pred, prob, ts FROM history WHERE run = ? AND worker != ? "
+                            "ORDER BY id DESC LIMIT ?", (self.run_id, me, self.history_size)).fetchall()
+        totals  = tuple(int(v) for v in row)
+        history = [{"text": t, "pred": p, "p": pr, "ts": ts} for t, p, pr, ts in rows]
+        self._others = (time.monotonic(), totals, history)
+        return totals, history
+
+    def _ensure_flusher(self):
+        # threads do not survive fork(), so start one per process
+        if self._pid == os.getpid():
+            return
+        with self._reg:
+            if self._pid != os.getpid():
+                self._pid    = os.getpid()
+                self._worker = f"{socket.gethostname()}:{self._pid}"
+                threading.Thread(target=self._flush_loop, name="stats-flush", daemon=True).start()
+
+    def flush(self):
+        rows = []
+        while self._pending:
+            e = self._pending.popleft()
+            rows.append((self.run_id, self._worker, e["ts"], e["text"], e["pred"], e["p"]))
+        checked, spam, ham = self._local_totals()
+        conn = self._connect()
+        with conn:
+            conn.execute("INSERT INTO worker_stats (worker, run, checked, spam, ham, updated) "
+                         "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(worker) DO UPDATE SET "
+                         "run=excluded.run, checked=excluded.checked, spam=excluded.spam, "
+                         "ham=excluded.ham, updated=excluded.updated",
+                         (self._worker, self.run_id, checked, spam, ham, time.time()))
+            if rows:
+                conn.executemany("INSERT INTO history (run, worker, ts, text, pred, prob) "
+                                 "VALUES (?, ?, ?, ?, ?, ?)", rows)
+                conn.execute("DELETE FROM history WHERE id <= "
+                             "(SELECT MAX(id) FROM history) - ?", (HISTORY_KEEP,))
+
+    def _flush_loop(self):
+        flushed = None
+        while True:
+            time.sleep(self.flush_interval)
+            totals = self._local_totals()
+            if totals == flushed and not self._pending:
+                continue
+            try:
+                self.flush()
+                flushed = totals
+            except sqlite3.Error as e:
+                print(f"Stats flush to {self.db_path} failed: {e}")
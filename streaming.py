@@ -0,0 +1,176 @@
+"""
+streaming.py
+- Out-of-core training for corpora larger than RAM (python train.py --stream)
+- Reads the TSV (dataset.iter_tsv) and the deduplicated feedback
+  (FeedbackStore.examples) chunk_size rows at a time; peak memory is one
+  chunk plus the holdout, however large the corpus is
+- Features: HashingVectorizer into a fixed number of columns, so there is no
+  vocabulary to grow with the corpus
+- Pass 1 counts the document frequency of every column and samples a
+  stratified holdout: each class keeps the rows with the smallest random
+  keys (bottom-k, a reservoir sample), and once the class counts are known
+  each class contributes its share. The holdout's own counts are subtracted,
+  so idf comes from the training rows only
+- Passes 2..: `epochs` passes of SGDClassifier (logistic loss) partial_fit
+  on idf-weighted, l2-normalised rows, shuffled within each chunk, holdout
+  rows skipped. The L2 penalty defaults to 1 / training rows, the same
+  regularisation as train.py's LogisticRegression(C=1)
+- Output: Pipeline(hash, idf, clf) — TfidfVectorizer's transform on hashed
+  columns — served by scorer.HashedScorer and exported as a "hashing_idf"
+  artifact (see artifact.py)
+"""
+
+import time
+import resource
+from itertools import islice
+
+import numpy as np
+from sklearn.pipeline import Pipeline
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+from sklearn.linear_model import SGDClassifier
+
+from dataset import iter_tsv
+
+CHUNK_SIZE       = 50_000
+N_FEATURES       = 2 ** 20
+EPOCHS           = 5
+HOLDOUT_FRACTION = 0.2       # same share as train.py's test split...
+HOLDOUT_MAX      = 20_000    # ...up to this many rows, which bounds its memory
+
+
+def build_model(n_features: int = N_FEATURES, alpha: float = 1e-5, seed: int = 0):
+    return Pipeline([
+        ("hash", HashingVectorizer(lowercase=True, stop_words="english", n_features=n_features,
+                                   alternate_sign=False, norm=None)),
+        ("idf",  TfidfTransformer(norm="l2")),
+        ("clf",  SGDClassifier(loss="log_loss", alpha=alpha, random_state=seed)),
+    ])
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024   # Linux: KB
+
+
+def chunks(corpus_path: str, feedback=None, chunk_size: int = CHUNK_SIZE):
+    """
+    (first row id, texts, labels) for the corpus, then the feedback examples
+    (an iterable of (text, label), read lazily). Row ids are positions in
+    this sequence, identical on every pass.
+    """
+    start = 0
+    for df in iter_tsv(corpus_path, chunk_size):
+        yield start, df["text"].tolist(), df["label"].to_numpy()
+        start += len(df)
+    if feedback is None:
+        return
+    rows = iter(feedback)
+    while True:
+        batch = list(islice(rows, chunk_size))
+        if not batch:
+            return
+        yield start, [t for t, _ in batch], np.array([y for _, y in batch], dtype=np.int64)
+        start += len(batch)
+
+
+class StratifiedReservoir:
+    """Uniform sample of up to `capacity` rows per class, in one pass, in bounded memory."""
+
+    def __init__(self, capacity: int = HOLDOUT_MAX, seed: int = 0):
+        self.capacity = capacity
+        self.rng      = np.random.default_rng(seed)
+        self.counts   = {}   # label -> rows seen
+        self._keys    = {}   # label -> (keys, row ids, texts) of the current sample
+
+    def offer(self, start: int, texts, labels):
+        keys = self.rng.random(len(labels))
+        for label in np.unique(labels):
+            label = int(label)
+            idx   = np.flatnonzero(labels == label)
+            self.counts[label] = self.counts.get(label, 0) + len(idx)
+            old_keys, old_ids, old_texts = self._keys.get(label, (np.empty(0), np.empty(0, np.int64), []))
+            all_keys  = np.concatenate([old_keys, keys[idx]])
+            all_ids   = np.concatenate([old_ids, start + idx])
+            all_texts = old_texts + [texts[i] for i in idx]
+            if len(all_keys) > self.capacity:
+                keep = np.argpartition(all_keys, self.capacity - 1)[:self.capacity]
+                all_keys, all_ids = all_keys[keep], all_ids[keep]
+                all_texts = [all_texts[i] for i in keep]
+            self._keys[label] = (all_keys, all_ids, all_texts)
+
+    def sample(self, fraction: float = HOLDOUT_FRACTION, limit: int = HOLDOUT_MAX):
+        """(row ids, texts, labels): each class's share of min(limit, fraction * rows)."""
+        total = sum(self.counts.values())
+        size  = min(limit, int(round(fraction * total)))
+        ids, texts, labels = [], [], []
+        for label, (keys, row_ids, row_texts) in sorted(self._keys.items()):
+            k = min(len(keys), int(round(size * self.counts[label] / total)))
+            for i in np.argsort(keys, kind="stable")[:k]:
+                ids.append(int(row_ids[i]))
+                texts.append(row_texts[i])
+                labels.append(label)
+        return np.array(ids, dtype=np.int64), texts, np.array(labels, dtype=np.int64)
+
+
+def smooth_idf(df, n_docs: int):
+    """TfidfTransformer's smooth_idf=True formula."""
+    return np.log((1.0 + n_docs) / (1.0 + df)) + 1.0
+
+
+def fit_streaming(open_chunks, n_features: int = N_FEATURES, epochs: int = EPOCHS,
+                  alpha: float = None, holdout_fraction: float = HOLDOUT_FRACTION,
+                  holdout_max: int = HOLDOUT_MAX, seed: int = 0):
+    """
+    Train on the rows of open_chunks() (a fresh chunks() iterator per call;
+    it is read 1 + epochs times). alpha=None: 1 / training rows. Returns
+    (model, holdout texts, holdout labels, stats).
+    """
+    model      = build_model(n_features, seed=seed)
+    hasher     = model.named_steps["hash"]
+    idf_step   = model.named_steps["idf"]
+    classifier = model.named_steps["clf"]
+    stats      = {"rows": 0, "chunks": 0, "epochs": []}
+
+    # ── pass 1: document frequencies + holdout ───────────────────
+    started   = time.perf_counter()
+    df        = np.zeros(n_features, dtype=np.int64)
+    reservoir = StratifiedReservoir(holdout_max, seed)
+    for start, texts, labels in open_chunks():
+        X   = hasher.transform(texts)   # CSR with duplicates summed: one index per term column per row
+        df += np.bincount(X.indices, minlength=n_features)
+        reservoir.offer(start, texts, labels)
+        stats["rows"]   += len(labels)
+        stats["chunks"] += 1
+    if len(reservoir.counts) < 2:
+        raise ValueError("the training data has only one class")
+
+    hold_ids, hold_texts, hold_y = reservoir.sample(holdout_fraction, holdout_max)
+    stats["class_counts"] = dict(sorted(reservoir.counts.items()))
+    del reservoir
+    X_hold        = hasher.transform(hold_texts)
+    df           -= np.bincount(X_hold.indices, minlength=n_features)
+    idf_step.idf_ = smooth_idf(df, stats["rows"] - len(hold_ids))
+    X_hold        = idf_step.transform(X_hold)
+    stats["holdout"]    = len(hold_ids)
+    stats["alpha"]      = alpha if alpha is not None else 1.0 / (stats["rows"] - len(hold_ids))
+    stats["df_seconds"] = time.perf_counter() - started
+    classifier.set_params(alpha=stats["alpha"])
+
+    # ── passes 2..: SGD epochs ───────────────────────────────────
+    rng = np.random.default_rng(seed)
+    for epoch in range(epochs):
+        started = time.perf_counter()
+        for start, texts, labels in open_chunks():
+            keep = ~np.isin(np.arange(start, start + len(labels)), hold_ids)
+            if not keep.any():
+                continue
+            X     = idf_step.transform(hasher.transform([t for t, k in zip(texts, keep) if k]))
+            y     = labels[keep]
+            order = rng.permutation(len(y))
+            classifier.partial_fit(X[order], y[order], classes=[0, 1])
+        acc = float(np.mean(classifier.predict(X_hold) == hold_y)) if len(hold_y) else None
+        stats["epochs"].append({"epoch": epoch + 1, "seconds": time.perf_counter() - started,
+                                "holdout_accuracy": acc})
+        print(f"  epoch {epoch + 1}/{epochs}: {stats['epochs'][-1]['seconds']:.1f}s"
+              + (f", holdout accuracy {acc:.4f}" if acc is not None else ""))
+    stats["peak_rss_mb"] = peak_rss_mb()
+    return model, hold_texts, hold_y, stats
@@ -0,0 +1,79 @@
+"""
+Shared fixtures: a small labeled corpus and a TF-IDF + LR Pipeline fitted on
+it (the same one train.py builds), so no test touches the real model.pkl.
+"""
+
+import os
+import sys
+
+import joblib
+import pytest
+from sklearn.pipeline import Pipeline
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SPAM = [
+    "Congratulations! You have won a free prize. Call now to claim your cash",
+    "URGENT! Your mobile number has won a 2000 pound award. Txt CLAIM to 80082",
+    "FREE entry to win a brand new phone. Text WIN to 87121, reply STOP to end",
+    "You are a winner! Claim your free voucher today, click the link now",
+    "Guaranteed cash prize waiting for you. Call our customer service now",
+    "Win a free holiday! Reply YES to enter the prize draw this week",
+    "Your account has a bonus reward. Claim your free gift card now",
+    "Final notice: claim your guaranteed prize, call free from any landline",
+]
+HAM = [
+    "Hey, are we still on for lunch at 1pm today?",
+    "Sorry I'll call you later, I'm in a meeting",
+    "Ok see you at home tonight, love you",
+    "Can you pick up some milk on the way back?",
+    "Thanks for dinner yesterday, it was really good",
+    "I'm running a bit late, be there in ten minutes",
+    "Did you finish the report for tomorrow's meeting?",
+    "Good morning! How did you sleep?",
+    "Let's watch a movie this weekend if you're free",
+    "Where did you park the car? I can't find it",
+]
+
+
+@pytest.fixture(scope="session")
+def corpus():
+    """(texts, labels) with both classes."""
+    return SPAM + HAM, [1] * len(SPAM) + [0] * len(HAM)
+
+
+@pytest.fixture(scope="session")
+def pipeline(corpus):
+    texts, labels = corpus
+    model = Pipeline([
+        ("tfidf", TfidfVectorizer(lowercase=True, stop_words="english")),
+        ("clf", LogisticRegression(max_iter=2000)),
+    ])
+    return model.fit(texts, labels)
+
+
+@pytest.fixture(scope="session")
+def app_module(tmp_path_factory, pipeline):
+    """app.py imported once, serving `pipeline`, with its working files in a temp directory."""
+    workdir = tmp_path_factory.mktemp("app")
+    joblib.dump(pipeline, workdir / "model.pkl")
+    env = {"LOGIFY_MODEL": str(workdir / "model.pkl"), "LOGIFY_WARMUP": "0", "LOGIFY_CAMPAIGNS": "0"}
+    for var in ("LOGIFY_STATS_DB", "LOGIFY_WATCH_MODEL", "LOGIFY_MICROBATCH", "LOGIFY_ADMIN_TOKEN"):
+        os.environ.pop(var, None)
+    os.environ.update(env)
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        import app
+        yield app
+    finally:
+        os.chdir(cwd)
+
+
+@pytest.fixture
+def client(app_module):
+    app_module.verdict_cache.clear()
+    return app_module.app.test_client()
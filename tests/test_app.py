@@ -0,0 +1,166 @@
+import multiprocessing
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+
+
+# ── GET / revalidation ───────────────────────────────────────────
+
+def test_home_etag_revalidates_with_304(client):
+    first = client.get("/")
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert "no-cache" in first.headers["Cache-Control"]
+
+    again = client.get("/", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.data == b""
+    assert again.headers["ETag"] == etag
+
+
+def test_home_etag_changes_when_the_page_would(client):
+    etag = client.get("/").headers["ETag"]
+    client.post("/", data={"text": "Congratulations you won a free prize"})   # stats + history change
+    page = client.get("/", headers={"If-None-Match": etag})
+    assert page.status_code == 200
+    assert page.headers["ETag"] != etag
+
+
+# ── GET /chart/sigmoid.svg ───────────────────────────────────────
+
+def test_chart_is_cacheable_and_revalidates_with_304(client):
+    first = client.get("/chart/sigmoid.svg?size=inline&p=0.9731")
+    assert first.status_code == 200
+    assert first.mimetype == "image/svg+xml"
+    assert b"p = 0.973" in first.data
+    assert first.headers["Cache-Control"] in ("public, max-age=86400", "max-age=86400, public")
+    again = client.get("/chart/sigmoid.svg?size=inline&p=0.9731",
+                       headers={"If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304 and again.data == b""
+
+
+@pytest.mark.parametrize("query", ["size=huge", "p=1.5", "p=-0.1", "p=nan", "p=abc"])
+def test_chart_rejects_bad_parameters(client, query):
+    assert client.get(f"/chart/sigmoid.svg?{query}").status_code == 400
+
+
+# ── POST /predict/batch ──────────────────────────────────────────
+
+@pytest.mark.parametrize("body", [None, {}, {"texts": []}, {"texts": "one message"}, {"text": "hi"}])
+def test_batch_rejects_missing_or_malformed_texts(client, body):
+    resp = client.post("/predict/batch", json=body) if body is not None else \
+        client.post("/predict/batch", data="not json", content_type="application/json")
+    assert resp.status_code == 400
+    assert "error" in resp.get_json()
+
+
+def test_batch_rejects_too_many_texts(client, app_module, monkeypatch):
+    monkeypatch.setattr(app_module, "MAX_BATCH", 3)
+    resp = client.post("/predict/batch", json={"texts": ["a", "b", "c", "d"]})
+    assert resp.status_code == 413
+
+
+def test_batch_marks_bad_entries_and_keeps_order(client):
+    texts = ["Congratulations you won a free prize, call now", "", None, 42, "   ",
+             "are we still on for lunch?"]
+    resp  = client.post("/predict/batch", json={"texts": texts})
+    assert resp.status_code == 200
+    results = resp.get_json()["results"]
+    assert len(results) == len(texts)
+    for i in (1, 2, 3, 4):
+        assert results[i] == {"error": "Missing 'text'"}
+    for i in (0, 5):
+        single = client.post("/predict", json={"text": texts[i]}).get_json()
+        assert results[i] == single
+
+
+def test_batch_of_one_matches_predict(client):
+    text  = "Free entry: text WIN to claim your prize"
+    batch = client.post("/predict/batch", json={"texts": [text]}).get_json()["results"][0]
+    assert batch == client.post("/predict", json={"text": text}).get_json()
+
+
+def test_batch_endpoint_scores_in_one_sparse_pass(client, app_module, monkeypatch):
+    from predictor import VECTORIZE_MIN
+    scorer = app_module.current_model().scorer
+    calls  = []
+    real   = scorer.analyze_batch
+    monkeypatch.setattr(scorer, "analyze_batch", lambda texts: calls.append(len(texts)) or real(texts))
+    texts  = [f"Win a free prize number {i}, call now" for i in range(VECTORIZE_MIN)]
+    resp   = client.post("/predict/batch", json={"texts": texts})
+    assert resp.status_code == 200
+    assert calls == [VECTORIZE_MIN]
+
+
+# ── campaign retraction ──────────────────────────────────────────
+
+def test_retracting_a_campaign_drops_only_its_cached_verdicts(client, app_module, monkeypatch):
+    from campaigns import CampaignIndex
+    monkeypatch.setattr(app_module, "campaigns", CampaignIndex())
+    queued = []   # kept out of user_data.jsonl, which the writer would append to after the test
+    monkeypatch.setattr(app_module.feedback_writer, "submit", queued.append)
+    spam    = "URGENT! Your mobile number 07700 900123 has won a £2000 award. Call 09061 now"
+    variant = "URGENT! Your mobile number 07700 900456 has won a £5000 award. Call 09062 now"
+    app_module.campaigns.add(spam, 0.97, ["urgent"])
+    hit   = client.post("/predict", json={"text": variant}).get_json()
+    other = client.post("/predict", json={"text": "are we still on for lunch?"}).get_json()
+    assert "campaign" in hit["reason"]
+    assert app_module.verdict_cache.stats()["entries"] == 2
+
+    app_module.save_feedback(variant, 0)   # an anonymous "not spam" click
+    assert [r["label"] for r in queued] == [0]
+    assert app_module.verdict_cache.stats()["entries"] == 1
+    assert client.post("/predict", json={"text": "are we still on for lunch?"}).get_json() == other
+    assert "campaign" not in (client.post("/predict", json={"text": variant}).get_json()["reason"] or "")
+
+
+# ── startup ──────────────────────────────────────────────────────
+
+def test_warmup_runs_every_path_and_leaves_no_probe_verdicts(app_module, capsys):
+    timings = app_module.warmup()
+    assert timings["status"] == 200
+    assert {"import_s", "model_load_s", "warm_charts_s", "first_response_s", "ready_s"} <= set(timings)
+    assert app_module.verdict_cache.stats()["entries"] == 0
+    assert "Boot: app import" in capsys.readouterr().out
+
+
+def test_importing_the_app_does_not_load_matplotlib(app_module, tmp_path):
+    probe = ("import sys, app; import chart; "
+             "print('matplotlib' in sys.modules); chart.background('inline'); "
+             "print('matplotlib' in sys.modules)")
+    env = {**os.environ, "LOGIFY_MODEL": app_module.MODEL_PATH, "LOGIFY_WARMUP": "0",
+           "PYTHONPATH": os.path.dirname(os.path.dirname(os.path.abspath(__file__)))}
+    out = subprocess.run([sys.executable, "-c", probe], cwd=tmp_path, env=env,
+                         capture_output=True, text=True, timeout=120, check=True).stdout
+    assert out.split()[-2:] == ["False", "True"]
+
+
+def test_forked_worker_does_not_inherit_a_held_lock(app_module):
+    held, release = threading.Event(), threading.Event()
+
+    def hold():
+        with app_module.verdict_cache._lock:
+            held.set()
+            release.wait(10)
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    held.wait(5)
+
+    def worker():
+        app_module.after_fork()
+        app_module.verdict_cache.stats()   # would block forever on the parent's lock
+
+    try:
+        proc = multiprocessing.get_context("fork").Process(target=worker)
+        proc.start()
+        proc.join(10)
+        if proc.is_alive():
+            proc.kill()
+        assert proc.exitcode == 0
+    finally:
+        release.set()
+        holder.join()
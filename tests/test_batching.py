@@ -0,0 +1,121 @@
+import threading
+
+import pytest
+
+from batching import MicroBatcher, QueueFull
+
+
+class GatedScorer:
+    """score_batch that records each batch and holds the first one until release()."""
+
+    def __init__(self):
+        self.batches = []
+        self.started = threading.Event()
+        self.gate    = threading.Event()
+
+    def __call__(self, texts, opts):
+        self.batches.append((list(texts), opts))
+        self.started.set()
+        self.gate.wait(10)
+        if "boom" in texts:
+            raise RuntimeError("scorer failed")
+        return [f"{t}@{opts}" for t in texts]
+
+    def release(self):
+        self.gate.set()
+
+
+def submit_all(batcher, items):
+    """Submits (text, opts) pairs from one thread each; returns {text: result or exception}."""
+    results = {}
+
+    def one(text, opts):
+        try:
+            results[text] = batcher.submit(text, opts)
+        except Exception as e:
+            results[text] = e
+
+    threads = [threading.Thread(target=one, args=item) for item in items]
+    for t in threads:
+        t.start()
+    return threads, results
+
+
+def wait_for_queue(batcher, depth):
+    for _ in range(1000):
+        if batcher._queue.qsize() >= depth:
+            return
+        threading.Event().wait(0.005)
+    raise AssertionError(f"queue never reached {depth}")
+
+
+def test_requests_waiting_together_are_scored_in_one_batch_each_with_its_own_result():
+    scorer  = GatedScorer()
+    batcher = MicroBatcher(scorer, max_batch_size=8, max_wait_us=50_000)
+    first, results = submit_all(batcher, [("first", 0.5)])
+    scorer.started.wait(5)                      # the scheduler is busy with "first"...
+    rest, more = submit_all(batcher, [(f"msg{i}", 0.5) for i in range(5)])
+    wait_for_queue(batcher, 5)                  # ...while five more requests queue up
+    scorer.release()
+    for t in first + rest:
+        t.join(5)
+    assert results == {"first": "first@0.5"}
+    assert more == {f"msg{i}": f"msg{i}@0.5" for i in range(5)}
+    assert [len(texts) for texts, _ in scorer.batches] == [1, 5]
+    assert batcher.stats()["max_batch_seen"] == 5 and batcher.stats()["requests"] == 6
+
+
+def test_batches_are_split_by_size_and_by_opts():
+    scorer  = GatedScorer()
+    batcher = MicroBatcher(scorer, max_batch_size=3, max_wait_us=50_000)
+    first, _ = submit_all(batcher, [("first", 0.5)])
+    scorer.started.wait(5)
+    items = [("a", 0.5), ("b", 0.9), ("c", 0.5), ("d", 0.5), ("e", 0.9)]
+    rest, results = submit_all(batcher, items)
+    wait_for_queue(batcher, len(items))
+    scorer.release()
+    for t in first + rest:
+        t.join(5)
+    assert results == {text: f"{text}@{opts}" for text, opts in items}
+    sizes = [len(texts) for texts, _ in scorer.batches[1:]]
+    assert sum(sizes) == len(items) and max(sizes) <= 3
+    for texts, opts in scorer.batches:
+        assert all(dict(items + [("first", 0.5)])[t] == opts for t in texts)
+
+
+def test_a_failed_batch_fails_only_its_own_requests():
+    scorer  = GatedScorer()
+    batcher = MicroBatcher(scorer, max_batch_size=8, max_wait_us=50_000)
+    first, _ = submit_all(batcher, [("first", 0.5)])
+    scorer.started.wait(5)
+    rest, results = submit_all(batcher, [("boom", 0.5), ("fine", 0.5), ("other", 0.9)])
+    wait_for_queue(batcher, 3)
+    scorer.release()
+    for t in first + rest:
+        t.join(5)
+    assert isinstance(results["boom"], RuntimeError) and isinstance(results["fine"], RuntimeError)
+    assert results["other"] == "other@0.9"
+    assert batcher.submit("after", 0.5) == "after@0.5"   # the scheduler thread survives
+
+
+def test_full_queue_rejects_instead_of_waiting():
+    scorer  = GatedScorer()
+    batcher = MicroBatcher(scorer, max_batch_size=8, max_wait_us=0, max_queue=2)
+    first, _ = submit_all(batcher, [("first", 0.5)])
+    scorer.started.wait(5)
+    queued, _ = submit_all(batcher, [("a", 0.5), ("b", 0.5)])
+    wait_for_queue(batcher, 2)
+    with pytest.raises(QueueFull):
+        batcher.submit("c", 0.5)
+    assert batcher.stats()["rejected"] == 1
+    scorer.release()
+    for t in first + queued:
+        t.join(5)
+
+
+def test_a_request_that_waits_too_long_times_out():
+    scorer  = GatedScorer()
+    batcher = MicroBatcher(scorer, timeout=0.05)
+    with pytest.raises(TimeoutError):
+        batcher.submit("slow", 0.5)
+    scorer.release()
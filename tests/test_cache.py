@@ -0,0 +1,46 @@
+from cache import VerdictCache, normalize_text
+
+
+def test_normalize_text_ignores_case_and_whitespace():
+    assert normalize_text("  Win a FREE\tprize\n now ") == "win a free prize now"
+
+
+def test_key_equal_for_case_and_whitespace_variants():
+    key = VerdictCache.key
+    assert key("Win a FREE prize", 0.5, "v1") == key("  win  a free\nprize ", 0.5, "v1")
+
+
+def test_key_differs_on_text_threshold_and_model_version():
+    key  = VerdictCache.key
+    base = key("win a free prize", 0.5, "v1")
+    assert key("win a free prize!", 0.5, "v1") != base
+    assert key("win a free prize", 0.6, "v1") != base
+    assert key("win a free prize", 0.5, "v2") != base
+
+
+def test_cache_hit_through_normalized_key():
+    cache = VerdictCache(max_entries=10)
+    cache.put(cache.key("Hello World", 0.5, "v1"), (0, 0.1, None, []))
+    assert cache.get(cache.key("hello   world", 0.5, "v1")) == (0, 0.1, None, [])
+    assert cache.hits == 1
+
+
+def test_discard_group_drops_only_that_group():
+    cache = VerdictCache(max_entries=10)
+    a, b, c = (cache.key(t, 0.5, "v1") for t in ("a", "b", "c"))
+    cache.put(a, (1, 0.99, "campaign 1", []), group=1)
+    cache.put(b, (1, 0.99, "campaign 2", []), group=2)
+    cache.put(c, (0, 0.10, None, []))
+    assert cache.discard_group(1) == 1
+    assert cache.get(a) is None
+    assert cache.get(b) is not None and cache.get(c) is not None
+    assert cache.discard_group(1) == 0
+    assert cache.stats()["bytes"] == sum(cache._size(v) for v, _, _ in cache._data.values())
+
+
+def test_evicted_entries_leave_their_group():
+    cache = VerdictCache(max_entries=1)
+    cache.put(cache.key("a", 0.5, "v1"), (1, 0.99, "campaign 1", []), group=1)
+    cache.put(cache.key("b", 0.5, "v1"), (0, 0.10, None, []))
+    assert cache._groups == {}
+    assert cache.discard_group(1) == 0
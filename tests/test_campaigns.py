@@ -0,0 +1,113 @@
+import json
+import time
+from datetime import datetime, timezone
+
+from campaigns import CampaignIndex, TRUSTED_PROB
+
+CAMPAIGN = "URGENT! Your mobile number 07700 900123 has won a £2000 award. Call 09061 now"
+VARIANT  = "URGENT! Your mobile number 07700 900456 has won a £5000 award. Call 09062 now"
+OTHERS   = [
+    "Claim your free holiday voucher at www.example.com before midnight tonight",
+    "You have been selected for a guaranteed cash loan, reply YES to apply today",
+    "Exclusive offer: win a brand new phone, text WIN to 87121 to enter the draw",
+]
+
+
+def write_log(path, records):
+    with open(path, "a", encoding="utf-8") as f:
+        for text, label, trusted in records:
+            row = {"text": text, "label": label, "ts": datetime.now(timezone.utc).isoformat()}
+            if trusted:
+                row["trusted"] = True
+            f.write(json.dumps(row) + "\n")
+
+
+# ── labels ───────────────────────────────────────────────────────
+
+def test_variant_of_a_campaign_matches_it():
+    index   = CampaignIndex()
+    cluster = index.add(CAMPAIGN, 0.97, ["urgent", "won"])
+    found, similarity = index.lookup(VARIANT)
+    assert found is cluster and similarity >= index.threshold
+    assert index.lookup(OTHERS[0]) is None
+
+
+def test_anonymous_retraction_cannot_drop_a_trusted_cluster():
+    index   = CampaignIndex()
+    cluster = index.add(CAMPAIGN, TRUSTED_PROB, source="trusted")
+    assert index.retract(VARIANT) is None
+    assert index.lookup(CAMPAIGN)[0] is cluster
+    assert index.retract(VARIANT, trusted=True) is cluster
+    assert index.lookup(CAMPAIGN) is None
+    assert index.retracted == 1
+
+
+def test_anonymous_retraction_drops_a_model_cluster():
+    index   = CampaignIndex()
+    cluster = index.add(CAMPAIGN, 0.97)
+    assert index.retract(VARIANT) is cluster
+    assert not index.live(cluster.id)
+    assert index.lookup(CAMPAIGN) is None
+
+
+def test_trusted_label_takes_over_a_model_cluster():
+    index   = CampaignIndex()
+    cluster = index.add(CAMPAIGN, 0.97)
+    assert index.add(VARIANT, TRUSTED_PROB, source="trusted") is cluster
+    assert cluster.source == "trusted"
+    assert index.retract(CAMPAIGN) is None   # no longer the model's to give up
+    index.clear(source="verdict")            # a model swap keeps it too
+    assert index.live(cluster.id)
+
+
+# ── seed() ───────────────────────────────────────────────────────
+
+def test_seed_reads_only_trusted_labels(tmp_path):
+    log = str(tmp_path / "user_data.jsonl")
+    write_log(log, [
+        (OTHERS[0], 1, False),   # an anonymous spam label starts nothing
+        (CAMPAIGN,  1, True),
+        (VARIANT,   0, False),   # an anonymous "not spam" does not undo an admin label
+        (OTHERS[1], 1, True),
+        (OTHERS[1], 0, True),    # an admin's own retraction does
+    ])
+    index = CampaignIndex()
+    assert index.seed(log) == 3
+    assert index.stats()["trusted"] == 1 and index.stats()["clusters"] == 1
+    assert index.lookup(CAMPAIGN)[0].source == "trusted"
+    assert index.lookup(OTHERS[0]) is None
+    assert index.lookup(OTHERS[1]) is None
+
+
+def test_seed_skips_labels_older_than_the_ttl(tmp_path):
+    log = tmp_path / "user_data.jsonl"
+    write_log(str(log), [(CAMPAIGN, 1, True)])
+    row = json.loads(log.read_text())
+    row["ts"] = datetime.fromtimestamp(time.time() - 7200, timezone.utc).isoformat()
+    log.write_text(json.dumps(row) + "\n")
+    assert CampaignIndex(ttl=3600).seed(str(log)) == 0
+
+
+# ── bounds ───────────────────────────────────────────────────────
+
+def test_least_recently_seen_cluster_is_evicted_first():
+    index = CampaignIndex(max_clusters=2)
+    first = index.add(OTHERS[0], 0.97)
+    index.add(OTHERS[1], 0.97)
+    index.lookup(OTHERS[0])   # seen again: now the most recent
+    index.add(OTHERS[2], 0.97)
+    assert index.evictions == 1
+    assert index.lookup(OTHERS[0])[0] is first
+    assert index.lookup(OTHERS[1]) is None   # gone from the LSH buckets too
+    assert sum(len(band) for band in index._bands) == 2 * len(index._bands)
+
+
+def test_clusters_expire_after_the_ttl():
+    index = CampaignIndex(ttl=60)
+    stale = index.add(CAMPAIGN, 0.97, now=time.time() - 61)
+    assert index.lookup(VARIANT) is None   # expired clusters never match...
+    assert index.live(stale.id)
+    index.expire()                         # ...and expire() drops them
+    assert not index.live(stale.id)
+    assert index.evictions == 1
+    assert all(not band for band in index._bands)
@@ -0,0 +1,64 @@
+import xml.etree.ElementTree as ET
+
+import pytest
+
+import chart
+
+SVG = "{http://www.w3.org/2000/svg}"
+
+
+def dot(svg: bytes):
+    """(cx, cy, label text) of the message dot, or None."""
+    group = ET.fromstring(svg).find(f".//{SVG}g[@id='message-dot']")
+    if group is None:
+        return None
+    circle = group.find(f"{SVG}circle")
+    label  = " ".join(t.text for t in group.iter(f"{SVG}tspan"))
+    return float(circle.get("cx")), float(circle.get("cy")), label
+
+
+def test_chart_is_an_svg_document_with_the_dot_where_the_probability_is():
+    bg = chart.background("inline")
+    svg, _ = chart.sigmoid_svg("inline", chart.chart_prob_key(0.5))
+    cx, cy, label = dot(svg)
+    assert (cx, cy) == pytest.approx(bg.to_svg(0.0, 0.5), abs=0.01)   # log-odds 0
+    assert label == "your message p = 0.500"
+    assert dot(chart.sigmoid_svg("inline", None)[0]) is None
+
+
+def test_dot_follows_the_curve_and_is_pinned_at_the_axis_limits():
+    xs, ys = [], []
+    for prob in (0.01, 0.2, 0.5, 0.8, 0.99):
+        cx, cy, _ = dot(chart.sigmoid_svg("full", chart.chart_prob_key(prob))[0])
+        xs.append(cx)
+        ys.append(cy)
+    assert xs == sorted(xs) and ys == sorted(ys, reverse=True)   # right and up (SVG y points down)
+
+    bg = chart.background("full")
+    edge, _, _ = dot(chart.sigmoid_svg("full", chart.chart_prob_key(1.0))[0])
+    assert edge == pytest.approx(bg.to_svg(chart.X_LIMIT, 1.0)[0], abs=0.01)
+
+
+def test_background_is_drawn_once_per_size(monkeypatch):
+    monkeypatch.setattr(chart, "_backgrounds", {})
+    built = []
+    real  = chart.SigmoidBackground
+    monkeypatch.setattr(chart, "SigmoidBackground", lambda size: built.append(size) or real(size))
+    for prob in ("0.1000", "0.9000", None):
+        chart.sigmoid_svg("inline", prob)
+        chart.sigmoid_svg("full", prob)
+    assert built == ["inline", "full"]
+
+
+def test_etag_depends_on_size_and_dot_only():
+    _, a = chart.sigmoid_svg("inline", "0.1234")
+    assert chart.sigmoid_svg("inline", "0.1234")[1] == a
+    assert chart.sigmoid_svg("inline", "0.1235")[1] != a
+    assert chart.sigmoid_svg("full", "0.1234")[1] != a
+    assert chart.sigmoid_svg("inline", None)[1] != a
+
+
+def test_prob_key_is_four_decimals():
+    assert chart.chart_prob_key(0.123456) == "0.1235"
+    assert chart.chart_prob_key(1) == "1.0000"
+    assert chart.chart_prob_key(None) is None
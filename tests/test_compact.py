@@ -0,0 +1,67 @@
+import copy
+
+import numpy as np
+import pytest
+
+import compact
+from artifact import load_artifact, save_artifact
+from scorer import compile_pipeline
+
+PROBES = ["Congratulations you won a free prize, call now!", "are we still on for lunch",
+          "claim claim claim your cash", "nothing known here xyzzy", ""]
+
+
+def assert_scorers_match(tmp_path, model, texts):
+    expected = model.predict_proba(texts)[:, 1]
+    compiled = compile_pipeline(model)
+    assert np.max(np.abs([compiled.predict_proba(t) - e for t, e in zip(texts, expected)])) <= 1e-9
+    save_artifact(model, str(tmp_path / "artifact"))
+    scorer, _ = load_artifact(str(tmp_path / "artifact"), verify=True)
+    assert np.max(np.abs([scorer.predict_proba(t) - e for t, e in zip(texts, expected)])) <= 1e-9
+
+
+def test_pruning_keeps_only_weighty_terms_with_their_idf(corpus, pipeline):
+    texts, labels = corpus
+    below  = 0.2
+    pruned = compact.prune(pipeline, texts, labels, below)
+    old    = pipeline.named_steps["tfidf"]
+    coef   = pipeline.named_steps["clf"].coef_[0]
+    kept   = [t for t, c in zip(old.get_feature_names_out(), coef) if abs(c) >= below]
+    vocab  = pruned.named_steps["tfidf"].vocabulary_
+    assert 0 < len(kept) < len(old.vocabulary_)
+    assert sorted(vocab, key=vocab.get) == kept   # renumbered in their sorted order
+    for term in kept:
+        assert pruned.named_steps["tfidf"].idf_[vocab[term]] == old.idf_[old.vocabulary_[term]]
+    assert compact.n_weights(pruned) == len(kept)
+    with pytest.raises(ValueError, match="no term"):
+        compact.prune(pipeline, texts, labels, below=1e9)
+
+
+def test_float32_model_still_scores_like_its_pipeline(tmp_path, corpus, pipeline):
+    texts, labels = corpus
+    model = compact.compact_model(copy.deepcopy(pipeline), texts, labels, "prune", below=0.1)
+    assert model.named_steps["tfidf"].idf_.dtype == np.float32
+    assert model.named_steps["clf"].coef_.dtype == np.float32
+    assert not hasattr(model.named_steps["tfidf"], "stop_words_")
+    assert (model.predict(texts) == pipeline.predict(texts)).mean() >= 0.9
+    assert_scorers_match(tmp_path, model, texts + PROBES)
+
+
+def test_hashed_model_has_a_fixed_width_and_no_vocabulary(tmp_path, corpus, pipeline):
+    texts, labels = corpus
+    model = compact.compact_model(pipeline, texts, labels, "hashed", n_features=2 ** 10)
+    assert compact.n_weights(model) == 2 ** 10
+    assert not hasattr(model.named_steps["hash"], "vocabulary_")
+    assert_scorers_match(tmp_path, model, texts + PROBES)
+
+
+def test_unknown_mode_is_refused(corpus, pipeline):
+    texts, labels = corpus
+    with pytest.raises(ValueError, match="mode must be one of"):
+        compact.compact_model(pipeline, texts, labels, "tiny")
+
+
+def test_disk_size_adds_up_an_artifact_directory(tmp_path, pipeline):
+    save_artifact(pipeline, str(tmp_path / "artifact"))
+    files = list((tmp_path / "artifact").iterdir())
+    assert compact.disk_size(str(tmp_path / "artifact")) == sum(f.stat().st_size for f in files)
@@ -0,0 +1,139 @@
+import json
+import os
+
+import pytest
+import requests
+
+import dataset
+from dataset import DatasetCache, DatasetError, corpus_file, iter_tsv, load_corpus, parse_tsv
+
+URL = "https://example.com/sms.tsv"
+RAW = ("ham\tAre we still on for lunch?\n"
+       "spam\tWIN a free prize, call now!\n"
+       "ham\tSee you at home, love you\n"
+       "oops\tan unknown label is dropped\n"
+       "spam\tURGENT: claim your £2000 award\n").encode("utf-8")
+
+
+class FakeResponse:
+    def __init__(self, content):
+        self.content = content
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        step = 7   # small blocks, so the hash has to be carried across them
+        return (self.content[i:i + step] for i in range(0, len(self.content), step))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return DatasetCache(str(tmp_path / "data_cache"))
+
+
+@pytest.fixture
+def downloads(monkeypatch):
+    """Every requests.get() call, answered with RAW."""
+    calls = []
+    monkeypatch.setattr(requests, "get", lambda url, **kw: calls.append(url) or FakeResponse(RAW))
+    return calls
+
+
+def assert_same(df, expected):
+    assert df["label"].tolist() == expected["label"].tolist()
+    assert df["text"].tolist() == expected["text"].tolist()
+
+
+# ── URLs ─────────────────────────────────────────────────────────
+
+def test_url_is_downloaded_once_then_read_from_the_cache(cache, downloads):
+    first = load_corpus(URL, cache=cache)
+    assert_same(first, parse_tsv(RAW))
+    assert first["label"].tolist() == [0, 1, 0, 1]
+    assert_same(load_corpus(URL, cache=cache), first)
+    assert_same(load_corpus(URL, offline=True, cache=cache), first)
+    assert downloads == [URL]
+    load_corpus(URL, refresh=True, cache=cache)
+    assert downloads == [URL, URL]
+
+
+def test_offline_refuses_an_uncached_url(cache, downloads):
+    with pytest.raises(DatasetError, match="--offline"):
+        load_corpus(URL, offline=True, cache=cache)
+    with pytest.raises(DatasetError):
+        corpus_file(URL, offline=True, cache=cache)
+    assert downloads == []
+
+
+def test_pinned_hash_loads_only_that_content(cache, downloads):
+    digest = cache.store(RAW)
+    assert_same(load_corpus(f"sha256:{digest}", cache=cache), parse_tsv(RAW))
+    with pytest.raises(DatasetError, match="not in"):
+        load_corpus("sha256:" + "0" * 64, cache=cache)
+    assert downloads == []
+
+
+# ── local files ──────────────────────────────────────────────────
+
+def test_unchanged_local_file_is_not_read_again(tmp_path, cache, capsys):
+    path = tmp_path / "sms.tsv"
+    path.write_bytes(RAW)
+    assert_same(load_corpus(str(path), cache=cache), parse_tsv(RAW))
+    assert "Reading dataset" in capsys.readouterr().out
+    assert_same(load_corpus(str(path), cache=cache), parse_tsv(RAW))
+    assert "Using cached dataset" in capsys.readouterr().out
+
+    path.write_bytes(RAW + b"ham\tone more row\n")   # a new size: hashed again
+    assert len(load_corpus(str(path), cache=cache)) == 5
+    assert "Reading dataset" in capsys.readouterr().out
+
+
+def test_missing_local_file_is_a_dataset_error(tmp_path, cache):
+    with pytest.raises(DatasetError, match="not found"):
+        load_corpus(str(tmp_path / "nope.tsv"), cache=cache)
+
+
+# ── the parsed copy ──────────────────────────────────────────────
+
+@pytest.mark.parametrize("damage", ["format", "texts"])
+def test_stale_or_damaged_parsed_copy_is_rebuilt_from_raw(cache, damage, capsys):
+    digest = cache.store(RAW)
+    path   = os.path.join(cache.root, digest)
+    if damage == "format":
+        with open(os.path.join(path, "parsed.json"), "w", encoding="utf-8") as f:
+            json.dump({"format": dataset.PARSE_FORMAT - 1, "rows": 4}, f)
+    else:
+        with open(os.path.join(path, "texts.txt"), "a", encoding="utf-8") as f:
+            f.write("trailing junk")
+    assert_same(cache.load(digest), parse_tsv(RAW))
+    assert "Rebuilding parsed copy" in capsys.readouterr().out
+    assert_same(cache.load(digest), parse_tsv(RAW))   # rewritten: the next load is clean
+    assert "Rebuilding" not in capsys.readouterr().out
+
+
+# ── streaming ────────────────────────────────────────────────────
+
+def test_streamed_download_matches_the_in_memory_one(tmp_path, downloads):
+    streamed = DatasetCache(str(tmp_path / "streamed"))
+    path     = corpus_file(URL, cache=streamed)
+    with open(path, "rb") as f:
+        assert f.read() == RAW
+    assert os.path.basename(os.path.dirname(path)) == streamed.lookup(URL)
+    assert streamed.lookup(URL) == DatasetCache(str(tmp_path / "other")).store(RAW)
+    assert_same(streamed.load(streamed.lookup(URL)), parse_tsv(RAW))   # parsed on first load()
+
+
+def test_iter_tsv_chunks_add_up_to_parse_tsv(tmp_path):
+    path = tmp_path / "sms.tsv"
+    path.write_bytes(RAW)
+    chunks = list(iter_tsv(str(path), chunk_size=2))
+    assert len(chunks) == 3
+    assert [t for c in chunks for t in c["text"]] == parse_tsv(RAW)["text"].tolist()
+    assert [y for c in chunks for y in c["label"]] == parse_tsv(RAW)["label"].tolist()
@@ -0,0 +1,115 @@
+import json
+import time
+
+import pytest
+
+from feedback import FeedbackWriter, feedback_files
+from feedback_store import FeedbackStore
+
+
+def wait_written(writer, n, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while writer.written < n:
+        assert time.monotonic() < deadline, f"only {writer.written} of {n} records written"
+        time.sleep(0.005)
+
+
+def logged_texts(path):
+    return [json.loads(line)["text"] for f in feedback_files(path) for line in open(f)]
+
+
+# ── FeedbackWriter ───────────────────────────────────────────────
+
+def test_writer_rotates_and_keeps_every_record_in_order(tmp_path):
+    path   = str(tmp_path / "user_data.jsonl")
+    writer = FeedbackWriter(path, max_batch=1, max_delay=0.0, fsync="batch", max_bytes=200)
+    texts  = [f"message number {i}" for i in range(30)]
+    for t in texts:
+        writer.submit({"text": t, "label": 1})
+    writer.close()
+
+    assert writer.rotations > 0
+    files = feedback_files(path)
+    assert len(files) == writer.rotations + 1
+    assert logged_texts(path) == texts
+
+
+def test_writer_reopens_the_log_after_another_writer_rotates_it(tmp_path):
+    path  = str(tmp_path / "user_data.jsonl")
+    line  = len(json.dumps({"text": "first", "label": 0}) + "\n")
+    a     = FeedbackWriter(path, max_delay=0.0, fsync="batch")
+    b     = FeedbackWriter(path, max_delay=0.0, fsync="batch", max_bytes=line + 1)   # rotates on its next write
+    try:
+        a.submit({"text": "first", "label": 0})
+        wait_written(a, 1)                       # a now holds an fd on the file
+        b.submit({"text": "second", "label": 1})
+        wait_written(b, 1)                       # b rotated it away
+        a.submit({"text": "third", "label": 1})
+        wait_written(a, 2)                       # a must write to the new file, not the segment
+    finally:
+        a.close()
+        b.close()
+
+    segment, live = feedback_files(path)
+    assert [json.loads(l)["text"] for l in open(segment)] == ["first"]
+    assert [json.loads(l)["text"] for l in open(live)] == ["second", "third"]
+    assert logged_texts(path) == ["first", "second", "third"]
+
+
+# ── FeedbackStore ────────────────────────────────────────────────
+
+def write_log(path, records):
+    with open(path, "a", encoding="utf-8") as f:
+        for text, label, ts in records:
+            f.write(json.dumps({"text": text, "label": label, "ts": ts}) + "\n")
+
+
+@pytest.fixture
+def store(tmp_path):
+    s = FeedbackStore(str(tmp_path / "feedback.db"))
+    yield s
+    s.close()
+
+
+def test_store_keeps_one_row_per_text(tmp_path, store):
+    log = str(tmp_path / "user_data.jsonl")
+    write_log(log, [
+        ("win a prize", 1, "2026-01-01T00:00:01"),
+        ("win a prize", 1, "2026-01-01T00:00:02"),
+        ("lunch?",      0, "2026-01-01T00:00:03"),
+        ("win a prize", 0, "2026-01-01T00:00:04"),
+    ])
+    counts = store.import_log(log)
+    assert counts == {"lines": 4, "records": 4, "new": 2}
+    assert store.stats() == {"texts": 2, "labels": 4, "duplicates": 2, "conflicting": 1, "seq": 4}
+    assert dict(store.examples("last")) == {"win a prize": 0, "lunch?": 0}
+    assert dict(store.examples("majority")) == {"win a prize": 1, "lunch?": 0}
+
+
+def test_store_import_resumes_without_counting_twice(tmp_path, store):
+    log = str(tmp_path / "user_data.jsonl")
+    write_log(log, [("win a prize", 1, "2026-01-01T00:00:01")])
+    store.import_log(log)
+    assert store.import_log(log)["records"] == 0
+    write_log(log, [("win a prize", 1, "2026-01-01T00:00:02")])
+    assert store.import_log(log)["records"] == 1
+    assert store.stats()["labels"] == 2
+    assert store.count() == 1
+
+
+def test_store_forget_and_purge(tmp_path, store):
+    log = str(tmp_path / "user_data.jsonl")
+    write_log(log, [("a", 1, "2026-01-01T00:00:01"), ("b", 0, "2026-01-01T00:00:02"),
+                    ("c", 1, "2026-01-01T00:00:03")])
+    store.import_log(log)
+    assert store.forget([" a ", "missing"]) == 1
+    assert store.import_log(log)["records"] == 0   # forgotten lines are not read back in
+    assert [t for t, _ in store.examples()] == ["b", "c"]
+    assert store.purge() == 2
+    assert store.count() == 0
+
+
+def test_store_examples_order_is_stable_on_ties(store):
+    for text in ("x", "y", "z", "w"):
+        store.add(text, 1, ts=100.0)
+    assert [t for t, _ in store.examples()] == ["x", "y", "z", "w"]
@@ -0,0 +1,20 @@
+from gibberish import BATCH_MIN, gibberish_flags, looks_like_gibberish
+
+TEXTS = [
+    "qwrtp zxcvbnm", "asdfghjkl qwrtypsdf", "rfvwgsedfsw efwdwqefd", "hjkl bnmv cxzq",
+    "Hey, are we still on for lunch?", "WIN a FREE prize now!!!", "ok", "", "   ", "12345 67890",
+    "brrr", "rhythm myths", "xkcd ok fine", "zzzz zzzz hello there", "strengths", "Grrr. Pfft. Hmm.",
+    "naïve café crème brûlée", "ünïcödé wörds hërë", "https://bit.ly/xyz qwrtzp", "a e i o u",
+    "tsktsk psst shh", "Call 0800 123 456 now", "lol", "mmm nth sh", "bcdfg hello world",
+]
+
+
+def test_batch_flags_match_single_calls():
+    texts = TEXTS * (BATCH_MIN // len(TEXTS) + 2)   # large enough for the vectorized path
+    assert len(texts) >= BATCH_MIN
+    assert gibberish_flags(texts) == [looks_like_gibberish(t) for t in texts]
+
+
+def test_small_batch_flags_match_single_calls():
+    texts = TEXTS[:BATCH_MIN - 1]
+    assert gibberish_flags(texts) == [looks_like_gibberish(t) for t in texts]
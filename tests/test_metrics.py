@@ -0,0 +1,86 @@
+import random
+import threading
+from bisect import bisect_left
+
+import pytest
+
+import metrics
+
+
+def expected_counts(values):
+    counts = [0] * (len(metrics.BUCKETS) + 1)
+    for v in values:
+        counts[bisect_left(metrics.BUCKETS, v)] += 1
+    return counts
+
+
+def test_buffered_histogram_matches_bisect_across_threads():
+    rng    = random.Random(0)
+    values = [rng.lognormvariate(-9, 2) for _ in range(5000)] + list(metrics.BUCKETS) + [100.0]
+    h      = metrics.Histogram("x")
+
+    def work(part):
+        for v in part:
+            h.observe(v)
+
+    threads = [threading.Thread(target=work, args=(values[i::3],)) for i in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    snap = h.snapshot()
+    assert snap["counts"] == expected_counts(values)
+    assert abs(snap["sum"] - sum(values)) < 1e-9
+
+
+def test_values_still_buffered_are_read():
+    h = metrics.Histogram("x")
+    for _ in range(metrics.FLUSH_EVERY - 1):
+        h.observe(2e-6)
+    assert h.snapshot()["count"] == metrics.FLUSH_EVERY - 1
+    h.observe(2e-6)   # this one flushes
+    assert h.snapshot()["count"] == metrics.FLUSH_EVERY
+    assert h.snapshot()["counts"] == expected_counts([2e-6] * metrics.FLUSH_EVERY)
+
+
+def test_request_timer_counts_each_request(client, app_module):
+    resp = client.post("/predict", json={"text": "win a free prize now"})
+    assert "Server-Timing" not in resp.headers   # off by default
+    timer = app_module.app.wsgi_app
+    assert isinstance(timer, metrics.RequestTimer)
+    before = timer.latency["/predict"].snapshot()["count"]
+    client.post("/predict", json={"text": "win a free prize now"})
+    assert timer.latency["/predict"].snapshot()["count"] == before + 1
+
+
+def test_server_timing_header_lists_the_request_stages(monkeypatch):
+    monkeypatch.setattr(metrics, "_tracing", False)   # restored after the test
+    registry = metrics.Registry()
+    stage    = registry.histogram("stage_seconds", "Stages", "stage", "transform")
+
+    def wsgi_app(environ, start_response):
+        stage.observe(0.002)
+        stage.observe(0.001)
+        start_response("404 NOT FOUND", [])
+        return [b""]
+
+    timer   = metrics.RequestTimer(wsgi_app, registry, {"/predict": "predict"}, server_timing=True)
+    headers = {}
+    timer({"PATH_INFO": "/nowhere"}, lambda status, h, exc_info=None: headers.update(h))
+    parts = dict(part.split(";dur=") for part in headers["Server-Timing"].split(", "))
+    assert float(parts["transform"]) == pytest.approx(3.0)
+    assert float(parts["total"]) >= 0
+    assert timer.other.snapshot()["count"] == 1
+    assert timer.errors["404"].value == 1
+
+
+def test_prometheus_buckets_are_cumulative():
+    registry = metrics.Registry()
+    h = registry.histogram("x_seconds", "X", "stage", 'a"b')
+    for v in (2e-6, 2e-6, 1e-3, 100.0):
+        h.observe(v)
+    text    = registry.prometheus()
+    buckets = [int(line.rsplit(" ", 1)[1]) for line in text.splitlines() if line.startswith("x_seconds_bucket")]
+    assert buckets == sorted(buckets) and buckets[-1] == 4
+    assert 'x_seconds_count{stage="a\\"b"} 4' in text
+    assert buckets[-2] == 3   # 100 s is past the last bound: only +Inf counts it
@@ -0,0 +1,63 @@
+import json
+
+import pytest
+
+import online
+import train
+
+
+def write_log(path, records):
+    with open(path, "a", encoding="utf-8") as f:
+        for i, (text, label) in enumerate(records):
+            f.write(json.dumps({"text": text, "label": label, "ts": f"2026-01-01T00:00:{i:02d}"}) + "\n")
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch, corpus):
+    """train.py run in a temp directory, with the incremental model bootstrapped on `corpus`."""
+    monkeypatch.chdir(tmp_path)
+    texts, labels = corpus
+    write_log(train.USER_DATA_FILE, [("already in the full retrain", 0)])
+    _, _, seq = train.load_user_feedback(train.USER_DATA_FILE)
+    train.bootstrap_online(texts, labels, texts, labels, seq)
+    return tmp_path
+
+
+def test_bootstrap_checkpoints_the_store_seq(workdir):
+    checkpoint = online.load_checkpoint()
+    assert checkpoint["seq"] == 1 and checkpoint["records"] == 0
+    assert "position" not in checkpoint
+
+
+def test_incremental_trains_on_each_new_text_once(workdir, capsys):
+    clicks = [(f"claim your prize code {i} now", 1) for i in range(5)] * 3 + [("lunch at noon?", 0)] * 4
+    write_log(train.USER_DATA_FILE, clicks)
+    train.incremental()
+    checkpoint = online.load_checkpoint()
+    assert checkpoint["records"] == 6          # distinct texts, not 19 clicks
+    assert checkpoint["seq"] == 1 + len(clicks)
+    assert "Read 6 newly labeled texts" in capsys.readouterr().out
+
+    train.incremental()                        # nothing new: the checkpoint holds
+    assert "No new feedback" in capsys.readouterr().out
+    assert online.load_checkpoint()["records"] == 6
+
+
+def test_relabeled_text_is_trained_again_with_its_new_label(workdir, monkeypatch):
+    write_log(train.USER_DATA_FILE, [("is this a prize draw", 1)])
+    train.incremental()
+    seen = []
+    monkeypatch.setattr(online, "partial_update", lambda model, x, y, **kw: seen.append((x, y)))
+    write_log(train.USER_DATA_FILE, [("is this a prize draw", 0)])
+    train.incremental()
+    assert seen == [(["is this a prize draw"], [0])]
+
+
+def test_position_checkpoint_is_refused(workdir):
+    checkpoint = online.load_checkpoint()
+    checkpoint["position"] = {"inode": 1, "dev": 1, "offset": 0}
+    del checkpoint["seq"]
+    with open(online.CHECKPOINT_FILE, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f)
+    with pytest.raises(SystemExit, match="train.py --online"):
+        train.incremental()
@@ -0,0 +1,63 @@
+import threading
+
+import pytest
+
+from parallel import ScoringPool
+from predictor import Predictor
+
+TEXTS = ["Congratulations you won a free prize, call now", "are we still on for lunch?",
+         "URGENT claim your cash award", "see you at home tonight", "qwrtp zxcvbnm",
+         "FREE entry: text WIN to 87121"]
+
+
+def test_rows_are_split_into_chunks_that_each_run_once():
+    pool = ScoringPool(workers=3, chunk_size=4)
+    seen = {}   # first row -> (rows, thread)
+
+    def fn(chunk):
+        seen[chunk[0]] = (list(chunk), threading.current_thread().name)
+
+    pool.run(fn, list(range(18)))
+    assert [rows for rows, _ in sorted(seen.values())] == \
+        [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9, 10, 11], [12, 13, 14, 15], [16, 17]]
+    assert seen[0][1] == threading.current_thread().name   # the caller scores a chunk too
+    assert pool.stats() == {"workers": 3, "chunk_size": 4, "batches": 1, "chunks": 5, "inline": 0}
+    pool.close()
+
+
+def test_small_batches_and_one_worker_run_inline():
+    calls = []
+    ScoringPool(workers=4, chunk_size=10).run(calls.append, list(range(19)))
+    ScoringPool(workers=1, chunk_size=2).run(calls.append, list(range(9)))
+    assert calls == [list(range(19)), list(range(9))]
+
+
+def test_a_failing_chunk_fails_the_batch():
+    pool = ScoringPool(workers=2, chunk_size=2)
+
+    def fn(chunk):
+        if 5 in chunk:
+            raise RuntimeError("chunk failed")
+
+    with pytest.raises(RuntimeError, match="chunk failed"):
+        pool.run(fn, list(range(8)))
+    pool.close()
+
+
+@pytest.mark.parametrize("workers,chunk", [(1, 1000), (2, 3), (4, 5)])
+def test_pooled_scoring_matches_the_calling_thread(pipeline, workers, chunk):
+    p     = Predictor(pipeline, "test")
+    texts = TEXTS * 20
+    pool  = ScoringPool(workers, chunk)
+    got   = p.score_messages(texts, pool=pool)
+    pool.close()
+    for result, expected in zip(got, p.score_messages(texts)):
+        assert result[0] == expected[0] and result[2] == expected[2] and result[3] == expected[3]
+        assert result[1] == pytest.approx(expected[1], abs=1e-12)
+
+
+def test_invalid_sizes_are_refused():
+    with pytest.raises(ValueError):
+        ScoringPool(workers=0)
+    with pytest.raises(ValueError):
+        ScoringPool(chunk_size=0)
@@ -0,0 +1,73 @@
+import pytest
+
+from artifact import save_artifact
+from predictor import Predictor, VECTORIZE_MIN
+
+TEXTS = [
+    "Congratulations you won a free prize, call now", "are we still on for lunch?",
+    "qwrtp zxcvbnm", "URGENT claim your cash award", "ok", "see you at home tonight",
+    "FREE entry: text WIN to 87121", "asdfghjkl qwrtypsdf",
+]
+
+
+def batch_of(size):
+    return (TEXTS * (size // len(TEXTS) + 1))[:size]
+
+
+def spy(monkeypatch, obj, name):
+    """Counts calls to obj.name; returns the list of call argument tuples."""
+    calls, real = [], getattr(obj, name)
+    monkeypatch.setattr(obj, name, lambda *args: calls.append(args) or real(*args))
+    return calls
+
+
+def assert_same_verdicts(p, texts, batched):
+    for text, result in zip(texts, batched):
+        single = p.score_message(text)
+        assert result[0] == single[0]
+        assert abs(result[1] - single[1]) < 1e-9
+        assert result[2] == single[2]
+
+
+@pytest.mark.parametrize("size", [2, VECTORIZE_MIN + 1])   # per-message loop, then one analyze_batch pass
+def test_batch_matches_single_scoring(pipeline, size):
+    p     = Predictor(pipeline, "test")
+    texts = batch_of(size)
+    assert_same_verdicts(p, texts, p.score_messages(texts))
+
+
+def test_artifact_batch_matches_single_scoring(tmp_path, pipeline):
+    save_artifact(pipeline, str(tmp_path / "artifact"))
+    p     = Predictor.load(str(tmp_path / "artifact"))
+    texts = batch_of(VECTORIZE_MIN * 2)
+    assert_same_verdicts(p, texts, p.score_messages(texts))
+
+
+def test_batch_from_vectorize_min_takes_one_sparse_pass(monkeypatch, pipeline):
+    p       = Predictor(pipeline, "test")
+    passes  = spy(monkeypatch, p.scorer, "analyze_batch")
+    singles = spy(monkeypatch, p, "_score_compiled")
+    texts   = [t for t in batch_of(VECTORIZE_MIN * 2) if t not in ("qwrtp zxcvbnm", "asdfghjkl qwrtypsdf")]
+    p.score_messages(texts)
+    assert len(passes) == 1 and len(passes[0][0]) == len(texts)
+    assert singles == []
+
+
+def test_batch_below_vectorize_min_scores_message_by_message(monkeypatch, pipeline):
+    p       = Predictor(pipeline, "test")
+    passes  = spy(monkeypatch, p.scorer, "analyze_batch")
+    singles = spy(monkeypatch, p, "_score_compiled")
+    p.score_messages(["free prize now", "lunch?"])
+    assert passes == []
+    assert len(singles) == 2
+
+
+def test_without_a_compiled_scorer_batches_use_the_pipeline(pipeline):
+    compiled = Predictor(pipeline, "test")
+    p        = Predictor(pipeline, "test")
+    p.scorer = None   # as when compile_pipeline fails
+    texts    = batch_of(5)
+    for got, expected in zip(p.score_messages(texts), compiled.score_messages(texts)):
+        assert got[0] == expected[0] and got[2] == expected[2]
+        assert got[1] == pytest.approx(expected[1], abs=1e-9)
+        assert sorted(got[3]) == sorted(expected[3])   # equal contributions may tie in either order
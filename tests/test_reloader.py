@@ -0,0 +1,94 @@
+import time
+
+import pytest
+from sklearn.pipeline import Pipeline
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+
+from artifact import save_artifact
+from predictor import Predictor
+from reloader import ModelReloader, ModelSlot
+
+CANARIES = [("Congratulations you won a free prize, call now", 1), ("are we still on for lunch?", 0)]
+
+
+def fit(corpus, C):
+    texts, labels = corpus
+    return Pipeline([
+        ("tfidf", TfidfVectorizer(lowercase=True, stop_words="english")),
+        ("clf", LogisticRegression(C=C, max_iter=2000)),
+    ]).fit(texts, labels)
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def served(tmp_path, corpus):
+    """(artifact path, ModelSlot serving the first model, a second model to publish)."""
+    path = str(tmp_path / "model_artifact")
+    save_artifact(fit(corpus, 1.0), path)
+    return path, ModelSlot(Predictor.load(path)), fit(corpus, 10.0)
+
+
+def test_reload_swaps_in_a_new_artifact(served):
+    path, slot, newer = served
+    swaps    = []
+    reloader = ModelReloader(slot, path, on_swap=lambda old, new: swaps.append((old, new)),
+                             canaries=CANARIES)
+    previous = slot.current
+    header   = save_artifact(newer, path)
+
+    status = reloader.reload()
+    assert status["state"] == "idle" and status["reloads"] == 1
+    assert slot.current.version == header["model_version"] != previous.version
+    assert swaps == [(previous, slot.current)]
+
+
+def test_reload_rejects_a_corrupt_artifact_and_keeps_serving(served):
+    path, slot, newer = served
+    reloader = ModelReloader(slot, path, canaries=CANARIES)
+    previous = slot.current
+    save_artifact(newer, path)
+    with open(f"{path}/coef.npy", "r+b") as f:   # flip the last byte of the coefficients
+        f.seek(-1, 2)
+        last = f.read(1)
+        f.seek(-1, 2)
+        f.write(bytes([last[0] ^ 0xFF]))
+
+    status = reloader.reload()
+    assert status["state"] == "failed" and status["failures"] == 1
+    assert "checksum mismatch" in status["error"]
+    assert slot.current is previous
+
+
+def test_reload_rejects_a_model_that_fails_the_canaries(served):
+    path, slot, newer = served
+    flipped  = [(text, 1 - label) for text, label in CANARIES]
+    reloader = ModelReloader(slot, path, canaries=flipped, min_canary_accuracy=0.5)
+    previous = slot.current
+    save_artifact(newer, path)
+
+    status = reloader.reload()
+    assert status["state"] == "failed" and "canary accuracy" in status["error"]
+    assert slot.current is previous
+    assert not reloader.changed()   # the same broken file is not retried
+
+
+def test_broadcast_reloads_the_other_processes(served, tmp_path):
+    path, first, newer = served
+    trigger = str(tmp_path / "model_artifact.reload")
+    second  = ModelSlot(Predictor.load(path))   # another worker, serving the same model
+    here    = ModelReloader(first, path, canaries=CANARIES, trigger_path=trigger)
+    there   = ModelReloader(second, path, canaries=CANARIES, trigger_path=trigger, poll_interval=0.01)
+    there.start_watching(model=False)
+    header  = save_artifact(newer, path)
+
+    assert here.reload(broadcast=True)["state"] == "idle"
+    assert not here.triggered()   # the sender already has the model
+    wait_for(lambda: second.current.version == header["model_version"])
+    assert there.status["reloads"] == 1
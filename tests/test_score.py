@@ -0,0 +1,81 @@
+import csv
+import json
+
+import joblib
+import pytest
+
+import score
+from predictor import Predictor, prediction_json
+
+MESSAGES = ["Congratulations you won a free prize, call now", "are we still on for lunch?", "",
+            "URGENT claim your cash award", "qwrtp zxcvbnm", "see you at home tonight"] * 5
+
+
+@pytest.fixture
+def model_file(tmp_path, pipeline):
+    path = tmp_path / "model.pkl"
+    joblib.dump(pipeline, path)
+    return str(path)
+
+
+def expected_rows(model_file):
+    p = Predictor.load(model_file)
+    return [prediction_json(*p.score_message(t)) if t else {"error": "Missing 'text'"} for t in MESSAGES]
+
+
+# ── input ────────────────────────────────────────────────────────
+
+def test_each_input_format_yields_one_slot_per_message(tmp_path):
+    tsv = tmp_path / "in.tsv"
+    tsv.write_text("ham\tfirst\nspam\tsecond, with a comma\nham\t\n", encoding="utf-8")
+    assert list(score.read_messages(str(tsv), "tsv", 2)) == [["first", "second, with a comma"], [""]]
+
+    jsonl = tmp_path / "in.jsonl"
+    jsonl.write_text('{"text": "a"}\n\nnot json\n["a list"]\n{"label": 1}\n{"text": "b"}\n', encoding="utf-8")
+    assert list(score.read_messages(str(jsonl), "jsonl", 10)) == [["a", "", "", "", "b"]]
+
+    lines = tmp_path / "in.txt"
+    lines.write_bytes(b"one\r\ntwo\n\nthree")
+    assert list(score.read_messages(str(lines), "lines", 10)) == [["one", "two", "", "three"]]
+
+
+def test_format_is_detected_from_the_extension():
+    assert score.detect_format("a.tsv") == "tsv"
+    assert score.detect_format("a.ndjson") == "jsonl"
+    assert score.detect_format("a.txt") == score.detect_format("-") == "lines"
+
+
+# ── end to end ───────────────────────────────────────────────────
+
+@pytest.mark.parametrize("workers,threads", [(1, 1), (2, 1), (1, 3)])
+def test_output_is_in_input_order_and_matches_the_predictor(tmp_path, model_file, workers, threads):
+    src = tmp_path / "in.txt"
+    src.write_text("\n".join(MESSAGES) + "\n", encoding="utf-8")
+    out = tmp_path / "out.jsonl"
+    score.main([str(src), "-o", str(out), "--model", model_file, "--chunk-size", "4",
+                "--workers", str(workers), "--threads", str(threads), "--thread-chunk", "2"])
+    rows = [json.loads(line) for line in out.read_text(encoding="utf-8").splitlines()]
+    assert len(rows) == len(MESSAGES)
+    for got, expected in zip(rows, expected_rows(model_file)):
+        assert got.keys() == expected.keys()
+        if "error" not in got:
+            assert got["label"] == expected["label"]
+            assert got["spam_probability"] == pytest.approx(expected["spam_probability"], abs=1e-9)
+
+
+def test_csv_output_has_a_header_and_one_row_per_message(tmp_path, model_file):
+    src = tmp_path / "in.jsonl"
+    src.write_text("".join(json.dumps({"text": t}) + "\n" for t in MESSAGES), encoding="utf-8")
+    out = tmp_path / "out.csv"
+    score.main([str(src), "-o", str(out), "--model", model_file, "--workers", "1"])
+    with open(out, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert list(rows[0].keys()) == score.CSV_FIELDS
+    assert len(rows) == len(MESSAGES)
+    assert rows[2]["error"] == "Missing 'text'" and rows[2]["label"] == ""
+    assert rows[0]["spam_words"] == " ".join(expected_rows(model_file)[0]["spam_words"])
+
+
+def test_missing_model_is_a_usage_error(tmp_path):
+    with pytest.raises(SystemExit):
+        score.main(["-", "--model", str(tmp_path / "nope.pkl")])
@@ -0,0 +1,98 @@
+import json
+
+import numpy as np
+import pytest
+from sklearn.pipeline import Pipeline
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+
+import online
+from artifact import TermIndex, load_artifact, save_artifact, term_index
+from scorer import compile_pipeline
+
+TOLERANCE = 1e-9   # the P(spam) drift train.py accepts for a compiled scorer
+
+PROBES = [
+    "Congratulations you won a free prize, call now!",
+    "are we still on for lunch",
+    "FREE FREE FREE claim claim",
+    "nothing in the vocabulary here xyzzy",
+    "",
+]
+
+
+def assert_matches(scorer, model, texts):
+    expected = model.predict_proba(texts)[:, 1]
+    got      = np.array([scorer.predict_proba(t) for t in texts])
+    assert np.max(np.abs(got - expected)) <= TOLERANCE
+
+
+@pytest.mark.parametrize("options", [
+    {},
+    {"sublinear_tf": True},
+    {"binary": True},
+    {"norm": "l1"},
+    {"use_idf": False},
+])
+def test_compiled_scorer_matches_pipeline(corpus, options):
+    texts, labels = corpus
+    model = Pipeline([
+        ("tfidf", TfidfVectorizer(lowercase=True, stop_words="english", **options)),
+        ("clf", LogisticRegression(max_iter=2000)),
+    ]).fit(texts, labels)
+    assert_matches(compile_pipeline(model), model, texts + PROBES)
+
+
+def test_artifact_matches_pipeline(tmp_path, corpus, pipeline):
+    texts, _ = corpus
+    save_artifact(pipeline, str(tmp_path / "artifact"))
+    scorer, header = load_artifact(str(tmp_path / "artifact"), verify=True)
+    assert header["vectorizer"] == "tfidf"
+    assert_matches(scorer, pipeline, texts + PROBES)
+
+
+def test_artifact_index_and_search_lookups_agree(tmp_path, corpus, pipeline):
+    texts, _ = corpus
+    save_artifact(pipeline, str(tmp_path / "artifact"))
+    scorer, _ = load_artifact(str(tmp_path / "artifact"))
+    compiled  = compile_pipeline(pipeline)
+    for text in texts + PROBES:
+        score, cols, contribs = scorer.analyze(text)
+        assert score == pytest.approx(scorer.search_analyze(text)[0], abs=1e-12)
+        assert scorer.top_terms(cols, contribs) == compiled.top_terms(*compiled.analyze(text)[1:])
+
+
+def test_term_index_finds_every_term_and_nothing_else():
+    words = sorted({f"{w}{i}" for w in ("ab", "abc", "b", "é") for i in range(600)} | {"ab", "abc", "é"},
+                   key=lambda t: t.encode("utf-8"))
+    keys  = np.array([w.encode("utf-8") for w in words])
+    n     = len(words)
+    index = TermIndex(keys, np.arange(n, dtype=np.float64), np.ones(n), term_index(keys.tolist()))
+    for i, w in enumerate(words):
+        assert index.get(w) == (i, float(i), float(i))
+    for w in ("a", "abcd", "ab6000", "é0é", "zzzz", "x" * 50, ""):   # prefixes, extensions, too long
+        assert index.get(w) is None
+
+
+def test_artifact_without_index_still_loads(tmp_path, corpus, pipeline):
+    texts, _ = corpus
+    path     = tmp_path / "artifact"
+    save_artifact(pipeline, str(path))
+    header   = json.loads((path / "header.json").read_text())
+    header["format_version"] = 2   # written before index.npy existed
+    del header["sha256"]["index.npy"]
+    (path / "index.npy").unlink()
+    (path / "header.json").write_text(json.dumps(header))
+    scorer, _ = load_artifact(str(path), verify=True)
+    assert scorer.weights.index is None
+    assert_matches(scorer, pipeline, texts + PROBES)
+
+
+def test_hashed_model_and_artifact_match_pipeline(tmp_path, corpus):
+    texts, labels = corpus
+    model = online.build_model().fit(texts, labels)
+    assert_matches(compile_pipeline(model), model, texts + PROBES)
+    save_artifact(model, str(tmp_path / "artifact"))
+    scorer, header = load_artifact(str(tmp_path / "artifact"), verify=True)
+    assert header["vectorizer"] == "hashing"
+    assert_matches(scorer, model, texts + PROBES)
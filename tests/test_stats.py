@@ -0,0 +1,62 @@
+import multiprocessing
+import threading
+
+from stats import SessionStats
+
+
+def record_in_a_forked_worker(stats, records):
+    """Runs stats.record() for each (text, pred, prob) in a forked child, which flushes and exits."""
+    def child():
+        for record in records:
+            stats.record(*record)
+        stats.flush()
+
+    proc = multiprocessing.get_context("fork").Process(target=child)
+    proc.start()
+    proc.join(10)
+    assert proc.exitcode == 0
+
+
+def test_counts_from_many_threads_add_up_after_they_exit():
+    stats = SessionStats()
+
+    def work(n):
+        for i in range(n):
+            stats.record(f"msg {i}", i % 2, 0.9 if i % 2 else 0.1)
+
+    threads = [threading.Thread(target=work, args=(100,)) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    work(3)   # a live thread's shard counts too
+    assert stats.snapshot()[0] == {"checked": 803, "spam": 401, "ham": 402}
+    assert len(stats._shards) == 1   # finished threads were folded into _retired
+
+
+def test_history_is_newest_first_and_bounded():
+    stats = SessionStats(history_size=3)
+    for i in range(5):
+        stats.record(f"msg {i}", 1, i / 10)
+    _, history = stats.snapshot()
+    assert [e["text"] for e in history] == ["msg 4", "msg 3", "msg 2"]
+    assert history[0]["prob"] == "0.400"
+    assert stats.last_prob() == 0.4
+    assert SessionStats().last_prob() is None
+
+
+def test_workers_of_one_run_see_each_others_counts(tmp_path):
+    db    = str(tmp_path / "stats.db")
+    stats = SessionStats(db_path=db, read_ttl=0, run_id="run-1")
+    record_in_a_forked_worker(stats, [("from the other worker", 1, 0.97)] * 2)
+    stats.record("from this worker", 0, 0.02)
+    counts, history = stats.snapshot()
+    assert counts == {"checked": 3, "spam": 2, "ham": 1}
+    assert [e["text"] for e in history] == ["from this worker"] + ["from the other worker"] * 2
+
+
+def test_earlier_runs_are_not_counted(tmp_path):
+    db = str(tmp_path / "stats.db")
+    record_in_a_forked_worker(SessionStats(db_path=db, run_id="yesterday"), [("old", 1, 0.9)])
+    stats = SessionStats(db_path=db, read_ttl=0, run_id="today")
+    assert stats.snapshot() == ({"checked": 0, "spam": 0, "ham": 0}, [])
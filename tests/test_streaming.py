@@ -0,0 +1,99 @@
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import TfidfTransformer
+
+import streaming
+from artifact import load_artifact, save_artifact
+from scorer import compile_pipeline
+
+N_FEATURES = 2 ** 12
+
+
+@pytest.fixture
+def corpus_tsv(tmp_path, corpus):
+    """The shared corpus, repeated with numbered variants, as a label<TAB>text file."""
+    texts, labels = corpus
+    path = tmp_path / "sms.tsv"
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(6):
+            for text, label in zip(texts, labels):
+                f.write(f"{'spam' if label else 'ham'}\t{text} {i}\n")
+    return str(path)
+
+
+def test_chunks_number_rows_across_corpus_and_feedback(corpus_tsv):
+    feedback = [(f"feedback text {i}", i % 2) for i in range(7)]
+    got      = list(streaming.chunks(corpus_tsv, iter(feedback), chunk_size=50))
+    starts   = [start for start, _, _ in got]
+    sizes    = [len(labels) for _, _, labels in got]
+    assert starts == [0] + list(np.cumsum(sizes)[:-1])
+    assert sizes == [50, 50, 8, 7]    # 108 corpus rows, then the feedback in its own chunk
+    assert got[-1][1] == [t for t, _ in feedback]
+    assert got[-1][2].tolist() == [y for _, y in feedback]
+
+
+def test_reservoir_holdout_keeps_each_class_share():
+    reservoir = streaming.StratifiedReservoir(capacity=30, seed=1)
+    labels    = np.array([1] * 200 + [0] * 800)
+    texts     = [f"row {i}" for i in range(len(labels))]
+    for start in range(0, len(labels), 64):
+        reservoir.offer(start, texts[start:start + 64], labels[start:start + 64])
+    assert reservoir.counts == {0: 800, 1: 200}
+
+    ids, sample_texts, sample_labels = reservoir.sample(fraction=0.05, limit=30)
+    assert len(ids) == 30 and len(set(ids.tolist())) == 30
+    assert sample_labels.tolist().count(1) == 6   # 20 % of the rows, 20 % of the holdout
+    assert all(sample_texts[k] == texts[i] for k, i in enumerate(ids))
+    assert all(labels[i] == y for i, y in zip(ids, sample_labels))
+
+
+def test_reservoir_sample_is_the_same_for_any_chunking():
+    labels = np.array([0, 1] * 300)
+    texts  = [str(i) for i in range(len(labels))]
+
+    def sample(chunk):
+        reservoir = streaming.StratifiedReservoir(capacity=40, seed=3)
+        for start in range(0, len(labels), chunk):
+            reservoir.offer(start, texts[start:start + chunk], labels[start:start + chunk])
+        return sorted(reservoir.sample(fraction=0.1, limit=40)[0].tolist())
+
+    # random keys are drawn in row order, so the sample depends on the seed only
+    assert sample(600) == sample(37) == sample(1)
+
+
+def test_streamed_model_never_trains_on_its_holdout(corpus_tsv, monkeypatch):
+    trained = []
+    real    = streaming.SGDClassifier.partial_fit
+    monkeypatch.setattr(streaming.SGDClassifier, "partial_fit",
+                        lambda self, X, y, **kw: trained.append(X.shape[0]) or real(self, X, y, **kw))
+    model, hold_x, hold_y, stats = streaming.fit_streaming(
+        lambda: streaming.chunks(corpus_tsv, chunk_size=25), n_features=N_FEATURES, epochs=2)
+    assert stats["rows"] == 108 and stats["chunks"] == 5
+    assert stats["holdout"] == len(hold_x) == round(0.2 * 108)
+    assert sum(trained) == 2 * (108 - stats["holdout"])
+    assert set(hold_y.tolist()) == {0, 1}
+    assert stats["alpha"] == pytest.approx(1 / (108 - stats["holdout"]))
+
+
+def test_streamed_idf_comes_from_the_training_rows_only(corpus_tsv):
+    model, hold_x, _, _ = streaming.fit_streaming(
+        lambda: streaming.chunks(corpus_tsv, chunk_size=25), n_features=N_FEATURES, epochs=1)
+    held_out = set(hold_x)
+    rows     = [t for _, texts, _ in streaming.chunks(corpus_tsv) for t in texts]
+    train    = [t for t in rows if t not in held_out]   # every corpus line is distinct
+    X        = model.named_steps["hash"].transform(train)
+    expected = TfidfTransformer(smooth_idf=True).fit(X).idf_
+    assert np.allclose(model.named_steps["idf"].idf_, expected)
+
+
+def test_streamed_model_compiles_and_exports(tmp_path, corpus_tsv, corpus):
+    model, _, _, _ = streaming.fit_streaming(
+        lambda: streaming.chunks(corpus_tsv, chunk_size=40), n_features=N_FEATURES, epochs=2)
+    texts, _ = corpus
+    expected = model.predict_proba(texts)[:, 1]
+    compiled = compile_pipeline(model)
+    assert np.allclose([compiled.predict_proba(t) for t in texts], expected, atol=1e-9)
+    save_artifact(model, str(tmp_path / "artifact"))
+    scorer, header = load_artifact(str(tmp_path / "artifact"), verify=True)
+    assert header["vectorizer"] == "hashing_idf"
+    assert np.allclose([scorer.predict_proba(t) for t in texts], expected, atol=1e-9)
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+from sklearn.metrics import accuracy_score, f1_score
+from sklearn.model_selection import StratifiedKFold
+from sklearn.pipeline import Pipeline
+
+import tune
+
+
+@pytest.mark.parametrize("vec", tune.vectorizer_settings(), ids=lambda v: tune.describe(v, {"penalty": "", "C": 0}))
+def test_tfidf_from_cached_counts_equals_a_fitted_vectorizer(corpus, vec):
+    texts, _ = corpus
+    train, test = texts[::2], texts[1::2]
+    analyze = tune.make_vectorizer({"ngram_range": vec["ngram_range"]}).build_analyzer()
+    counts  = tune._count_fold([analyze(t) for t in train], [analyze(t) for t in test])
+    X_train, X_test, names, _ = tune.tfidf_variant(counts[:2], counts[2], vec["min_df"], vec["sublinear_tf"])
+
+    reference = tune.make_vectorizer(vec).fit(train)
+    assert names.tolist() == reference.get_feature_names_out().tolist()
+    assert np.allclose(X_train.toarray(), reference.transform(train).toarray())
+    assert np.allclose(X_test.toarray(), reference.transform(test).toarray())
+
+
+def test_search_scores_every_candidate_like_a_plain_cross_validation(corpus):
+    texts, labels = corpus
+    results, timings = tune.run_search(texts, labels, folds=2, jobs=2)
+    assert len(results) == len(tune.vectorizer_settings()) * len(tune.CLASSIFIER_GRID)
+    assert len({r["candidate"] for r in results}) == len(results)
+    assert [(-r["f1"], -r["accuracy"]) for r in results] == sorted((-r["f1"], -r["accuracy"]) for r in results)
+    assert set(timings) == {"tokenize_seconds", "count_seconds", "tfidf_seconds", "fit_seconds"}
+
+    current = [r for r in results if r["current"]]
+    assert len(current) == 1
+    vec, clf = tune.CURRENT
+    acc, f1  = [], []
+    y        = np.array(labels)
+    for train, test in StratifiedKFold(n_splits=2, shuffle=True, random_state=0).split(texts, y):
+        model = Pipeline([("tfidf", tune.make_vectorizer(vec)), ("clf", tune.make_classifier(clf))])
+        model.fit([texts[i] for i in train], y[train])
+        preds = model.predict([texts[i] for i in test])
+        acc.append(accuracy_score(y[test], preds))
+        f1.append(f1_score(y[test], preds, pos_label=1, zero_division=0))
+    assert current[0]["accuracy"] == round(float(np.mean(acc)), 4)
+    assert current[0]["f1"] == round(float(np.mean(f1)), 4)
+    assert all(r["latency_us"] > 0 for r in results)
@@ -0,0 +1,101 @@
+import joblib
+import numpy as np
+import pytest
+
+import online
+import streaming
+import train
+import warmstart
+from scorer import compile_pipeline
+
+NEW_SPAM = ["Exclusive bitcoin giveaway, send your wallet address to receive tokens",
+            "Limited crypto airdrop: claim your tokens before the wallet closes"]
+NEW_HAM  = ["The plumber is coming on Thursday morning to fix the sink",
+            "Grandma's birthday dinner moved to Sunday evening"]
+
+
+@pytest.fixture
+def new_split(corpus):
+    """The previous corpus minus one message, plus messages with unseen terms."""
+    texts, labels = corpus
+    return texts[1:] + NEW_SPAM + NEW_HAM, labels[1:] + [1, 1, 0, 0]
+
+
+def test_previous_terms_keep_their_columns(pipeline, new_split):
+    texts, labels = new_split
+    model, stats  = warmstart.warm_fit(pipeline, texts, labels)
+    old_vocab     = pipeline.named_steps["tfidf"].vocabulary_
+    vocab         = model.named_steps["tfidf"].vocabulary_
+    assert all(vocab[t] == col for t, col in old_vocab.items())
+    assert sorted(vocab.values()) == list(range(len(vocab)))
+    assert {"bitcoin", "plumber"} <= set(vocab) - set(old_vocab)
+    assert stats["new_terms"] == len(vocab) - len(old_vocab) == stats["terms"] - len(old_vocab)
+
+
+def test_warm_features_equal_a_cold_fit_renumbered(pipeline, new_split):
+    texts, labels = new_split
+    warm, _ = warmstart.warm_fit(pipeline, texts, labels)
+    cold, _ = warmstart.cold_fit(pipeline, texts, labels)
+    warm_vocab = warm.named_steps["tfidf"].vocabulary_
+    cold_vocab = cold.named_steps["tfidf"].vocabulary_
+    columns    = [warm_vocab[t] for t in cold.named_steps["tfidf"].get_feature_names_out()]
+    probe      = texts + ["congratulations, the award is yours"]   # a term only the old split had
+    X_warm     = warm.named_steps["tfidf"].transform(probe)
+    X_cold     = cold.named_steps["tfidf"].transform(probe)
+    others     = np.setdiff1d(np.arange(X_warm.shape[1]), columns)
+    assert np.allclose(X_warm[:, columns].toarray(), X_cold.toarray())
+    assert not X_warm[:, others].toarray().any()   # dropped terms contribute nothing
+    assert set(warm_vocab) >= set(cold_vocab)
+
+
+def test_dropped_terms_get_zero_idf_and_weight(pipeline, corpus, new_split):
+    texts, labels = new_split
+    model, _ = warmstart.warm_fit(pipeline, texts, labels)
+    tfidf    = model.named_steps["tfidf"]
+    dropped  = set(pipeline.named_steps["tfidf"].vocabulary_) - set(tfidf.build_analyzer()(" ".join(texts)))
+    assert dropped   # the message left out of the split had terms no other message has
+    for term in dropped:
+        col = tfidf.vocabulary_[term]
+        assert tfidf.idf_[col] == 0
+        assert model.named_steps["clf"].coef_[0, col] == 0
+
+
+def test_warm_fit_reaches_the_cold_optimum(pipeline, new_split):
+    texts, labels = new_split
+    warm, _ = warmstart.warm_fit(pipeline, texts, labels)
+    cold, _ = warmstart.cold_fit(pipeline, texts, labels)
+    probe   = texts + ["free prize", "lunch tomorrow?"]
+    assert np.allclose(warm.predict_proba(probe), cold.predict_proba(probe), atol=1e-3)
+    assert warm.named_steps["clf"].warm_start is False   # a later refit starts cold
+
+
+def test_warm_fit_starts_next_to_the_optimum(pipeline, new_split):
+    texts, labels = new_split
+    previous, cold = warmstart.cold_fit(pipeline, texts, labels)
+    _, warm        = warmstart.warm_fit(previous, texts + ["see you soon"], labels + [0])
+    assert warm["iterations"] < cold["iterations"]
+
+
+def test_warm_model_compiles_like_any_pipeline(pipeline, new_split):
+    texts, labels = new_split
+    model, _ = warmstart.warm_fit(pipeline, texts, labels)
+    scorer   = compile_pipeline(model)
+    assert np.allclose([scorer.predict_proba(t) for t in texts], model.predict_proba(texts)[:, 1],
+                       atol=1e-9)
+
+
+@pytest.mark.parametrize("build", [online.build_model, streaming.build_model])
+def test_hashed_models_cannot_be_warm_started(corpus, build):
+    texts, labels = corpus
+    with pytest.raises(ValueError, match="TF-IDF"):
+        warmstart.warm_fit(build().fit(texts, labels), texts, labels)
+
+
+def test_train_refuses_to_warm_start_without_a_usable_model(tmp_path, monkeypatch, corpus):
+    monkeypatch.chdir(tmp_path)
+    texts, labels = corpus
+    with pytest.raises(SystemExit, match="No model.pkl"):
+        train.warm_train(texts, labels, texts, labels)
+    joblib.dump(online.build_model().fit(texts, labels), train.MODEL_FILE)
+    with pytest.raises(SystemExit, match="Cannot warm-start"):
+        train.warm_train(texts, labels, texts, labels)
@@ -1,15 +1,30 @@
 """
 train.py
-- Downloads a real public SMS spam dataset (no CSV files needed from you)
-- Optionally adds your app's user feedback (user_data.jsonl)
+- Downloads a real public SMS spam dataset (no CSV files needed from you),
+  once: later runs read the local cache (see dataset.py; --offline never downloads)
+- Optionally adds your app's user feedback (user_data.jsonl), deduplicated
+  through feedback.db (see feedback_store.py)
 - Trains TF-IDF + Logistic Regression
 - Saves model to model.pkl
+- Exports a memory-mappable serving artifact to model_artifact/ (see artifact.py)
+- --compact prune|hashed ships a pruned float32 (or hashed) model instead and
+  reports accuracy, size and per-worker RSS against the full one (see compact.py)
+- --online also (re)starts the incremental model in online_model/ (see
+  online.py); `python train.py --incremental` then learns from new feedback only
+- --warm-start starts from the previous model.pkl (its vocabulary and
+  weights, see warmstart.py) instead of from scratch
+- --stream trains out of core instead (hashed TF-IDF + SGD in chunks, see
+  streaming.py) for corpora that do not fit in memory
+- --forget-feedback FILE / --purge-feedback remove labels from feedback.db,
+  the source of truth for feedback once imported (editing the log does not)
 """
 
-import io
-import json
+import os
+import time
+import shutil
+import argparse
+import tempfile
 import joblib
-import requests
 import pandas as pd
 
 from sklearn.model_selection import train_test_split
@@ -18,72 +33,74 @@ from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import accuracy_score, classification_report
 
+import online
+import streaming
+import warmstart
+import compact as compacting
+from dataset import load_corpus, corpus_file, DatasetError
+from artifact import save_artifact, load_artifact
+from feedback_store import FeedbackStore, POLICIES
+from predictor import model_file_version, SCORER_TOLERANCE
+from scorer import max_pipeline_diff
+
 MODEL_FILE = "model.pkl"
+MODEL_ARTIFACT = "model_artifact"
 USER_DATA_FILE = "user_data.jsonl"
+FEEDBACK_DB = "feedback.db"
 
-# Public dataset (TSV): label + text
-DATA_URL = "https://raw.githubusercontent.com/justmarkham/pycon-2016-tutorial/master/data/sms.tsv"
-
-
-def load_user_feedback(path: str):
-
-    texts = []
-    labels = []
 
+def load_user_feedback(path: str, policy: str = "last"):
+    """
+    (texts, labels, seq): distinct feedback texts with one label each, and
+    the store seq they were read at. New log lines are imported into
+    FEEDBACK_DB first (see feedback_store.py); repeated labels for the same
+    text are resolved by `policy` ("last" or "majority").
+    """
+    store = FeedbackStore(FEEDBACK_DB)
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-
-                try:
-                    row = json.loads(line)
-                except json.JSONDecodeError:
-                    continue  # skip corrupted lines
+        imported = store.import_log(path)
+        if imported["records"]:
+            print(f"Imported {imported['records']} feedback records into {FEEDBACK_DB} "
+                  f"({imported['new']} new texts)")
+        seq = store.seq   # the incremental model resumes from here; taken first so no label is skipped
+        texts, labels = [], []
+        for text, label in store.examples(policy):
+            texts.append(text)
+            labels.append(label)
+        stats = store.stats()
+        if stats["duplicates"]:
+            print(f"Feedback: {stats['labels']} labels on {stats['texts']} distinct texts "
+                  f"({stats['conflicting']} with conflicting labels, resolved by {policy})")
+    finally:
+        store.close()
+    return texts, labels, seq
 
-                text = str(row.get("text", "")).strip()
-                label = row.get("label", None)
-
-                if not text:
-                    continue
-                if label not in (0, 1):
-                    continue
-
-                texts.append(text)
-                labels.append(int(label))
-
-    except FileNotFoundError:
-        pass
 
-    return texts, labels
-
-
-def main():
-    # 1) Download dataset
-    print("Downloading dataset from source...")
-    resp = requests.get(DATA_URL, timeout=30)
-    resp.raise_for_status()
-
-    # Dataset is tab-separated with two columns: label \t text
-    raw = resp.text
-    df = pd.read_csv(io.StringIO(raw), sep="\t", names=["label", "text"])
-
-    # Convert "ham"/"spam" -> 0/1
-    df["label"] = df["label"].map({"ham": 0, "spam": 1})
-    df["text"] = df["text"].astype(str)
-
-    # Drop any weird rows
-    df = df.dropna(subset=["label", "text"])
+def load_training_data(data_source=None, offline=False, refresh_data=False, feedback_policy="last"):
+    """(DataFrame(label, text) of the dataset plus user feedback, the feedback store seq)."""
+    # 1) Load dataset (label \t text, ham/spam -> 0/1), from the local cache when possible
+    try:
+        df = load_corpus(data_source, offline=offline, refresh=refresh_data)
+    except DatasetError as e:
+        raise SystemExit(f"Dataset unavailable: {e}")
+    print(f"Dataset: {len(df)} messages")
 
     # 2) Load user feedback and append it (optional)
-    user_texts, user_labels = load_user_feedback(USER_DATA_FILE)
+    user_texts, user_labels, feedback_seq = load_user_feedback(USER_DATA_FILE, feedback_policy)
     if user_texts:
         print(f"Loaded {len(user_texts)} user-labeled examples from {USER_DATA_FILE}")
         df_user = pd.DataFrame({"text": user_texts, "label": user_labels})
         df = pd.concat([df, df_user], ignore_index=True)
     else:
         print("No user feedback found yet (user_data.jsonl not present or empty).")
+    return df, feedback_seq
+
+
+def main(data_source=None, offline=False, refresh_data=False, feedback_policy="last",
+         compact=None, prune_below=compacting.PRUNE_BELOW, hash_features=compacting.HASH_FEATURES,
+         warm_start=False, compare_cold=False, online_model=False):
+    # 1-2) Dataset + feedback
+    df, feedback_seq = load_training_data(data_source, offline, refresh_data, feedback_policy)
 
     # 3) Train/test split
     X = df["text"]
@@ -97,15 +114,19 @@ def main():
         stratify=y
     )
 
-    # 4) Build model pipeline
-    model = Pipeline([
-        ("tfidf", TfidfVectorizer(lowercase=True, stop_words="english")),
-        ("clf", LogisticRegression(max_iter=2000))
-    ])
+    if warm_start:
+        # 4-5) Continue from the previous model's vocabulary and weights
+        model = warm_train(X_train, y_train, X_test, y_test, compare_cold)
+    else:
+        # 4) Build model pipeline
+        model = Pipeline([
+            ("tfidf", TfidfVectorizer(lowercase=True, stop_words="english")),
+            ("clf", LogisticRegression(max_iter=2000))
+        ])
 
-    # 5) Train
-    print("Training model...")
-    model.fit(X_train, y_train)
+        # 5) Train
+        print("Training model...")
+        model.fit(X_train, y_train)
 
     # 6) Evaluate
     preds = model.predict(X_test)
@@ -114,10 +135,304 @@ def main():
     print("\nAccuracy:", round(acc, 4))
     print("\nClassification report:\n", classification_report(y_test, preds))
 
+    # 6b) Optionally ship a compact model instead (compared against this one below)
+    if compact:
+        full_model, full_acc = model, acc
+        model = compacting.compact_model(full_model, X_train, y_train, compact,
+                                         below=prune_below, n_features=hash_features)
+        acc = accuracy_score(y_test, model.predict(X_test))
+        print(f"Compact model ({compact}): accuracy {acc:.4f} "
+              f"({acc - full_acc:+.4f}), {compacting.n_weights(model)} weights "
+              f"instead of {compacting.n_weights(full_model)}")
+
     # 7) Save model
-    joblib.dump(model, MODEL_FILE)
+    save_model(model, MODEL_FILE)
+    print(f"\nSaved model to: {MODEL_FILE}")
+
+    # 8) Export memory-mappable serving artifact
+    export_artifact(model, X_test)
+    if compact:
+        report_compact(full_model, full_acc, model, acc)
+
+    # 9) Optionally restart the incremental model from the same split
+    if online_model:
+        bootstrap_online(X_train, y_train, X_test, y_test, feedback_seq)
+
+
+def warm_train(X_train, y_train, X_test, y_test, compare_cold=False):
+    """Fit from the previous MODEL_FILE (warmstart.py); with compare_cold, also from scratch for the report."""
+    try:
+        previous = joblib.load(MODEL_FILE)
+        warmstart.check_previous(previous)
+    except FileNotFoundError:
+        raise SystemExit(f"No {MODEL_FILE} to warm-start from. Run: python train.py")
+    except ValueError as e:
+        raise SystemExit(f"Cannot warm-start from {MODEL_FILE}: {e}")
+
+    print(f"Warm-starting from {MODEL_FILE} ({model_file_version(MODEL_FILE)})...")
+    model, warm = warmstart.warm_fit(previous, X_train, y_train)
+    print(f"Trained in {warm['seconds']:.2f}s, {warm['iterations']} solver iterations; "
+          f"{warm['new_terms']} new terms ({warm['terms']} in all)")
+    if compare_cold:
+        print("Training the same split from scratch for comparison...")
+        cold_model, cold = warmstart.cold_fit(previous, X_train, y_train)
+        warm["accuracy"] = accuracy_score(y_test, model.predict(X_test))
+        cold["accuracy"] = accuracy_score(y_test, cold_model.predict(X_test))
+        warmstart.print_comparison(warm, cold)
+    return model
+
+
+def stream_main(data_source=None, offline=False, refresh_data=False, feedback_policy="last",
+                chunk_size=streaming.CHUNK_SIZE, epochs=streaming.EPOCHS,
+                n_features=streaming.N_FEATURES):
+    """Out-of-core training (streaming.py): nothing is loaded whole, so memory follows chunk_size."""
+    try:
+        path = corpus_file(data_source, offline=offline, refresh=refresh_data)
+    except DatasetError as e:
+        raise SystemExit(f"Dataset unavailable: {e}")
+
+    store = FeedbackStore(FEEDBACK_DB)
+    try:
+        imported = store.import_log(USER_DATA_FILE)
+        if imported["records"]:
+            print(f"Imported {imported['records']} feedback records into {FEEDBACK_DB} "
+                  f"({imported['new']} new texts)")
+        print(f"Streaming {path} + {store.stats()['texts']} feedback texts in chunks of {chunk_size} "
+              f"({n_features} hashed columns, {epochs} epochs)...")
+        started = time.perf_counter()
+        model, hold_x, hold_y, stats = streaming.fit_streaming(
+            lambda: streaming.chunks(path, store.examples(feedback_policy), chunk_size),
+            n_features=n_features, epochs=epochs)
+    finally:
+        store.close()
+
+    preds = model.predict(hold_x)
+    acc = accuracy_score(hold_y, preds)
+    print(f"\nTrained on {stats['rows'] - stats['holdout']} of {stats['rows']} messages "
+          f"in {time.perf_counter() - started:.1f}s ({stats['chunks']} chunks per pass); "
+          f"peak RSS {stats['peak_rss_mb']:.0f} MB")
+    print("\nHoldout accuracy:", round(acc, 4))
+    print("\nClassification report:\n", classification_report(hold_y, preds))
+
+    save_model(model, MODEL_FILE)
     print(f"\nSaved model to: {MODEL_FILE}")
+    export_artifact(model, hold_x)
+    # the incremental model bootstraps from an in-memory split; it is left as it is
+    print(f"(--stream does not restart the incremental model in {online.ONLINE_DIR}/)")
+
+
+def report_compact(full_model, full_acc, model, acc):
+    """Accuracy, size on disk and per-worker RSS: the full model (saved to a temp dir) vs the shipped one."""
+    rows = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        full_file, full_artifact = os.path.join(tmp, MODEL_FILE), os.path.join(tmp, MODEL_ARTIFACT)
+        joblib.dump(full_model, full_file)
+        try:
+            save_artifact(full_model, full_artifact)
+        except ValueError:
+            full_artifact = None
+        rows["full"] = {"accuracy": full_acc, "weights": compacting.n_weights(full_model),
+                        **compacting.footprint(full_file, full_artifact)}
+    rows["compact"] = {"accuracy": acc, "weights": compacting.n_weights(model),
+                       **compacting.footprint(MODEL_FILE, MODEL_ARTIFACT)}
+    compacting.print_comparison(rows)
+
+
+def tune(data_source=None, offline=False, refresh_data=False, feedback_policy="last",
+         folds=5, jobs=-1, report=None):
+    """Cross-validated grid search (tune.py); prints the table and optionally writes JSON."""
+    import json
+    import tune as search
+
+    df, _ = load_training_data(data_source, offline, refresh_data, feedback_policy)
+    n  = len(search.vectorizer_settings()) * len(search.CLASSIFIER_GRID)
+    print(f"Searching {n} candidates with {folds}-fold cross-validation...")
+    started = time.perf_counter()
+    results, timings = search.run_search(df["text"], df["label"], folds=folds, jobs=jobs)
+    timings["total_seconds"] = time.perf_counter() - started
+    search.print_report(results, timings)
+
+    best = results[0]
+    print(f"\nBest: {best['candidate']}  (accuracy {best['accuracy']:.4f}, spam F1 {best['f1']:.4f}, "
+          f"{best['latency_us']:.1f} µs/msg)")
+    if report:
+        with open(report, "w", encoding="utf-8") as f:
+            json.dump({"folds": folds, "messages": len(df), "timings": timings, "results": results},
+                      f, indent=2)
+        print(f"Wrote {report}")
+
+
+def forget_feedback(path: str):
+    """Remove the messages in path (one per line) from FEEDBACK_DB; the next training run skips them."""
+    with open(path, "r", encoding="utf-8") as f:
+        texts = [line for line in (l.strip() for l in f) if line]
+    store = FeedbackStore(FEEDBACK_DB)
+    try:
+        removed = store.forget(texts)
+    finally:
+        store.close()
+    print(f"Removed {removed} of {len(texts)} messages from {FEEDBACK_DB}")
+
+
+def purge_feedback():
+    """Remove every label from FEEDBACK_DB; lines already imported from the log are not read again."""
+    store = FeedbackStore(FEEDBACK_DB)
+    try:
+        removed = store.purge()
+    finally:
+        store.close()
+    print(f"Removed all {removed} feedback texts from {FEEDBACK_DB}")
+
+
+def bootstrap_online(X_train, y_train, X_test, y_test, feedback_seq):
+    """Fresh hashing + SGD model on the full training split; checkpoint at the feedback it saw."""
+    print("\nTraining incremental model (hashing + SGD)...")
+    model = online.build_model()
+    model.fit(X_train, y_train)
+    acc = online.accuracy(model, list(X_test), list(y_test))
+    print(f"Incremental model held-out accuracy: {acc:.4f}")
+
+    online.save_holdout(list(X_test), list(y_test))
+    publish_online(model, list(X_test))
+    online.save_checkpoint(feedback_seq, 0, acc, model_file_version(online.ONLINE_MODEL), len(X_test))
+
+
+def incremental(feedback_policy="last"):
+    """Fold feedback labeled since the last checkpoint into the incremental model."""
+    checkpoint = online.load_checkpoint()
+    if checkpoint is None or not os.path.exists(online.ONLINE_MODEL):
+        raise SystemExit(f"No incremental model in {online.ONLINE_DIR}/. Run: python train.py --online")
+    if "seq" not in checkpoint:
+        raise SystemExit(f"{online.CHECKPOINT_FILE} is a log position from before {FEEDBACK_DB}. "
+                         f"Run: python train.py --online")
+
+    store = FeedbackStore(FEEDBACK_DB)
+    try:
+        imported = store.import_log(USER_DATA_FILE)
+        if imported["records"]:
+            print(f"Imported {imported['records']} feedback records into {FEEDBACK_DB} "
+                  f"({imported['new']} new texts)")
+        texts, labels, seq = online.read_new_examples(store, checkpoint["seq"], feedback_policy)
+    finally:
+        store.close()
+    if not texts:
+        print(f"No new feedback since the last update ({checkpoint['updated']}).")
+        if seq != checkpoint["seq"]:   # only texts forgotten since were labeled
+            online.save_checkpoint(seq, checkpoint["records"], checkpoint["holdout_accuracy"],
+                                   checkpoint["model_version"], checkpoint.get("holdout_rows"))
+        return
+
+    holdout = [online.is_holdout(t) for t in texts]
+    train_x = [t for t, h in zip(texts, holdout) if not h]
+    train_y = [y for y, h in zip(labels, holdout) if not h]
+    print(f"Read {len(texts)} newly labeled texts from {FEEDBACK_DB} "
+          f"({len(train_x)} to train on, {len(texts) - len(train_x)} held out)")
+    # rows past the checkpoint's count were added by a run that died before saving it
+    hold_x, hold_y = online.load_holdout(checkpoint.get("holdout_rows"))
+    if len(train_x) < len(texts):
+        hold_x += [t for t, h in zip(texts, holdout) if h]
+        hold_y += [y for y, h in zip(labels, holdout) if h]
+        online.save_holdout(hold_x, hold_y)
+
+    model = joblib.load(online.ONLINE_MODEL)
+    before = online.accuracy(model, hold_x, hold_y)
+    if train_x:
+        online.partial_update(model, train_x, train_y, seed=checkpoint["records"])
+    after = online.accuracy(model, hold_x, hold_y)
+    if hold_y:
+        print(f"Held-out accuracy: {before:.4f} -> {after:.4f} ({len(hold_y)} messages)")
+
+    publish_online(model, hold_x)
+    online.save_checkpoint(seq, checkpoint["records"] + len(texts), after,
+                           model_file_version(online.ONLINE_MODEL), len(hold_y))
+
+
+def publish_online(model, check_texts):
+    save_model(model, online.ONLINE_MODEL)
+    print(f"Saved incremental model to: {online.ONLINE_MODEL}")
+    export_artifact(model, check_texts, online.ONLINE_MODEL, online.ONLINE_ARTIFACT)
+
+
+def save_model(model, path: str):
+    # write-then-rename so a running app never loads a half-written file
+    tmp_file = f"{path}.tmp-{os.getpid()}"
+    joblib.dump(model, tmp_file)
+    os.replace(tmp_file, path)
+
+
+def export_artifact(model, check_texts, model_file: str = MODEL_FILE, artifact: str = MODEL_ARTIFACT):
+    """Write the artifact for model_file and make sure it scores exactly like the Pipeline."""
+    try:
+        save_artifact(model, artifact, model_version=model_file_version(model_file))
+        scorer, _ = load_artifact(artifact, verify=True)
+        diff = max_pipeline_diff(scorer, model, list(check_texts)[:500])
+        if diff > SCORER_TOLERANCE:
+            raise ValueError(f"artifact differs from the Pipeline by {diff:.3g}")
+    except ValueError as e:
+        # never leave an artifact from an older model next to the new model file
+        shutil.rmtree(artifact, ignore_errors=True)
+        print(f"Skipped serving artifact ({e}); app.py will load {model_file}")
+        return
+    print(f"Exported serving artifact to: {artifact}/")
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Train the spam model.")
+    parser.add_argument("--incremental", action="store_true",
+                        help=f"update the online model in {online.ONLINE_DIR}/ with new feedback only")
+    parser.add_argument("--data", metavar="SOURCE",
+                        help="dataset URL (mirror), local TSV path or sha256:<hash> of a cached copy "
+                             "(default: LOGIFY_DATA or the public URL)")
+    parser.add_argument("--offline", action="store_true",
+                        help="never download; fail at once if the dataset is not cached")
+    parser.add_argument("--refresh-data", action="store_true",
+                        help="download the dataset again even if it is cached")
+    parser.add_argument("--feedback-policy", choices=POLICIES, default="last",
+                        help="label for a text with conflicting feedback: the latest, or the majority vote")
+    parser.add_argument("--compact", choices=compacting.MODES,
+                        help="ship a compact model: pruned float32 TF-IDF, or hashed features")
+    parser.add_argument("--prune-below", type=float, default=compacting.PRUNE_BELOW,
+                        help="--compact prune: drop terms with |coef| under this")
+    parser.add_argument("--hash-features", type=int, default=compacting.HASH_FEATURES,
+                        help="--compact hashed: number of hashed columns")
+    parser.add_argument("--forget-feedback", metavar="FILE",
+                        help=f"remove the messages in FILE (one per line) from {FEEDBACK_DB} and exit")
+    parser.add_argument("--purge-feedback", action="store_true",
+                        help=f"remove every label from {FEEDBACK_DB} and exit")
+    parser.add_argument("--online", action="store_true",
+                        help=f"also train the incremental model in {online.ONLINE_DIR}/ from the same split")
+    parser.add_argument("--warm-start", action="store_true",
+                        help=f"start from the previous {MODEL_FILE}'s vocabulary and weights (see warmstart.py)")
+    parser.add_argument("--compare-cold", action="store_true",
+                        help="--warm-start: also train from scratch and compare time, iterations and accuracy")
+    parser.add_argument("--stream", action="store_true",
+                        help="out-of-core training in chunks, for corpora larger than memory (see streaming.py)")
+    parser.add_argument("--chunk-size", type=int, default=streaming.CHUNK_SIZE,
+                        help="--stream: rows per chunk (bounds memory)")
+    parser.add_argument("--epochs", type=int, default=streaming.EPOCHS,
+                        help="--stream: SGD passes over the data")
+    parser.add_argument("--stream-features", type=int, default=streaming.N_FEATURES,
+                        help="--stream: number of hashed columns")
+    parser.add_argument("--tune", action="store_true",
+                        help="cross-validated hyperparameter search instead of training (see tune.py)")
+    parser.add_argument("--folds", type=int, default=5, help="--tune: number of CV folds")
+    parser.add_argument("--jobs", type=int, default=-1, help="--tune: worker processes (-1 = all cores)")
+    parser.add_argument("--tune-report", metavar="PATH", help="--tune: also write the results as JSON")
+    args = parser.parse_args()
+    if args.forget_feedback:
+        forget_feedback(args.forget_feedback)
+    elif args.purge_feedback:
+        purge_feedback()
+    elif args.incremental:
+        incremental(args.feedback_policy)
+    elif args.stream:
+        stream_main(args.data, args.offline, args.refresh_data, args.feedback_policy,
+                    chunk_size=args.chunk_size, epochs=args.epochs, n_features=args.stream_features)
+    elif args.tune:
+        tune(args.data, args.offline, args.refresh_data, args.feedback_policy,
+             folds=args.folds, jobs=args.jobs, report=args.tune_report)
+    else:
+        main(args.data, offline=args.offline, refresh_data=args.refresh_data,
+             feedback_policy=args.feedback_policy, compact=args.compact,
+             prune_below=args.prune_below, hash_features=args.hash_features,
+             warm_start=args.warm_start, compare_cold=args.compare_cold, online_model=args.online)
@@ -0,0 +1,225 @@
+"""
+tune.py
+- Hyperparameter search for train.py's TF-IDF + LogisticRegression model
+  (python train.py --tune)
+- Grid: vectorizer settings (n-grams, min_df, sublinear_tf) x classifier
+  settings (C, l1/l2 penalty), scored by stratified k-fold cross-validation
+- Nothing is computed twice:
+    * each message is tokenized once per n-gram setting
+    * term counts are built once per (n-gram setting, fold)
+    * min_df / sublinear_tf variants are derived from those counts, and the
+      resulting TF-IDF matrices are shared by every classifier candidate
+- Count building and model fits run on every core (joblib processes); one
+  task per (vectorizer setting, fold) fits all classifier candidates on it
+- Per candidate: accuracy and spam F1 (mean over folds), fit wall time, and
+  per-message latency of the compiled hot-path scorer (measured afterwards,
+  one candidate at a time, so the timings are not skewed by the pool)
+"""
+
+import itertools
+from time import perf_counter
+
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.feature_extraction.text import CountVectorizer, TfidfTransformer, TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score, f1_score
+from sklearn.model_selection import StratifiedKFold
+from sklearn.pipeline import Pipeline
+
+from scorer import compile_pipeline, sigmoid
+
+VECTORIZER_GRID = {
+    "ngram_range":  [(1, 1), (1, 2)],
+    "min_df":       [1, 2],
+    "sublinear_tf": [False, True],
+}
+CLASSIFIER_GRID = (
+    [{"penalty": "l2", "C": C} for C in (0.5, 1.0, 2.0, 5.0, 10.0)] +
+    [{"penalty": "l1", "C": C} for C in (1.0, 5.0, 10.0)]
+)
+# what train.py ships today, marked in the report
+CURRENT = ({"ngram_range": (1, 1), "min_df": 1, "sublinear_tf": False}, {"penalty": "l2", "C": 1.0})
+
+LATENCY_SAMPLE = 300   # held-out messages timed per candidate
+LATENCY_REPEAT = 3     # best of
+
+
+def vectorizer_settings():
+    keys = list(VECTORIZER_GRID)
+    return [dict(zip(keys, values)) for values in itertools.product(*VECTORIZER_GRID.values())]
+
+
+def make_vectorizer(params: dict) -> TfidfVectorizer:
+    return TfidfVectorizer(lowercase=True, stop_words="english", **params)
+
+
+def make_classifier(params: dict) -> LogisticRegression:
+    solver = "liblinear" if params["penalty"] == "l1" else "lbfgs"
+    return LogisticRegression(max_iter=2000, solver=solver, **params)
+
+
+def describe(vec: dict, clf: dict) -> str:
+    lo, hi = vec["ngram_range"]
+    return (f"ngram={lo}-{hi} min_df={vec['min_df']} sublinear={int(vec['sublinear_tf'])} | "
+            f"{clf['penalty']} C={clf['C']:g}")
+
+
+# ── worker tasks (module level so joblib can pickle them) ────────
+
+def _pretokenized(doc):
+    return doc
+
+
+def _count_fold(train_tokens, test_tokens):
+    """Term counts for one (n-gram setting, fold): fit on the training part only."""
+    counter = CountVectorizer(analyzer=_pretokenized)
+    train   = counter.fit_transform(train_tokens)
+    test    = counter.transform(test_tokens)
+    return train, test, counter.get_feature_names_out()
+
+
+def _fit_candidates(X_train, y_train, X_test, y_test, keep_coef: bool):
+    """Every classifier candidate on one cached TF-IDF fold. Returns one row per candidate."""
+    rows = []
+    for params in CLASSIFIER_GRID:
+        clf = make_classifier(params)
+        t0 = perf_counter()
+        clf.fit(X_train, y_train)
+        fit_seconds = perf_counter() - t0
+        preds = clf.predict(X_test)
+        rows.append({
+            "accuracy":    accuracy_score(y_test, preds),
+            "f1":          f1_score(y_test, preds, pos_label=1, zero_division=0),
+            "fit_seconds": fit_seconds,
+            "nonzero":     int(np.count_nonzero(clf.coef_)),
+            "model":       (clf.coef_, clf.intercept_, clf.classes_) if keep_coef else None,
+        })
+    return rows
+
+
+# ── search ───────────────────────────────────────────────────────
+
+def tfidf_variant(counts, feature_names, min_df: int, sublinear_tf: bool):
+    """
+    TF-IDF matrices for one vectorizer setting, derived from cached counts.
+    Equal to TfidfVectorizer(min_df=..., sublinear_tf=...) fitted on the fold:
+    min_df drops columns by training-fold document frequency, which keeps the
+    sorted vocabulary order.
+    """
+    train, test = counts
+    df   = np.bincount(train.indices, minlength=train.shape[1])
+    keep = np.flatnonzero(df >= min_df)
+    if len(keep) < train.shape[1]:
+        train, test, feature_names = train[:, keep], test[:, keep], feature_names[keep]
+    transformer = TfidfTransformer(sublinear_tf=sublinear_tf).fit(train)
+    return transformer.transform(train), transformer.transform(test), feature_names, transformer.idf_
+
+
+def run_search(texts, labels, folds: int = 5, jobs: int = -1, seed: int = 0):
+    """Cross-validate the whole grid; returns one result dict per candidate, best first."""
+    texts  = list(texts)
+    labels = np.asarray(labels).astype(np.int64)
+    splits = list(StratifiedKFold(n_splits=folds, shuffle=True, random_state=seed).split(texts, labels))
+    settings = vectorizer_settings()
+    ngrams   = sorted({s["ngram_range"] for s in settings})
+    timings  = {}
+
+    # 1) tokenize every message once per n-gram setting
+    t0 = perf_counter()
+    tokens = {}
+    for ng in ngrams:
+        analyze    = make_vectorizer({"ngram_range": ng}).build_analyzer()
+        tokens[ng] = [analyze(t) for t in texts]
+    timings["tokenize_seconds"] = perf_counter() - t0
+
+    with Parallel(n_jobs=jobs) as pool:
+        # 2) term counts per (n-gram setting, fold), in parallel
+        t0 = perf_counter()
+        keys = [(ng, k) for ng in ngrams for k in range(folds)]
+        counted = pool(delayed(_count_fold)([tokens[ng][i] for i in splits[k][0]],
+                                            [tokens[ng][i] for i in splits[k][1]])
+                       for ng, k in keys)
+        counts = {key: result for key, result in zip(keys, counted)}
+        del tokens
+        timings["count_seconds"] = perf_counter() - t0
+
+        # 3) TF-IDF per (vectorizer setting, fold) from the cached counts
+        t0 = perf_counter()
+        matrices = {}
+        for v, vec in enumerate(settings):
+            for k in range(folds):
+                train, test, names = counts[(vec["ngram_range"], k)]
+                matrices[(v, k)] = tfidf_variant((train, test), names, vec["min_df"], vec["sublinear_tf"])
+        del counts
+        timings["tfidf_seconds"] = perf_counter() - t0
+
+        # 4) every classifier candidate on every cached fold, in parallel
+        t0 = perf_counter()
+        keys = list(matrices)
+        fitted = pool(delayed(_fit_candidates)(matrices[key][0], labels[splits[key[1]][0]],
+                                               matrices[key][1], labels[splits[key[1]][1]],
+                                               keep_coef=key[1] == 0)
+                      for key in keys)
+        per_fold = dict(zip(keys, fitted))
+        timings["fit_seconds"] = perf_counter() - t0
+
+    # 5) aggregate, then time each candidate's hot-path scorer (fold 0 model) on its own
+    sample  = [texts[i] for i in splits[0][1][:LATENCY_SAMPLE]]
+    results = []
+    for v, vec in enumerate(settings):
+        _, _, names, idf = matrices[(v, 0)]
+        for c, clf in enumerate(CLASSIFIER_GRID):
+            rows = [per_fold[(v, k)][c] for k in range(folds)]
+            acc  = [r["accuracy"] for r in rows]
+            f1   = [r["f1"] for r in rows]
+            results.append({
+                "candidate":        describe(vec, clf),
+                "vectorizer":       {**vec, "ngram_range": list(vec["ngram_range"])},
+                "classifier":       clf,
+                "current":          (vec, clf) == CURRENT,
+                "accuracy":         round(float(np.mean(acc)), 4),
+                "accuracy_std":     round(float(np.std(acc)), 4),
+                "f1":               round(float(np.mean(f1)), 4),
+                "f1_std":           round(float(np.std(f1)), 4),
+                "fit_seconds":      round(sum(r["fit_seconds"] for r in rows) / folds, 4),
+                "features":         len(names),
+                "nonzero_coef":     rows[0]["nonzero"],
+                "latency_us":       round(scoring_latency(vec, names, idf, rows[0]["model"], sample), 2),
+            })
+    results.sort(key=lambda r: (-r["f1"], -r["accuracy"], r["latency_us"]))
+    return results, timings
+
+
+def scoring_latency(vec: dict, feature_names, idf, model, sample) -> float:
+    """Microseconds per message through the compiled scorer, as app.py scores (best of LATENCY_REPEAT)."""
+    vectorizer = make_vectorizer(vec)
+    vectorizer.vocabulary_ = {str(t): i for i, t in enumerate(feature_names)}
+    vectorizer.idf_        = idf
+    coef, intercept, classes = model
+    clf = LogisticRegression()
+    clf.coef_, clf.intercept_, clf.classes_ = coef, intercept, classes
+    scorer = compile_pipeline(Pipeline([("tfidf", vectorizer), ("clf", clf)]))
+
+    best = float("inf")
+    for _ in range(LATENCY_REPEAT):
+        t0 = perf_counter()
+        for text in sample:
+            score, cols, contribs = scorer.analyze(text)
+            if sigmoid(score) >= 0.5:
+                scorer.top_terms(cols, contribs)
+        best = min(best, perf_counter() - t0)
+    return best / max(len(sample), 1) * 1e6
+
+
+def print_report(results, timings, top: int = None):
+    shown = results[:top] if top else results
+    width = max(len(r["candidate"]) for r in shown)
+    print(f"\n{'candidate':<{width}}  {'accuracy':>15}  {'spam F1':>15}  {'fit s':>7}  "
+          f"{'features':>8}  {'µs/msg':>7}")
+    for r in shown:
+        mark = "  <- current" if r["current"] else ""
+        print(f"{r['candidate']:<{width}}  {r['accuracy']:.4f} ± {r['accuracy_std']:.4f}  "
+              f"{r['f1']:.4f} ± {r['f1_std']:.4f}  {r['fit_seconds']:>7.3f}  "
+              f"{r['features']:>8}  {r['latency_us']:>7.1f}{mark}")
+    print("\n" + "  ".join(f"{k.replace('_seconds', '')} {v:.2f}s" for k, v in timings.items()))